@@ -0,0 +1,32 @@
+"""Add job progress columns to sync_log
+
+Revision ID: 003_sync_log_progress
+Revises: 002_add_stock_profile
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '003_sync_log_progress'
+down_revision: Union[str, None] = '002_add_stock_profile'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('sync_log', sa.Column('records_failed', sa.Integer(), server_default='0'))
+    op.add_column('sync_log', sa.Column('checkpoint', sa.String(50)))
+    op.add_column('sync_log', sa.Column('updated_at', sa.DateTime()))
+    op.create_index('idx_sync_log_type_started', 'sync_log', ['sync_type', 'started_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('idx_sync_log_type_started', 'sync_log')
+    op.drop_column('sync_log', 'updated_at')
+    op.drop_column('sync_log', 'checkpoint')
+    op.drop_column('sync_log', 'records_failed')
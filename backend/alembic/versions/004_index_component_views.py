@@ -0,0 +1,60 @@
+"""Add denormalized index_component_views table
+
+Revision ID: 004_index_component_views
+Revises: 003_sync_log_progress
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '004_index_component_views'
+down_revision: Union[str, None] = '003_sync_log_progress'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'index_component_views',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('index_symbol', sa.String(20), nullable=False),
+        sa.Column('stock_symbol', sa.String(10), nullable=False),
+        sa.Column('name', sa.String(255), nullable=False),
+        sa.Column('name_th', sa.String(255)),
+        sa.Column('sector', sa.String(100)),
+        sa.Column('weight', sa.Numeric(10, 6)),
+        sa.Column('price', sa.Numeric(12, 4)),
+        sa.Column('change_percent', sa.Numeric(8, 4)),
+        sa.Column('trend', sa.String(20)),
+        sa.Column('refreshed_at', sa.DateTime(), server_default=sa.func.now()),
+        sa.UniqueConstraint('index_symbol', 'stock_symbol', name='uq_index_component_view'),
+    )
+    op.create_index('idx_component_views_weight', 'index_component_views', ['index_symbol', 'weight'])
+    op.create_index('idx_component_views_name', 'index_component_views', ['index_symbol', 'name'])
+    op.create_index('idx_component_views_change', 'index_component_views', ['index_symbol', 'change_percent'])
+    op.create_index('idx_component_views_trend', 'index_component_views', ['index_symbol', 'trend'])
+    
+    # Populate from the current data
+    op.execute("""
+        INSERT INTO index_component_views
+            (index_symbol, stock_symbol, name, name_th, sector, weight,
+             price, change_percent, trend, refreshed_at)
+        SELECT ic.index_symbol, ic.stock_symbol, s.name, s.name_th, s.sector, ic.weight,
+               q.price, q.change_percent, q.trend, now()
+        FROM index_components ic
+        JOIN stocks s ON s.symbol = ic.stock_symbol
+        LEFT JOIN latest_quotes q ON q.symbol = ic.stock_symbol
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_component_views_trend', 'index_component_views')
+    op.drop_index('idx_component_views_change', 'index_component_views')
+    op.drop_index('idx_component_views_name', 'index_component_views')
+    op.drop_index('idx_component_views_weight', 'index_component_views')
+    op.drop_table('index_component_views')
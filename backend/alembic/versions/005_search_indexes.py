@@ -0,0 +1,128 @@
+"""Add trigram and full-text search indexes
+
+Revision ID: 005_search_indexes
+Revises: 004_index_component_views
+Create Date: 2026-10-17
+
+Substring search (ILIKE '%term%') on stocks, etfs and
+index_component_views could not use the btree indexes and scanned every
+row. This adds pg_trgm GIN indexes on the searched columns and a
+generated tsvector over symbol, names and descriptions (English and
+Thai) on stocks and etfs.
+
+The indexes are built CONCURRENTLY (outside the migration transaction)
+so reads and writes continue during a deploy. Adding the generated
+column still rewrites stocks and etfs under a brief exclusive lock. If
+a concurrent build fails it leaves an INVALID index; drop it and re-run.
+
+Compare plans before and after with scripts/explain_search.py.
+
+Measured with that script on PostgreSQL 18.6 (warm cache, best of two
+runs, execution times in ms). Full plans are printed by the script.
+
+Seeded catalog (518 stocks, 50 ETFs, 604 component rows): every query is
+a Seq Scan before and after. With ENABLE_SEQSCAN=0 the stock search
+becomes a BitmapOr over the three trigram indexes and search_vector
+(0.17 ms), so the indexes are usable, but at this size the planner
+rightly prefers the scan.
+
+    query                          before    after
+    stocks 'APP'                    0.226    0.219
+    stocks 'semiconductor'          0.114    0.132
+    etfs 'APP'                      0.032    0.041
+    components 'APP'                0.159    0.127
+    components (Thai term)          0.151    0.100
+
+Synthetic catalog (200,000 stocks, ETFs and SPX component rows): with a
+plain ILIKE filter the stock and ETF searches walk idx_{table}_symbol
+for ORDER BY symbol LIMIT 20, because ILIKE '%term%' is estimated at
+~1,000 matches; the GIN indexes are not chosen and terms that match few
+rows scan most of the table. The API therefore filters first
+(app.utils.text_search.filter_first): the matching ids are collected
+through a BitmapOr over the GIN indexes and only the matches are
+sorted. That removes the slow cases at the cost of a few ms on terms
+that match many rows. Components need no rewrite: the planner already
+uses the trigram indexes for rare terms and idx_component_views_weight
+for common ones.
+
+    query                       plain filter   filter_first
+    stocks 'APP'                       1.090          4.222
+    stocks 'micro'                     0.578          5.324
+    stocks 'semiconductor'             1.790          2.136
+    etfs 'APP'                         0.479         17.443
+    etfs 'micro'                      79.590          0.062
+    etfs 'semiconductor'              75.664          0.147
+
+The Thai term still scans (60-100 ms either way) on that database: it
+uses the C locale, where pg_trgm extracts no trigrams from Thai text.
+Use a UTF-8 locale (e.g. en_US.UTF-8) for LC_CTYPE.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '005_search_indexes'
+down_revision: Union[str, None] = '004_index_component_views'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_VECTOR = """
+    to_tsvector('simple',
+        coalesce(symbol, '') || ' ' || coalesce(name, '') || ' ' ||
+        coalesce(name_th, '') || ' ' || coalesce(description, '') || ' ' ||
+        coalesce(description_th, ''))
+"""
+
+TRIGRAM_INDEXES = [
+    ('idx_stocks_symbol_trgm', 'stocks', 'symbol'),
+    ('idx_stocks_name_trgm', 'stocks', 'name'),
+    ('idx_stocks_name_th_trgm', 'stocks', 'name_th'),
+    ('idx_etfs_symbol_trgm', 'etfs', 'symbol'),
+    ('idx_etfs_name_trgm', 'etfs', 'name'),
+    ('idx_etfs_name_th_trgm', 'etfs', 'name_th'),
+    ('idx_component_views_symbol_trgm', 'index_component_views', 'stock_symbol'),
+    ('idx_component_views_name_trgm', 'index_component_views', 'name'),
+    ('idx_component_views_name_th_trgm', 'index_component_views', 'name_th'),
+]
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    
+    for table in ('stocks', 'etfs'):
+        op.execute(
+            f"ALTER TABLE {table} ADD COLUMN search_vector tsvector "
+            f"GENERATED ALWAYS AS ({SEARCH_VECTOR}) STORED"
+        )
+    
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, table, column in TRIGRAM_INDEXES:
+            op.create_index(
+                name, table, [column],
+                postgresql_using='gin',
+                postgresql_ops={column: 'gin_trgm_ops'},
+                postgresql_concurrently=True,
+            )
+        for table in ('stocks', 'etfs'):
+            op.create_index(
+                f'idx_{table}_search_vector', table, ['search_vector'],
+                postgresql_using='gin',
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for table in ('etfs', 'stocks'):
+            op.drop_index(f'idx_{table}_search_vector', table, postgresql_concurrently=True)
+        for name, table, _ in reversed(TRIGRAM_INDEXES):
+            op.drop_index(name, table, postgresql_concurrently=True)
+    
+    for table in ('etfs', 'stocks'):
+        op.drop_column(table, 'search_vector')
+    
+    # pg_trgm is left installed; other objects may depend on it
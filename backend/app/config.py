@@ -27,7 +27,45 @@ class Settings(BaseSettings):
     allowed_origins: str = "http://localhost:3000"
     
     # Yahoo Finance
-    yfinance_rate_limit: int = 5
+    yfinance_rate_limit: int = 5  # Requests per second across all workers
+    yfinance_burst: int = 10  # Requests allowed back-to-back after idling
+    yfinance_interactive_rate_limit: int = 2  # Share of the rate reserved for request-path lookups
+    yfinance_interactive_burst: int = 5  # Share of the burst; syncs get the rest
+    yfinance_rate_limit_backend: str = "redis"  # 'redis' or 'local'
+    yfinance_batch_size: int = 100  # Tickers per multi-ticker download
+    yfinance_max_workers: int = 8  # Threads running blocking yfinance calls
+    yfinance_max_concurrency: int = 4  # Calls allowed in flight at once
+    yfinance_timeout: float = 30.0  # Seconds before a call is abandoned
+    yfinance_batch_timeout: float = 120.0  # Seconds for multi-ticker downloads
+    
+    # Refresh scheduler (times are US Eastern)
+    scheduler_enabled: bool = True  # Run scheduled syncs in this process
+    
+    # Quote refresh tiers (symbols ranked by demand, index weight, top-50 ETFs)
+    refresh_hot_size: int = 100  # Highest-ranked symbols
+    refresh_warm_size: int = 400  # Next-ranked symbols; the rest form the tail
+    refresh_hot_interval: int = 60  # Seconds between refreshes per tier
+    refresh_warm_interval: int = 900
+    refresh_tail_interval: int = 3600
+    
+    # In-process cache tier in front of Redis
+    cache_local_max_entries: int = 10000  # LRU bound per worker
+    cache_local_max_ttl: int = 30  # Seconds a local copy may outlive a Redis update
+    cache_serializer: str = "orjson"  # 'json', 'orjson' or 'msgpack'
+    cache_compression: str = "zstd"  # 'none', 'zstd' or 'lz4'
+    cache_compression_threshold: int = 1024  # Bytes; smaller values are stored uncompressed
+    
+    # Cache warm-up on startup and after syncs
+    cache_warm_enabled: bool = True
+    cache_warm_stocks: int = 100  # Top-ranked stock details to pre-compute
+    cache_warm_concurrency: int = 4  # Pages built at once (each uses a DB connection)
+    cache_warm_timeout: int = 30  # Seconds startup waits before serving anyway
+    
+    # Background profile enrichment
+    enrichment_queue_size: int = 1000  # Symbols waiting; further requests are dropped
+    
+    # Price archive (memory-mapped per-symbol files; relative to backend/)
+    price_archive_dir: str = "data/price_archive"
     
     # Admin
     admin_api_key: str = "dev-secret-key"
@@ -1,4 +1,31 @@
 """
 Jobs package initialization.
-Placeholder for scheduled job definitions.
+Long-running syncs executed by the background job runner and the
+market-hours refresh scheduler (app.jobs.scheduler).
 """
+from app.jobs.runner import (
+    JobAlreadyRunning,
+    JobContext,
+    start_job,
+    get_job,
+    list_jobs,
+    cancel_jobs,
+)
+from app.jobs.price_sync import run_price_sync
+from app.jobs.profile_sync import run_profile_sync
+from app.jobs.history_sync import run_history_sync, run_close_sync
+from app.jobs.holdings_sync import run_holdings_sync
+
+__all__ = [
+    "JobAlreadyRunning",
+    "JobContext",
+    "start_job",
+    "get_job",
+    "list_jobs",
+    "cancel_jobs",
+    "run_price_sync",
+    "run_profile_sync",
+    "run_history_sync",
+    "run_close_sync",
+    "run_holdings_sync",
+]
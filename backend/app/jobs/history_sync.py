@@ -0,0 +1,88 @@
+"""
+Daily price history sync job.
+"""
+import logging
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.jobs.runner import JobContext
+from app.jobs.warmup import warm_cache
+from app.services.cache import get_cache_service, TAG_HISTORY, TAG_PRICES
+from app.services.component_views import update_component_quotes
+from app.services.indicator_engine import recompute_indicators
+from app.services.price_history import sync_history_batch
+from app.services.quote_store import load_type_map, save_quotes
+
+logger = logging.getLogger(__name__)
+
+
+async def run_history_sync(db: AsyncSession, ctx: JobContext, period: str = "5d"):
+    """
+    Store daily bars for every symbol in the price tables and archive.
+    
+    Use a long period once to backfill, then '5d' after each close to
+    append the latest bars.
+    
+    Args:
+        db: Database session
+        ctx: Job context for progress reporting
+        period: yfinance period to download
+    """
+    type_map = await load_type_map(db)
+    pending = sorted(s for s in type_map if not ctx.should_skip(s))
+    
+    logger.info(f"Starting {period} history sync for {len(pending)} symbols")
+    
+    batch_size = get_settings().yfinance_batch_size
+    failed_batch = False
+    for i in range(0, len(pending), batch_size):
+        batch = pending[i:i + batch_size]
+        
+        try:
+            bars_by_symbol = await sync_history_batch(db, batch, type_map, period)
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Error storing history for {batch[0]}..{batch[-1]}: {e}")
+            # A resume skips everything up to the checkpoint, so it must
+            # not move past this batch (nor past later ones)
+            await ctx.progress(processed=len(batch), failed=len(batch))
+            failed_batch = True
+            continue
+        
+        stored = sum(1 for bars in bars_by_symbol.values() if bars)
+        await ctx.progress(
+            processed=len(batch),
+            updated=stored,
+            failed=len(batch) - stored,
+            checkpoint=None if failed_batch else batch[-1],
+        )
+    
+    cache = await get_cache_service()
+    await cache.bump(TAG_HISTORY)
+
+
+async def run_close_sync(db: AsyncSession, ctx: JobContext):
+    """
+    Post-close refresh: append the session's bars, then recompute
+    indicators for every symbol from the stored prices. Indicators the
+    stored history does not cover (e.g. SMA200 before a backfill) are
+    not written, so the values from the quote sync stay in place.
+    
+    Args:
+        db: Database session
+        ctx: Job context for progress reporting
+    """
+    await run_history_sync(db, ctx, period="5d")
+    
+    type_map = await load_type_map(db)
+    rows = await recompute_indicators(db, type_map)
+    await save_quotes(db, rows, type_map)
+    await update_component_quotes(db)
+    await db.commit()
+    
+    cache = await get_cache_service()
+    await cache.delete_pattern("quote:*")
+    await cache.bump(TAG_PRICES)
+    await warm_cache()
@@ -0,0 +1,85 @@
+"""
+ETF details and holdings sync job.
+"""
+import logging
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.jobs.runner import JobContext
+from app.models import ETF, ETFHolding
+from app.services.cache import get_cache_service, etf_key, etf_holdings_key, quote_key
+from app.services.quote_store import fundamentals_quote, save_quotes
+from app.services.yahoo_finance import get_yahoo_service
+
+logger = logging.getLogger(__name__)
+
+# ETFs per commit and progress update
+COMMIT_EVERY = 10
+
+
+async def run_holdings_sync(db: AsyncSession, ctx: JobContext):
+    """
+    Refresh expense ratio, AUM, holdings and the LatestQuote
+    fundamentals (market cap, dividend yield, ...) for every active ETF.
+    
+    Holdings are replaced wholesale when Yahoo returns any; an empty
+    response leaves the stored holdings alone.
+    
+    Args:
+        db: Database session
+        ctx: Job context for progress reporting
+    """
+    yahoo = get_yahoo_service()
+    cache = await get_cache_service()
+    etfs = (await db.execute(
+        select(ETF).where(ETF.is_active == True).order_by(ETF.symbol)
+    )).scalars().all()
+    etfs = [e for e in etfs if not ctx.should_skip(e.symbol)]
+    
+    logger.info(f"Starting holdings sync for {len(etfs)} ETFs")
+    
+    processed = updated = failed = 0
+    changed = []
+    quotes = []
+    for i, etf in enumerate(etfs, 1):
+        processed += 1
+        try:
+            info = await yahoo.get_etf_info(etf.symbol)
+            if info:
+                if info.get('expense_ratio') is not None:
+                    etf.expense_ratio = info['expense_ratio']
+                if info.get('aum') is not None:
+                    etf.aum = info['aum']
+                
+                holdings = info.get('holdings') or []
+                if holdings:
+                    await db.execute(delete(ETFHolding).where(ETFHolding.etf_symbol == etf.symbol))
+                    db.add_all([
+                        ETFHolding(
+                            etf_symbol=etf.symbol,
+                            holding_symbol=h.get('holding_symbol'),
+                            holding_name=h.get('holding_name'),
+                            weight=h.get('weight'),
+                            shares=int(h['shares']) if h.get('shares') else None,
+                        )
+                        for h in holdings
+                    ])
+                quotes.append(fundamentals_quote(etf.symbol, info['fundamentals']))
+                changed.append(etf.symbol)
+                updated += 1
+        except Exception as e:
+            logger.error(f"Error syncing holdings for {etf.symbol}: {e}")
+            failed += 1
+        
+        if i % COMMIT_EVERY == 0 or i == len(etfs):
+            await save_quotes(db, quotes, {s: "etf" for s in changed})
+            await db.commit()
+            await cache.delete_many(
+                key for s in changed
+                for key in (etf_key(s), etf_holdings_key(s), quote_key(s))
+            )
+            await ctx.progress(processed, updated, failed, checkpoint=etf.symbol)
+            processed = updated = failed = 0
+            changed = []
+            quotes = []
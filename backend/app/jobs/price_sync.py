@@ -0,0 +1,98 @@
+"""
+Latest-quote sync job.
+"""
+from typing import List, Optional
+import logging
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.jobs.runner import JobContext
+from app.jobs.warmup import warm_cache
+from app.services.cache import get_cache_service, quote_key, TAG_PRICES
+from app.services.component_views import update_component_quotes
+from app.services.quote_cache import get_quotes
+from app.services.quote_store import load_type_map, save_quotes
+from app.services.sma_tracker import get_sma_tracker
+from app.services.yahoo_finance import get_yahoo_service
+
+logger = logging.getLogger(__name__)
+
+
+async def run_price_sync(
+    db: AsyncSession,
+    ctx: JobContext,
+    symbols: Optional[List[str]] = None
+):
+    """
+    Refresh LatestQuote rows from Yahoo Finance.
+    
+    A full sync processes symbols in sorted order so that a resumed run
+    can skip everything up to the last batch committed before the first
+    failure. An explicit
+    symbol list (e.g. from the refresh planner) keeps its priority order.
+    
+    Args:
+        db: Database session
+        ctx: Job context for progress reporting
+        symbols: Symbols to refresh, highest priority first (default: all
+            stocks and ETFs)
+    """
+    yahoo = get_yahoo_service()
+    cache = await get_cache_service()
+    type_map = await load_type_map(db)
+    
+    if symbols is None:
+        pending = sorted(s for s in type_map if not ctx.should_skip(s))
+    else:
+        pending = [s for s in dict.fromkeys(symbols) if s in type_map]
+    
+    # Seed moving-average windows from stored prices so that batches
+    # only download the newest bars for those symbols
+    tracker = get_sma_tracker()
+    await tracker.load_from_db(db, {
+        sym: type_map[sym] for sym in pending if not tracker.is_current(sym)
+    })
+    
+    logger.info(f"Starting price sync for {len(pending)} symbols")
+    
+    # One multi-ticker download per batch
+    batch_size = get_settings().yfinance_batch_size
+    failed_batch = False
+    for i in range(0, len(pending), batch_size):
+        batch = pending[i:i + batch_size]
+        
+        try:
+            quotes = await yahoo.batch_get_quotes(batch, strict=True)
+            updated = await save_quotes(db, quotes.values(), type_map)
+            await db.commit()
+            await cache.delete_many(quote_key(s) for s in quotes)
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Error syncing batch {batch[0]}..{batch[-1]}: {e}")
+            # A resume skips everything up to the checkpoint, so it must
+            # not move past this batch (nor past later ones)
+            await ctx.progress(processed=len(batch), failed=len(batch))
+            failed_batch = True
+            continue
+        
+        await ctx.progress(
+            processed=len(batch),
+            updated=updated,
+            failed=len(batch) - updated,
+            checkpoint=None if failed_batch else batch[-1],
+        )
+    
+    # Component pages sort on the copied quote fields
+    await update_component_quotes(db, symbols)
+    await db.commit()
+    
+    if symbols is None:
+        # Full sync: pages listing prices are rebuilt on their next
+        # request, the popular ones right away
+        await cache.bump(TAG_PRICES)
+        await warm_cache()
+    else:
+        # Tier tick: re-cache only the synced quotes. Pages sorted by
+        # change or trend follow on their own short TTL.
+        await get_quotes(pending, db)
@@ -0,0 +1,72 @@
+"""
+Company profile sync job.
+"""
+import logging
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.jobs.runner import JobContext
+from app.jobs.warmup import warm_cache
+from app.models import Stock
+from app.services.cache import get_cache_service, quote_key, stock_key
+from app.services.quote_store import fundamentals_quote, save_quotes
+from app.services.yahoo_finance import get_yahoo_service
+
+logger = logging.getLogger(__name__)
+
+# Stocks per commit and progress update
+COMMIT_EVERY = 10
+
+
+async def run_profile_sync(db: AsyncSession, ctx: JobContext):
+    """
+    Refresh CEO, employees, headquarters, description and website for
+    every stock, along with the fundamentals in its LatestQuote row
+    (market cap, P/E, EPS, dividend yield). Request pacing is left to the
+    Yahoo service's rate limiter.
+    
+    Args:
+        db: Database session
+        ctx: Job context for progress reporting
+    """
+    yahoo = get_yahoo_service()
+    cache = await get_cache_service()
+    stocks = (await db.execute(select(Stock).order_by(Stock.symbol))).scalars().all()
+    stocks = [s for s in stocks if not ctx.should_skip(s.symbol)]
+    
+    logger.info(f"Starting profile sync for {len(stocks)} stocks")
+    
+    processed = updated = failed = 0
+    changed = []
+    quotes = []
+    for i, stock in enumerate(stocks, 1):
+        processed += 1
+        try:
+            info = await yahoo.get_stock_info(stock.symbol)
+            if info:
+                stock.ceo = info.get('ceo')
+                stock.employees = info.get('employees')
+                stock.headquarters = info.get('headquarters')
+                stock.description = info.get('description')
+                stock.website = info.get('website')
+                quotes.append(fundamentals_quote(stock.symbol, info['fundamentals']))
+                changed.append(stock.symbol)
+                updated += 1
+        except Exception as e:
+            logger.error(f"Error syncing profile for {stock.symbol}: {e}")
+            failed += 1
+        
+        if i % COMMIT_EVERY == 0 or i == len(stocks):
+            await save_quotes(db, quotes, {s: "stock" for s in changed})
+            await db.commit()
+            await cache.delete_many(
+                key for s in changed for key in (stock_key(s), quote_key(s))
+            )
+            await ctx.progress(processed, updated, failed, checkpoint=stock.symbol)
+            processed = updated = failed = 0
+            changed = []
+            quotes = []
+    
+    # Re-cache the popular details dropped above
+    await warm_cache()
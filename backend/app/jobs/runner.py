@@ -0,0 +1,268 @@
+"""
+Background job runner with progress recorded in the sync_log table.
+
+Jobs run as asyncio tasks with their own database sessions, so a long
+sync never holds the session of the request that started it. Progress,
+a resumable checkpoint and a heartbeat are written to sync_log as the
+job goes.
+"""
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import logging
+
+from sqlalchemy import select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_session_maker
+from app.models import SyncLog
+
+logger = logging.getLogger(__name__)
+
+# A 'started' job whose heartbeat is older than this is treated as dead
+STALE_AFTER = timedelta(minutes=10)
+
+# Tasks started by this process, by sync type
+_tasks: Dict[str, asyncio.Task] = {}
+
+
+class JobAlreadyRunning(Exception):
+    """A job of the same type is already running."""
+
+
+class JobContext:
+    """Handle passed to a job for reporting progress."""
+    
+    def __init__(self, log_id: int, sync_type: str, resume_after: Optional[str] = None):
+        self.log_id = log_id
+        self.sync_type = sync_type
+        self.resume_after = resume_after
+        self.checkpoint = resume_after
+        self.processed = 0
+        self.updated = 0
+        self.failed = 0
+    
+    def should_skip(self, key: str) -> bool:
+        """Check whether an item was handled by the run being resumed."""
+        return self.resume_after is not None and key <= self.resume_after
+    
+    async def progress(
+        self,
+        processed: int = 0,
+        updated: int = 0,
+        failed: int = 0,
+        checkpoint: Optional[str] = None
+    ):
+        """
+        Add to the job's counters and persist them.
+        
+        Args:
+            processed: Items handled since the last call
+            updated: Items written since the last call
+            failed: Items that failed since the last call
+            checkpoint: Sort key of the last item fully handled
+        """
+        self.processed += processed
+        self.updated += updated
+        self.failed += failed
+        if checkpoint is not None:
+            self.checkpoint = checkpoint
+        
+        await _update_log(self.log_id, **self._counters())
+    
+    def _counters(self) -> Dict[str, Any]:
+        return {
+            "records_processed": self.processed,
+            "records_updated": self.updated,
+            "records_failed": self.failed,
+            "checkpoint": self.checkpoint,
+            "updated_at": datetime.utcnow(),
+        }
+
+
+JobFunc = Callable[..., Awaitable[None]]
+
+
+async def _update_log(log_id: int, **values):
+    """Update a sync_log row in its own short transaction."""
+    session_maker = get_session_maker()
+    async with session_maker() as session:
+        await session.execute(
+            update(SyncLog).where(SyncLog.id == log_id).values(**values)
+        )
+        await session.commit()
+
+
+def _is_running(log: SyncLog) -> bool:
+    heartbeat = log.updated_at or log.started_at
+    return (
+        log.status == "started"
+        and heartbeat is not None
+        and datetime.utcnow() - heartbeat < STALE_AFTER
+    )
+
+
+async def start_job(
+    sync_type: str,
+    func: JobFunc,
+    resume: bool = False,
+    **kwargs
+) -> int:
+    """
+    Start a job in the background.
+    
+    ``func`` is called as ``func(db, ctx, **kwargs)`` with a session and
+    a JobContext of its own.
+    
+    Args:
+        sync_type: Job type recorded in sync_log
+        func: Job coroutine function
+        resume: Continue after the checkpoint of the last unfinished run
+    
+    Returns:
+        sync_log id of the new run
+    
+    Raises:
+        JobAlreadyRunning: If a run of the same type is still alive
+    """
+    task = _tasks.get(sync_type)
+    if task and not task.done():
+        raise JobAlreadyRunning(sync_type)
+    
+    session_maker = get_session_maker()
+    async with session_maker() as session:
+        # Serialize the check and the insert across workers; the lock is
+        # released when this transaction ends
+        await session.execute(
+            text("SELECT pg_advisory_xact_lock(hashtext(:key))"),
+            {"key": f"sync_job:{sync_type}"},
+        )
+        latest = (await session.execute(
+            select(SyncLog)
+            .where(SyncLog.sync_type == sync_type)
+            .order_by(SyncLog.started_at.desc())
+            .limit(1)
+        )).scalar_one_or_none()
+        
+        # Another worker may be running it
+        if latest and _is_running(latest):
+            raise JobAlreadyRunning(sync_type)
+        
+        resume_after = None
+        if resume and latest and latest.status != "completed":
+            resume_after = latest.checkpoint
+        
+        now = datetime.utcnow()
+        log = SyncLog(
+            sync_type=sync_type,
+            status="started",
+            records_processed=0,
+            records_updated=0,
+            records_failed=0,
+            checkpoint=resume_after,
+            started_at=now,
+            updated_at=now,
+        )
+        session.add(log)
+        await session.commit()
+        log_id = log.id
+    
+    ctx = JobContext(log_id, sync_type, resume_after)
+    _tasks[sync_type] = asyncio.create_task(
+        _run(func, ctx, kwargs), name=f"job:{sync_type}:{log_id}"
+    )
+    return log_id
+
+
+async def _run(func: JobFunc, ctx: JobContext, kwargs: Dict[str, Any]):
+    """Run a job and record its outcome."""
+    started = time.monotonic()
+    status, error = "completed", None
+    
+    try:
+        session_maker = get_session_maker()
+        async with session_maker() as db:
+            await func(db, ctx, **kwargs)
+    except asyncio.CancelledError:
+        await asyncio.shield(_update_log(
+            ctx.log_id, status="interrupted", **ctx._counters()
+        ))
+        raise
+    except Exception as e:
+        logger.exception(f"Job {ctx.sync_type} #{ctx.log_id} failed")
+        status, error = "failed", str(e)
+    
+    try:
+        await _update_log(
+            ctx.log_id,
+            status=status,
+            error_message=error,
+            completed_at=datetime.utcnow(),
+            **ctx._counters(),
+        )
+    except Exception as e:
+        logger.error(f"Could not record job {ctx.sync_type} #{ctx.log_id}: {e}")
+    
+    elapsed = time.monotonic() - started
+    logger.info(
+        f"Job {ctx.sync_type} #{ctx.log_id} {status}: "
+        f"{ctx.processed} processed, {ctx.updated} updated in {elapsed:.1f}s"
+    )
+
+
+async def cancel_jobs():
+    """Cancel jobs started by this process (used on shutdown)."""
+    tasks = [t for t in _tasks.values() if not t.done()]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def job_to_dict(log: SyncLog) -> Dict[str, Any]:
+    """Serialize a sync_log row with derived status and throughput."""
+    status = log.status
+    if status == "started" and not _is_running(log):
+        status = "interrupted"
+    
+    end = log.completed_at or log.updated_at
+    elapsed = (end - log.started_at).total_seconds() if end and log.started_at else None
+    throughput = (
+        round(log.records_processed / elapsed, 2)
+        if elapsed and log.records_processed else None
+    )
+    
+    return {
+        "id": log.id,
+        "sync_type": log.sync_type,
+        "status": status,
+        "records_processed": log.records_processed,
+        "records_updated": log.records_updated,
+        "records_failed": log.records_failed,
+        "checkpoint": log.checkpoint,
+        "error_message": log.error_message,
+        "started_at": log.started_at.isoformat() if log.started_at else None,
+        "updated_at": log.updated_at.isoformat() if log.updated_at else None,
+        "completed_at": log.completed_at.isoformat() if log.completed_at else None,
+        "elapsed_seconds": round(elapsed, 1) if elapsed is not None else None,
+        "records_per_second": throughput,
+    }
+
+
+async def get_job(db: AsyncSession, job_id: int) -> Optional[Dict[str, Any]]:
+    """Get one job run by id."""
+    log = await db.get(SyncLog, job_id)
+    return job_to_dict(log) if log else None
+
+
+async def list_jobs(
+    db: AsyncSession,
+    sync_type: Optional[str] = None,
+    limit: int = 20
+) -> List[Dict[str, Any]]:
+    """List recent job runs, newest first."""
+    query = select(SyncLog).order_by(SyncLog.started_at.desc()).limit(limit)
+    if sync_type:
+        query = query.where(SyncLog.sync_type == sync_type)
+    logs = (await db.execute(query)).scalars().all()
+    return [job_to_dict(log) for log in logs]
@@ -0,0 +1,191 @@
+"""
+Market-hours-aware refresh schedule.
+
+Quotes are refreshed while the US market is open and not at all outside
+it; each tick refreshes the priority tiers that are due (see
+app.services.refresh_planner). Daily bars and indicators are refreshed once
+after the close, and profiles and ETF holdings overnight. Holidays and
+weekends are skipped.
+
+Every worker runs the scheduler, but only the one holding the leader
+key in Redis starts jobs, so ticks and tier timestamps are not
+multiplied by the number of workers. Every scheduled run also goes
+through the job runner, so a run that is still in progress (here or in
+another worker) is never started twice.
+"""
+from typing import Optional
+import logging
+import uuid
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+
+from app.config import get_settings
+from app.database import get_session_maker
+from app.jobs.runner import JobAlreadyRunning, JobFunc, start_job
+from app.jobs.history_sync import run_close_sync
+from app.jobs.holdings_sync import run_holdings_sync
+from app.jobs.price_sync import run_price_sync
+from app.jobs.profile_sync import run_profile_sync
+from app.services.cache import get_cache_service
+from app.services.refresh_planner import get_refresh_planner
+from app.utils.helpers import is_market_open, is_trading_day
+
+logger = logging.getLogger(__name__)
+
+MARKET_TZ = "America/New_York"
+
+# Held by the worker that starts scheduled jobs. The leader renews it on
+# every quote tick; if it dies, another worker takes over once it expires
+LEADER_KEY = "scheduler:leader"
+
+# Takes the key if it is free, renews it if we already hold it
+CLAIM_LEADER_SCRIPT = """
+local holder = redis.call('GET', KEYS[1])
+if holder == false or holder == ARGV[1] then
+    redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[2])
+    return 1
+end
+return 0
+"""
+
+_worker_id = uuid.uuid4().hex
+
+
+async def _is_leader() -> bool:
+    """
+    Claim or renew scheduler leadership for this worker.
+    
+    Without Redis there is nothing to coordinate through, so every
+    worker schedules on its own.
+    """
+    redis = (await get_cache_service()).redis
+    if redis is None:
+        return True
+    # Outlives a couple of missed ticks
+    ttl_ms = 3 * get_settings().refresh_hot_interval * 1000
+    try:
+        return bool(await redis.eval(CLAIM_LEADER_SCRIPT, 1, LEADER_KEY, _worker_id, ttl_ms))
+    except Exception as e:
+        logger.error(f"Scheduler leader check failed: {e}")
+        return False
+
+
+async def _start(sync_type: str, func: JobFunc, **kwargs) -> bool:
+    """
+    Start a job unless one of the same type is still running.
+    
+    Returns:
+        True if the job was started
+    """
+    try:
+        job_id = await start_job(sync_type, func, **kwargs)
+        logger.info(f"Scheduled {sync_type} sync started as job #{job_id}")
+        return True
+    except JobAlreadyRunning:
+        logger.info(f"Skipping scheduled {sync_type} sync: previous run still active")
+    except Exception as e:
+        logger.error(f"Could not start scheduled {sync_type} sync: {e}")
+    return False
+
+
+async def refresh_quotes():
+    """Refresh the quote tiers that are due while the market is open."""
+    # Checked first: this tick also keeps the leadership alive
+    if not await _is_leader() or not is_market_open():
+        return
+    
+    planner = get_refresh_planner()
+    session_maker = get_session_maker()
+    async with session_maker() as db:
+        tiers, symbols = await planner.due_symbols(db)
+    
+    # A sync type of its own: tier ticks must not take over the
+    # checkpoint of an interrupted full sync, or block manual syncs
+    if symbols and await _start("quote_tiers", run_price_sync, symbols=symbols):
+        planner.mark_refreshed(tiers)
+        logger.info(f"Refreshing {len(symbols)} quotes for tiers {', '.join(tiers)}")
+
+
+async def refresh_after_close():
+    """Append the session's daily bars and recompute indicators."""
+    if is_trading_day() and await _is_leader():
+        await _start("prices", run_close_sync)
+
+
+async def refresh_profiles():
+    """Refresh company profiles after a trading day."""
+    if is_trading_day() and await _is_leader():
+        await _start("profiles", run_profile_sync)
+
+
+async def refresh_holdings():
+    """Refresh ETF details and holdings after a trading day."""
+    if is_trading_day() and await _is_leader():
+        await _start("holdings", run_holdings_sync)
+
+
+def create_scheduler() -> AsyncIOScheduler:
+    """
+    Build the scheduler with all refresh jobs registered.
+    
+    Returns:
+        Scheduler that has not been started yet
+    """
+    settings = get_settings()
+    scheduler = AsyncIOScheduler(
+        timezone=MARKET_TZ,
+        job_defaults={
+            # A missed tick is run once, not once per missed interval
+            "coalesce": True,
+            "max_instances": 1,
+            "misfire_grace_time": 60,
+        },
+    )
+    
+    scheduler.add_job(
+        refresh_quotes,
+        # Tick at the hot-tier rate; slower tiers join when they are due
+        IntervalTrigger(seconds=settings.refresh_hot_interval),
+        id="refresh_quotes",
+    )
+    # 16:15 ET leaves time for the closing prints to settle
+    scheduler.add_job(
+        refresh_after_close,
+        CronTrigger(day_of_week="mon-fri", hour=16, minute=15),
+        id="refresh_after_close",
+    )
+    scheduler.add_job(
+        refresh_profiles,
+        CronTrigger(day_of_week="mon-fri", hour=20, minute=0),
+        id="refresh_profiles",
+    )
+    scheduler.add_job(
+        refresh_holdings,
+        CronTrigger(day_of_week="mon-fri", hour=21, minute=0),
+        id="refresh_holdings",
+    )
+    return scheduler
+
+
+# Singleton instance
+_scheduler: Optional[AsyncIOScheduler] = None
+
+
+def start_scheduler():
+    """Start the refresh scheduler if enabled in settings."""
+    global _scheduler
+    if not get_settings().scheduler_enabled or _scheduler is not None:
+        return
+    _scheduler = create_scheduler()
+    _scheduler.start()
+    logger.info("Refresh scheduler started")
+
+
+def shutdown_scheduler():
+    """Stop the refresh scheduler without waiting for running jobs."""
+    global _scheduler
+    if _scheduler is not None:
+        _scheduler.shutdown(wait=False)
+        _scheduler = None
@@ -0,0 +1,172 @@
+"""
+Cache warm-up.
+
+Pre-computes the most requested cache entries so that the first visitors
+after a deploy or a sync do not pay for them: the default-sort pages of
+the SPX and NDX components, the top 50 ETFs, the details of the
+highest-ranked stocks and the quotes shown on all of those. Entries that
+are already cached and fresh are left alone, so a warm-up on a warm
+cache costs a few round-trips.
+"""
+import asyncio
+import time
+from typing import Awaitable, Dict, Iterable, List, Optional
+import logging
+
+from sqlalchemy import select
+
+from app.config import get_settings
+from app.database import get_session_maker
+from app.models import Stock
+from app.services.cache import get_cache_service, stock_key
+from app.services.enrichment import needs_enrichment
+from app.services.quote_cache import get_quotes
+from app.services.refresh_planner import build_plan
+from app.services.views import (
+    DEFAULT_COMPONENTS_PAGE,
+    get_components_page,
+    get_top50,
+    stock_to_dict,
+)
+
+logger = logging.getLogger(__name__)
+
+WARM_INDICES = ("SPX", "NDX")
+
+# A single warm-up at a time; later requests join the running one
+_warmup: Optional[asyncio.Task] = None
+
+
+async def _gather_bounded(coros: Iterable[Awaitable], limit: int) -> List:
+    """Await coroutines with at most ``limit`` running at once."""
+    semaphore = asyncio.Semaphore(limit)
+    
+    async def run(coro):
+        async with semaphore:
+            return await coro
+    
+    return await asyncio.gather(*(run(c) for c in coros))
+
+
+async def _warm_components(symbol: str, concurrency: int) -> List[str]:
+    """Warm every default-sort page of an index; returns the symbols shown."""
+    page_args = DEFAULT_COMPONENTS_PAGE
+    first = await get_components_page(symbol, 1, **page_args, with_quotes=False)
+    pages = [first]
+    
+    total_pages = first["meta"]["total_pages"]
+    if total_pages > 1:
+        pages += await _gather_bounded(
+            (
+                get_components_page(symbol, page, **page_args, with_quotes=False)
+                for page in range(2, total_pages + 1)
+            ),
+            concurrency,
+        )
+    return [row["symbol"] for page in pages for row in page["data"]]
+
+
+async def _top_stocks(limit: int) -> List[str]:
+    """Highest-ranked stocks by the refresh planner's score."""
+    session_maker = get_session_maker()
+    async with session_maker() as db:
+        plan = await build_plan(db)
+        stocks = set((await db.execute(select(Stock.symbol))).scalars())
+    ranked = [s for tier in plan.tiers.values() for s in tier if s in stocks]
+    return ranked[:limit]
+
+
+async def _warm_stock_details(symbols: List[str]) -> int:
+    """Cache missing stock details in one query and one pipeline."""
+    cache = await get_cache_service()
+    cached = await cache.get_many(stock_key(s) for s in symbols)
+    missing = [s for s in symbols if stock_key(s) not in cached]
+    if not missing:
+        return 0
+    
+    session_maker = get_session_maker()
+    async with session_maker() as db:
+        result = await db.execute(select(Stock).where(Stock.symbol.in_(missing)))
+        # Incomplete profiles are left to the first request, which queues
+        # their enrichment
+        details = {
+            stock_key(stock.symbol): stock_to_dict(stock)
+            for stock in result.scalars()
+            if not needs_enrichment(stock)
+        }
+    
+    await cache.set_many(details, 'stock')
+    return len(details)
+
+
+async def _warm() -> Dict[str, int]:
+    settings = get_settings()
+    concurrency = settings.cache_warm_concurrency
+    started = time.monotonic()
+    
+    shown: List[str] = []
+    for symbol in WARM_INDICES:
+        shown += await _warm_components(symbol, concurrency)
+    
+    session_maker = get_session_maker()
+    async with session_maker() as db:
+        shown += [etf["symbol"] for etf in await get_top50(db)]
+    
+    top_stocks = await _top_stocks(settings.cache_warm_stocks)
+    details = await _warm_stock_details(top_stocks)
+    
+    # Quotes for every row above, in one MGET plus one query for misses
+    quotes = await get_quotes(shown + top_stocks)
+    
+    summary = {
+        "component_rows": len(shown),
+        "stock_details": details,
+        "quotes": len(quotes),
+    }
+    logger.info(
+        f"Cache warm-up done in {time.monotonic() - started:.1f}s: "
+        + ", ".join(f"{k}={v}" for k, v in summary.items())
+    )
+    return summary
+
+
+async def warm_cache() -> Optional[Dict[str, int]]:
+    """
+    Warm the most requested cache entries.
+    
+    Never raises: a failed warm-up only means colder first requests.
+    
+    Returns:
+        Counts of what was warmed, or None if disabled or failed
+    """
+    global _warmup
+    if not get_settings().cache_warm_enabled:
+        return None
+    
+    if _warmup is None or _warmup.done():
+        _warmup = asyncio.ensure_future(_warm())
+    
+    try:
+        return await asyncio.shield(_warmup)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.error(f"Cache warm-up failed: {e}")
+        return None
+
+
+async def cancel_warmup():
+    """Cancel a running warm-up (on shutdown)."""
+    if _warmup is not None and not _warmup.done():
+        _warmup.cancel()
+        await asyncio.gather(_warmup, return_exceptions=True)
+
+
+async def warm_on_startup():
+    """Warm the cache before serving, bounded by ``cache_warm_timeout``."""
+    timeout = get_settings().cache_warm_timeout
+    try:
+        await asyncio.wait_for(warm_cache(), timeout=timeout)
+    except asyncio.TimeoutError:
+        # The warm-up keeps running in the background
+        logger.warning(f"Cache warm-up still running after {timeout}s; serving anyway")
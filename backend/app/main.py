@@ -3,15 +3,22 @@ FastAPI application entry point.
 """
 from contextlib import asynccontextmanager
 from datetime import datetime, timezone
+import logging
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import get_settings
 from app.database import close_db
+from app.services.yahoo_finance import close_yahoo_service
+from app.jobs import cancel_jobs
+from app.jobs.scheduler import start_scheduler, shutdown_scheduler
+from app.jobs.warmup import cancel_warmup, warm_on_startup
+from app.services.enrichment import get_enrichment_queue
 from app.routers import health, indices, stocks, etfs, search, analysis, admin
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
 
 
 @asynccontextmanager
@@ -26,7 +33,7 @@ async def lifespan(app: FastAPI):
     
     # Auto-migration for schema updates
     try:
-        from app.database import engine
+        from app.database import get_engine
         from sqlalchemy import text
         
         columns = [
@@ -37,22 +44,58 @@ async def lifespan(app: FastAPI):
             "ALTER TABLE stocks ADD COLUMN IF NOT EXISTS analysis_data TEXT",
         ]
         
-        async with engine.begin() as conn:
+        async with get_engine().begin() as conn:
             for col_sql in columns:
+                # A savepoint per statement: in Postgres one failure would
+                # otherwise abort (and roll back) every statement after it
                 try:
-                    await conn.execute(text(col_sql))
+                    async with conn.begin_nested():
+                        await conn.execute(text(col_sql))
                 except Exception as e:
                     # Ignore if column exists or other minor error
-                    print(f"Migration note: {e}")
-                    
+                    logger.warning(f"Migration note: {e}")
+        
         print("Schema migration checked.")
     except Exception as e:
         print(f"Schema migration warning: {e}")
     
+    # Full-text search needs migration 005; match substrings only without it
+    try:
+        from app.database import get_engine
+        from app.utils.text_search import detect_search_vectors
+        
+        async with get_engine().connect() as conn:
+            tables = await detect_search_vectors(conn)
+        if not {"stocks", "etfs"} <= tables:
+            print("search_vector columns missing; full-text search disabled")
+    except Exception as e:
+        print(f"Search vector check warning: {e}")
+    
+    # Fill index_component_views if it is still empty (migration 004
+    # creates it; start.sh applies migrations before the server starts)
+    try:
+        from app.database import get_session_maker
+        from app.services.component_views import ensure_component_views
+        
+        async with get_session_maker()() as db:
+            await ensure_component_views(db)
+    except Exception as e:
+        print(f"Component views warning: {e}")
+    
+    # First visitors after a deploy should not pay for a cold cache
+    await warm_on_startup()
+    start_scheduler()
+    get_enrichment_queue().start()
+    
     yield
     
     # Shutdown
     print("Shutting down...")
+    shutdown_scheduler()
+    await get_enrichment_queue().stop()
+    await cancel_jobs()
+    await cancel_warmup()
+    close_yahoo_service()
     await close_db()
 
 
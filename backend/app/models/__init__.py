@@ -2,7 +2,7 @@
 Models package initialization.
 Exports all models for easy importing.
 """
-from app.models.index import Index, IndexComponent
+from app.models.index import Index, IndexComponent, IndexComponentView
 from app.models.stock import Stock
 from app.models.etf import ETF, ETFHolding
 from app.models.price import LatestQuote, StockPrice, ETFPrice
@@ -12,6 +12,7 @@ from app.models.sync_log import SyncLog
 __all__ = [
     "Index",
     "IndexComponent", 
+    "IndexComponentView",
     "Stock",
     "ETF",
     "ETFHolding",
@@ -5,7 +5,8 @@ from datetime import datetime, date
 from decimal import Decimal
 from typing import Optional
 
-from sqlalchemy import String, Text, Boolean, BigInteger, ForeignKey, UniqueConstraint, Index as SQLIndex
+from sqlalchemy import Computed, String, Text, Boolean, BigInteger, ForeignKey, UniqueConstraint, Index as SQLIndex
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.database import Base
@@ -18,6 +19,11 @@ class ETF(Base):
     __table_args__ = (
         SQLIndex("idx_etfs_symbol", "symbol"),
         SQLIndex("idx_etfs_category", "category"),
+        # Substring and full-text search (pg_trgm, migration 005)
+        SQLIndex("idx_etfs_symbol_trgm", "symbol", postgresql_using="gin", postgresql_ops={"symbol": "gin_trgm_ops"}),
+        SQLIndex("idx_etfs_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+        SQLIndex("idx_etfs_name_th_trgm", "name_th", postgresql_using="gin", postgresql_ops={"name_th": "gin_trgm_ops"}),
+        SQLIndex("idx_etfs_search_vector", "search_vector", postgresql_using="gin"),
     )
     
     id: Mapped[int] = mapped_column(primary_key=True)
@@ -34,6 +40,17 @@ class ETF(Base):
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Generated from symbol, names and descriptions for full-text search
+    search_vector: Mapped[Optional[str]] = mapped_column(
+        TSVECTOR,
+        Computed(
+            "to_tsvector('simple', coalesce(symbol, '') || ' ' || coalesce(name, '') || ' ' || "
+            "coalesce(name_th, '') || ' ' || coalesce(description, '') || ' ' || "
+            "coalesce(description_th, ''))",
+            persisted=True,
+        ),
+        deferred=True,
+    )
     
     # Relationships
     holdings: Mapped[list["ETFHolding"]] = relationship(
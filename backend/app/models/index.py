@@ -5,7 +5,7 @@ from datetime import datetime, date
 from decimal import Decimal
 from typing import Optional
 
-from sqlalchemy import String, Text, ForeignKey, UniqueConstraint, Index as SQLIndex
+from sqlalchemy import String, Text, Numeric, ForeignKey, UniqueConstraint, Index as SQLIndex
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.database import Base
@@ -67,5 +67,43 @@ class IndexComponent(Base):
         return f"<IndexComponent {self.index_symbol}/{self.stock_symbol}>"
 
 
+class IndexComponentView(Base):
+    """
+    Denormalized index component row: component, stock and quote fields
+    in one place, so component pages are an indexed range read.
+    
+    Derived data, rebuilt by app.services.component_views after catalog
+    changes and updated after each quote sync.
+    """
+    
+    __tablename__ = "index_component_views"
+    __table_args__ = (
+        UniqueConstraint("index_symbol", "stock_symbol", name="uq_index_component_view"),
+        SQLIndex("idx_component_views_weight", "index_symbol", "weight"),
+        SQLIndex("idx_component_views_name", "index_symbol", "name"),
+        SQLIndex("idx_component_views_change", "index_symbol", "change_percent"),
+        SQLIndex("idx_component_views_trend", "index_symbol", "trend"),
+        # Substring search (pg_trgm, migration 005)
+        SQLIndex("idx_component_views_symbol_trgm", "stock_symbol", postgresql_using="gin", postgresql_ops={"stock_symbol": "gin_trgm_ops"}),
+        SQLIndex("idx_component_views_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+        SQLIndex("idx_component_views_name_th_trgm", "name_th", postgresql_using="gin", postgresql_ops={"name_th": "gin_trgm_ops"}),
+    )
+    
+    id: Mapped[int] = mapped_column(primary_key=True)
+    index_symbol: Mapped[str] = mapped_column(String(20), nullable=False)
+    stock_symbol: Mapped[str] = mapped_column(String(10), nullable=False)
+    name: Mapped[str] = mapped_column(String(255), nullable=False)
+    name_th: Mapped[Optional[str]] = mapped_column(String(255))
+    sector: Mapped[Optional[str]] = mapped_column(String(100))
+    weight: Mapped[Optional[Decimal]] = mapped_column(Numeric(10, 6))
+    price: Mapped[Optional[Decimal]] = mapped_column(Numeric(12, 4))
+    change_percent: Mapped[Optional[Decimal]] = mapped_column(Numeric(8, 4))
+    trend: Mapped[Optional[str]] = mapped_column(String(20))
+    refreshed_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+    
+    def __repr__(self) -> str:
+        return f"<IndexComponentView {self.index_symbol}/{self.stock_symbol}>"
+
+
 # Import Stock here to avoid circular imports
 from app.models.stock import Stock
@@ -4,7 +4,8 @@ Stock model.
 from datetime import datetime
 from typing import Optional, TYPE_CHECKING
 
-from sqlalchemy import String, Text, Boolean, Index as SQLIndex
+from sqlalchemy import Computed, String, Text, Boolean, Index as SQLIndex
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.database import Base
@@ -20,6 +21,11 @@ class Stock(Base):
     __table_args__ = (
         SQLIndex("idx_stocks_symbol", "symbol"),
         SQLIndex("idx_stocks_sector", "sector"),
+        # Substring and full-text search (pg_trgm, migration 005)
+        SQLIndex("idx_stocks_symbol_trgm", "symbol", postgresql_using="gin", postgresql_ops={"symbol": "gin_trgm_ops"}),
+        SQLIndex("idx_stocks_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+        SQLIndex("idx_stocks_name_th_trgm", "name_th", postgresql_using="gin", postgresql_ops={"name_th": "gin_trgm_ops"}),
+        SQLIndex("idx_stocks_search_vector", "search_vector", postgresql_using="gin"),
     )
     
     id: Mapped[int] = mapped_column(primary_key=True)
@@ -42,6 +48,17 @@ class Stock(Base):
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Generated from symbol, names and descriptions for full-text search
+    search_vector: Mapped[Optional[str]] = mapped_column(
+        TSVECTOR,
+        Computed(
+            "to_tsvector('simple', coalesce(symbol, '') || ' ' || coalesce(name, '') || ' ' || "
+            "coalesce(name_th, '') || ' ' || coalesce(description, '') || ' ' || "
+            "coalesce(description_th, ''))",
+            persisted=True,
+        ),
+        deferred=True,
+    )
     
     # Relationships
     index_memberships: Mapped[list["IndexComponent"]] = relationship(
@@ -4,7 +4,7 @@ SyncLog model for tracking data synchronization jobs.
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import String, Text, Integer
+from sqlalchemy import String, Text, Integer, Index as SQLIndex
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.database import Base
@@ -14,14 +14,20 @@ class SyncLog(Base):
     """Log entries for data synchronization jobs."""
     
     __tablename__ = "sync_log"
+    __table_args__ = (
+        SQLIndex("idx_sync_log_type_started", "sync_type", "started_at"),
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True)
-    sync_type: Mapped[str] = mapped_column(String(50), nullable=False)  # 'quotes', 'prices', 'components'
-    status: Mapped[str] = mapped_column(String(20), nullable=False)  # 'started', 'completed', 'failed'
+    sync_type: Mapped[str] = mapped_column(String(50), nullable=False)  # 'quotes', 'quote_tiers', 'prices', 'profiles', 'holdings'
+    status: Mapped[str] = mapped_column(String(20), nullable=False)  # 'started', 'completed', 'failed', 'interrupted'
     records_processed: Mapped[int] = mapped_column(Integer, default=0)
     records_updated: Mapped[int] = mapped_column(Integer, default=0)
+    records_failed: Mapped[int] = mapped_column(Integer, default=0)
+    checkpoint: Mapped[Optional[str]] = mapped_column(String(50))  # Last symbol fully processed
     error_message: Mapped[Optional[str]] = mapped_column(Text)
     started_at: Mapped[Optional[datetime]] = mapped_column()
+    updated_at: Mapped[Optional[datetime]] = mapped_column()  # Heartbeat while running
     completed_at: Mapped[Optional[datetime]] = mapped_column()
     
     def __repr__(self) -> str:
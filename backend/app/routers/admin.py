@@ -1,17 +1,30 @@
 """
 Admin endpoints for database management.
 """
-from fastapi import APIRouter, Depends, Header, HTTPException, BackgroundTasks
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
 from app.config import get_settings
+from app.jobs import (
+    JobAlreadyRunning,
+    start_job,
+    get_job,
+    list_jobs,
+    run_price_sync,
+    run_profile_sync,
+    run_history_sync,
+    run_holdings_sync,
+)
+from app.services.cache import get_cache_service, TAG_PRICES, TAG_CATALOG
 from app.services.data_seeder import run_all_seeds
+from app.services.quote_store import load_type_map, save_quotes
 
 router = APIRouter(tags=["admin"])
 
 
-
 @router.post("/seed")
 async def seed_database(
     x_admin_key: str = Header(None, alias="X-Admin-Key"),
@@ -27,6 +40,9 @@ async def seed_database(
     
     await run_all_seeds(db)
     
+    cache = await get_cache_service()
+    await cache.bump(TAG_CATALOG)
+    
     return {
         "success": True,
         "message": "Database seeded successfully",
@@ -34,29 +50,88 @@ async def seed_database(
     }
 
 
+async def _start(sync_type: str, func, resume: bool, **kwargs) -> int:
+    """Start a job, mapping a running duplicate to 409."""
+    try:
+        return await start_job(sync_type, func, resume=resume, **kwargs)
+    except JobAlreadyRunning:
+        raise HTTPException(status_code=409, detail=f"A {sync_type} sync is already running")
+
+
 @router.post("/sync")
 async def sync_prices(
-    background_tasks: BackgroundTasks,
+    resume: bool = Query(False, description="Continue after the last unfinished run's checkpoint"),
     x_admin_key: str = Header(None, alias="X-Admin-Key"),
-    db: AsyncSession = Depends(get_db)
 ):
     """Sync real-time prices from Yahoo Finance.
     
+    Runs as a background job; poll /jobs/{job_id} for progress.
     Requires X-Admin-Key header matching ADMIN_API_KEY env var.
     """
     settings = get_settings()
     if x_admin_key != settings.admin_api_key:
         raise HTTPException(status_code=403, detail="Invalid admin key")
     
-    # Run sync in background
-    background_tasks.add_task(run_price_sync, db)
+    job_id = await _start("quotes", run_price_sync, resume)
     
     return {
         "success": True,
         "message": "Price sync started in background",
+        "job_id": job_id,
     }
 
 
+@router.post("/sync_history")
+async def sync_price_history(
+    period: str = Query("5d", pattern="^(5d|1mo|3mo|6mo|1y|2y|5y|10y|max)$"),
+    resume: bool = Query(False, description="Continue after the last unfinished run's checkpoint"),
+    x_admin_key: str = Header(None, alias="X-Admin-Key"),
+):
+    """Store daily price history from Yahoo Finance.
+    
+    Use a long period (e.g. 5y) once to backfill, then 5d daily to append
+    the latest bars. Requires X-Admin-Key header matching ADMIN_API_KEY env var.
+    """
+    settings = get_settings()
+    if x_admin_key != settings.admin_api_key:
+        raise HTTPException(status_code=403, detail="Invalid admin key")
+    
+    job_id = await _start("prices", run_history_sync, resume, period=period)
+    
+    return {
+        "success": True,
+        "message": f"History sync ({period}) started in background",
+        "job_id": job_id,
+    }
+
+
+@router.post("/recompute_indicators")
+async def recompute_indicators_endpoint(
+    x_admin_key: str = Header(None, alias="X-Admin-Key"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Recompute SMA, 52-week range and trend for all symbols from stored prices.
+    
+    Requires X-Admin-Key header matching ADMIN_API_KEY env var.
+    """
+    settings = get_settings()
+    if x_admin_key != settings.admin_api_key:
+        raise HTTPException(status_code=403, detail="Invalid admin key")
+    
+    from app.services.indicator_engine import recompute_indicators
+    
+    type_map = await load_type_map(db)
+    rows = await recompute_indicators(db, type_map)
+    updated = await save_quotes(db, rows, type_map)
+    await db.commit()
+    
+    cache = await get_cache_service()
+    await cache.delete_pattern("quote:*")
+    await cache.bump(TAG_PRICES)
+    
+    return {"success": True, "updated": updated}
+
+
 @router.post("/seed_analysis")
 async def seed_analysis_data(
     x_admin_key: str = Header(..., alias="X-Admin-Key"),
@@ -112,131 +187,101 @@ async def migrate_schema(
 
 @router.post("/sync_profile")
 async def sync_profile(
-    background_tasks: BackgroundTasks,
+    resume: bool = Query(False, description="Continue after the last unfinished run's checkpoint"),
     x_admin_key: str = Header(None, alias="X-Admin-Key"),
-    db: AsyncSession = Depends(get_db)
 ):
     """Sync detailed profile data from Yahoo Finance."""
     settings = get_settings()
     if x_admin_key != settings.admin_api_key:
         raise HTTPException(status_code=403, detail="Invalid admin key")
     
-    background_tasks.add_task(run_profile_sync, db)
-    return {"message": "Profile sync started"}
+    job_id = await _start("profiles", run_profile_sync, resume)
+    return {"message": "Profile sync started", "job_id": job_id}
 
 
-async def run_profile_sync(db: AsyncSession):
-    """Background task to sync profiles."""
-    try:
-        from sqlalchemy import select
-        from app.models import Stock
-        from app.services.yahoo_finance import get_yahoo_service
-        import asyncio
-        
-        yahoo = get_yahoo_service()
-        stocks = (await db.execute(select(Stock))).scalars().all()
-        
-        print(f"Starting profile sync for {len(stocks)} stocks...")
-        
-        for i, stock in enumerate(stocks):
-            try:
-                info = await yahoo.get_stock_info(stock.symbol)
-                if info:
-                    stock.ceo = info.get('ceo')
-                    stock.employees = info.get('employees')
-                    stock.headquarters = info.get('headquarters')
-                    stock.description = info.get('description') # Update description too
-                    # stock.website already exists
-                    stock.website = info.get('website')
-                    
-                if i % 10 == 0:
-                    await db.commit()
-                    print(f"Synced {i}/{len(stocks)}")
-                
-                # Rate limit manual
-                await asyncio.sleep(0.5)
-                
-            except Exception as e:
-                print(f"Error syncing {stock.symbol}: {e}")
-                continue
-                
-        await db.commit()
-        print("Profile sync completed")
-        
-    except Exception as e:
-        print(f"Profile sync failed: {e}")
+@router.post("/sync_holdings")
+async def sync_holdings(
+    resume: bool = Query(False, description="Continue after the last unfinished run's checkpoint"),
+    x_admin_key: str = Header(None, alias="X-Admin-Key"),
+):
+    """Sync ETF details and holdings from Yahoo Finance."""
+    settings = get_settings()
+    if x_admin_key != settings.admin_api_key:
+        raise HTTPException(status_code=403, detail="Invalid admin key")
+    
+    job_id = await _start("holdings", run_holdings_sync, resume)
+    return {"message": "Holdings sync started", "job_id": job_id}
 
 
-async def run_price_sync(db: AsyncSession):
-    """Background task to sync prices."""
-    try:
-        from sqlalchemy import select
-        from app.models import Stock, ETF, LatestQuote
-        from app.services.yahoo_finance import get_yahoo_service
-        
-        yahoo = get_yahoo_service()
-        
-        # 1. Get all symbols
-        stocks = (await db.execute(select(Stock))).scalars().all()
-        etfs = (await db.execute(select(ETF))).scalars().all()
-        
-        all_symbols = [s.symbol for s in stocks] + [e.symbol for e in etfs]
-        type_map = {s.symbol: "stock" for s in stocks}
-        type_map.update({e.symbol: "etf" for e in etfs})
-        
-        # 2. Batch process
-        batch_size = 50
-        for i in range(0, len(all_symbols), batch_size):
-            batch = all_symbols[i:i+batch_size]
-            print(f"Syncing batch {i} to {i+batch_size}...")
-            
-            try:
-                quotes = await yahoo.batch_get_quotes(batch)
-                
-                for sym, data in quotes.items():
-                    if not data:
-                        continue
-                        
-                    # Upsert LatestQuote
-                    stmt = select(LatestQuote).where(LatestQuote.symbol == sym)
-                    result = await db.execute(stmt)
-                    quote_obj = result.scalar_one_or_none()
-                    
-                    if not quote_obj:
-                        quote_obj = LatestQuote(
-                            symbol=sym, 
-                            symbol_type=type_map.get(sym, "stock")
-                        )
-                        db.add(quote_obj)
-                    
-                    # Update fields
-                    quote_obj.price = data.get("price")
-                    quote_obj.change_amount = data.get("change_amount") # Fix: yahoo returns keys like 'change_amount' or 'change'?
-                    # Check yahoo_finance.py get_quote: 'change_amount': round(change, 4)
-                    # batch_get_quotes returns result of get_quote.
-                    # Keys: price, change_amount, change_percent...
-                    # Previous code used data.get("change") which might be wrong if key is 'change_amount'.
-                    # I will fix keys here too.
-                    quote_obj.change_amount = data.get("change_amount")
-                    quote_obj.change_percent = data.get("change_percent")
-                    quote_obj.open_price = data.get("open_price")
-                    quote_obj.high_price = data.get("high_price")
-                    quote_obj.low_price = data.get("low_price")
-                    quote_obj.volume = data.get("volume")
-                    quote_obj.market_cap = data.get("market_cap")
-                    quote_obj.pe_ratio = data.get("pe_ratio")
-                    quote_obj.week_52_high = data.get("week_52_high")
-                    quote_obj.week_52_low = data.get("week_52_low")
-                    quote_obj.trend = data.get("trend") 
-                    
-                await db.commit()
-                
-            except Exception as e:
-                print(f"Error syncing batch {i}: {e}")
-                continue
-                
-        print("Price sync completed")
-        
-    except Exception as e:
-        print(f"Sync failed: {e}")
+@router.get("/refresh_plan")
+async def get_refresh_plan(
+    x_admin_key: str = Header(None, alias="X-Admin-Key"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Show quote refresh tiers and the highest-priority symbols."""
+    settings = get_settings()
+    if x_admin_key != settings.admin_api_key:
+        raise HTTPException(status_code=403, detail="Invalid admin key")
+    
+    from app.services.refresh_planner import build_plan, tier_intervals
+    
+    plan = await build_plan(db)
+    intervals = tier_intervals()
+    return {
+        "tiers": {
+            tier: {
+                "size": len(symbols),
+                "interval_seconds": intervals[tier],
+                "top": [
+                    {"symbol": s, "score": round(plan.scores[s], 2)}
+                    for s in symbols[:10]
+                ],
+            }
+            for tier, symbols in plan.tiers.items()
+        }
+    }
+
+
+@router.get("/cache_stats")
+async def get_cache_stats(
+    x_admin_key: str = Header(None, alias="X-Admin-Key"),
+):
+    """Cache hit and miss counts per tier for this worker."""
+    settings = get_settings()
+    if x_admin_key != settings.admin_api_key:
+        raise HTTPException(status_code=403, detail="Invalid admin key")
+    
+    cache = await get_cache_service()
+    return cache.stats()
 
+
+@router.get("/jobs")
+async def get_jobs(
+    sync_type: Optional[str] = Query(None, description="quotes, quote_tiers, prices, profiles or holdings"),
+    limit: int = Query(20, ge=1, le=100),
+    x_admin_key: str = Header(None, alias="X-Admin-Key"),
+    db: AsyncSession = Depends(get_db)
+):
+    """List recent sync jobs with progress and throughput."""
+    settings = get_settings()
+    if x_admin_key != settings.admin_api_key:
+        raise HTTPException(status_code=403, detail="Invalid admin key")
+    
+    return {"jobs": await list_jobs(db, sync_type, limit)}
+
+
+@router.get("/jobs/{job_id}")
+async def get_job_status(
+    job_id: int,
+    x_admin_key: str = Header(None, alias="X-Admin-Key"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get progress of one sync job."""
+    settings = get_settings()
+    if x_admin_key != settings.admin_api_key:
+        raise HTTPException(status_code=403, detail="Invalid admin key")
+    
+    job = await get_job(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
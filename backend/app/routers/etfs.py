@@ -2,16 +2,21 @@
 ETFs API endpoints.
 """
 from typing import Optional
-from math import ceil
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select
 
-from app.database import get_db
+from app.database import get_db, get_session_maker
 from app.models import ETF, ETFHolding, LatestQuote, Analysis
 from app.services.yahoo_finance import get_yahoo_service
-from app.services.cache import get_cache_service, quote_key, etf_key, etf_holdings_key
+from app.services.demand_tracker import get_demand_tracker
+from app.services.symbol_registry import check_symbol, remember_missing
+from app.services.quote_cache import overlay_quotes
+from app.services.quote_store import quote_to_dict
+from app.services.cache import get_cache_service, count_key, quote_key, etf_key, etf_holdings_key, TAG_CATALOG
+from app.services.views import analysis_to_dict, get_top50
+from app.utils.pagination import cached_total, decode_cursor, encode_cursor, page_meta
 
 router = APIRouter(prefix="/etfs", tags=["ETFs"])
 
@@ -21,29 +26,39 @@ async def list_etfs(
     page: int = Query(1, ge=1),
     per_page: int = Query(20, ge=1, le=100),
     category: Optional[str] = None,
+    cursor: Optional[str] = Query(None, description="meta.next_cursor of the previous page"),
     db: AsyncSession = Depends(get_db),
 ):
-    """Get paginated list of ETFs."""
-    base_query = select(ETF, LatestQuote).outerjoin(
-        LatestQuote, ETF.symbol == LatestQuote.symbol
-    ).where(ETF.is_active == True)
+    """
+    Get paginated list of ETFs.
+    
+    Pass ``cursor`` instead of ``page`` to page by symbol (keyset), at
+    the same cost however deep the page.
+    """
+    base_query = select(ETF).where(ETF.is_active == True)
     
     if category:
         base_query = base_query.where(ETF.category == category)
     
     # Count
-    count_query = select(func.count()).select_from(base_query.subquery())
-    total = (await db.execute(count_query)).scalar() or 0
+    cache = await get_cache_service()
+    total = await cached_total(
+        await cache.versioned_key(count_key("etfs", category), TAG_CATALOG),
+        base_query,
+    )
     
     # Paginate
-    offset = (page - 1) * per_page
-    base_query = base_query.order_by(ETF.symbol).offset(offset).limit(per_page)
+    base_query = base_query.order_by(ETF.symbol).limit(per_page)
+    if cursor is not None:
+        (last_symbol,) = decode_cursor(cursor, str)
+        base_query = base_query.where(ETF.symbol > last_symbol)
+    else:
+        base_query = base_query.offset((page - 1) * per_page)
     
     result = await db.execute(base_query)
-    rows = result.all()
     
     etfs = []
-    for etf, quote in rows:
+    for etf in result.scalars():
         etfs.append({
             "symbol": etf.symbol,
             "name": etf.name,
@@ -52,20 +67,20 @@ async def list_etfs(
             "provider": etf.provider,
             "expense_ratio": float(etf.expense_ratio) if etf.expense_ratio else None,
             "aum": etf.aum,
-            "price": float(quote.price) if quote and quote.price else None,
-            "change_percent": float(quote.change_percent) if quote and quote.change_percent else None,
-            "trend": quote.trend if quote else None,
         })
     
+    # Price fields come from the quote cache; only misses hit the DB
+    etfs = await overlay_quotes(etfs, db)
+    
+    next_cursor = encode_cursor(etfs[-1]["symbol"]) if len(etfs) == per_page else None
     return {
         "success": True,
         "data": etfs,
-        "meta": {
-            "total": total,
-            "page": page,
-            "per_page": per_page,
-            "total_pages": ceil(total / per_page) if total > 0 else 0,
-        }
+        "meta": page_meta(
+            total, per_page,
+            page=None if cursor is not None else page,
+            next_cursor=next_cursor,
+        ),
     }
 
 
@@ -74,31 +89,7 @@ async def get_top50_etfs(
     db: AsyncSession = Depends(get_db),
 ):
     """Get top 50 ETFs list."""
-    result = await db.execute(
-        select(ETF, LatestQuote)
-        .outerjoin(LatestQuote, ETF.symbol == LatestQuote.symbol)
-        .where(ETF.is_active == True)
-        .order_by(ETF.id)
-        .limit(50)
-    )
-    rows = result.all()
-    
-    etfs = []
-    for etf, quote in rows:
-        etfs.append({
-            "symbol": etf.symbol,
-            "name": etf.name,
-            "name_th": etf.name_th,
-            "category": etf.category,
-            "provider": etf.provider,
-            "expense_ratio": float(etf.expense_ratio) if etf.expense_ratio else None,
-            "aum": etf.aum,
-            "price": float(quote.price) if quote and quote.price else None,
-            "change_percent": float(quote.change_percent) if quote and quote.change_percent else None,
-            "trend": quote.trend if quote else None,
-        })
-    
-    return {"success": True, "data": etfs}
+    return {"success": True, "data": await get_top50(db)}
 
 
 @router.get("/{symbol}")
@@ -108,6 +99,7 @@ async def get_etf(
 ):
     """Get complete ETF details."""
     symbol = symbol.upper()
+    await get_demand_tracker().record(symbol)
     
     # Check cache
     cache = await get_cache_service()
@@ -143,49 +135,38 @@ async def get_etf(
 @router.get("/{symbol}/quote")
 async def get_etf_quote(
     symbol: str,
-    db: AsyncSession = Depends(get_db),
 ):
     """Get latest price quote for an ETF."""
     symbol = symbol.upper()
-    
-    # Check cache
+    known = await check_symbol(symbol, "Quote")
+    await get_demand_tracker().record(symbol)
+    
+    async def load_quote():
+        session_maker = get_session_maker()
+        async with session_maker() as db:
+            # Get from database
+            result = await db.execute(
+                select(LatestQuote).where(LatestQuote.symbol == symbol)
+            )
+            quote = result.scalar_one_or_none()
+            
+            if quote:
+                return quote_to_dict(quote)
+            
+            # Fetch from Yahoo Finance
+            yf_service = get_yahoo_service()
+            quote_data = await yf_service.get_quote(symbol)
+            if not quote_data and not known:
+                await remember_missing(symbol)
+            return quote_data
+    
+    # Concurrent misses share one DB/Yahoo lookup
     cache = await get_cache_service()
-    cached = await cache.get(quote_key(symbol))
-    if cached:
-        return {"success": True, "data": cached}
-    
-    # Get from database
-    result = await db.execute(
-        select(LatestQuote).where(LatestQuote.symbol == symbol)
-    )
-    quote = result.scalar_one_or_none()
-    
-    if quote:
-        data = {
-            "symbol": quote.symbol,
-            "price": float(quote.price) if quote.price else None,
-            "change_amount": float(quote.change_amount) if quote.change_amount else None,
-            "change_percent": float(quote.change_percent) if quote.change_percent else None,
-            "volume": quote.volume,
-            "week_52_high": float(quote.week_52_high) if quote.week_52_high else None,
-            "week_52_low": float(quote.week_52_low) if quote.week_52_low else None,
-            "dividend_yield": float(quote.dividend_yield) if quote.dividend_yield else None,
-            "sma_50": float(quote.sma_50) if quote.sma_50 else None,
-            "sma_200": float(quote.sma_200) if quote.sma_200 else None,
-            "trend": quote.trend,
-            "updated_at": quote.updated_at.isoformat() if quote.updated_at else None,
-        }
-        await cache.set(quote_key(symbol), data, 'quote')
-        return {"success": True, "data": data}
-    
-    # Fetch from Yahoo Finance
-    yf_service = get_yahoo_service()
-    quote_data = await yf_service.get_quote(symbol)
+    quote_data = await cache.get_or_load(quote_key(symbol), load_quote, 'quote')
     
     if not quote_data:
         raise HTTPException(status_code=404, detail=f"Quote for '{symbol}' not found")
     
-    await cache.set(quote_key(symbol), quote_data, 'quote')
     return {"success": True, "data": quote_data}
 
 
@@ -247,16 +228,4 @@ async def get_etf_analysis(
     if not analysis:
         return {"success": True, "data": None}
     
-    return {
-        "success": True,
-        "data": {
-            "id": analysis.id,
-            "title": analysis.title,
-            "title_th": analysis.title_th,
-            "summary_th": analysis.summary_th,
-            "content_th": analysis.content_th,
-            "trend_opinion": analysis.trend_opinion,
-            "author": analysis.author,
-            "published_at": analysis.published_at.isoformat() if analysis.published_at else None,
-        }
-    }
+    return {"success": True, "data": analysis_to_dict(analysis)}
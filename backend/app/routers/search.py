@@ -3,11 +3,13 @@ Search API endpoint.
 """
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, or_
+from sqlalchemy import select
 
 from app.database import get_db
-from app.models import Stock, ETF, LatestQuote
-from app.services.cache import get_cache_service, search_key
+from app.models import Stock, ETF
+from app.services.quote_cache import overlay_quotes
+from app.services.search_index import get_symbol_search
+from app.utils.text_search import filter_first, search_vector, text_filter
 
 router = APIRouter(prefix="/search", tags=["Search"])
 
@@ -20,79 +22,69 @@ async def search(
 ):
     """Search for stocks and ETFs."""
     query = q.strip()
-    search_term = f"%{query.upper()}%"
     
-    # Check cache
-    cache = await get_cache_service()
-    cache_k = search_key(f"{query}:{type}")
-    cached = await cache.get(cache_k)
-    if cached:
-        return {"success": True, "data": cached}
+    # Matches come from the in-process index; prices are filled from the
+    # quote cache on every request
+    found = await get_symbol_search().search(query, type)
+    if found is None:
+        found = await _find(db, query, type)
     
+    rows = await overlay_quotes(found["stocks"] + found["etfs"], db)
+    n_stocks = len(found["stocks"])
+    data = {"stocks": rows[:n_stocks], "etfs": rows[n_stocks:]}
+    
+    return {"success": True, "data": data}
+
+
+async def _find(db: AsyncSession, query: str, type: str) -> dict:
+    """Matching stocks and ETFs from the database, used until the index is built."""
     stocks = []
     etfs = []
+    if not query:
+        return {"stocks": stocks, "etfs": etfs}
     
     # Search stocks
     if type in ("all", "stock"):
         stock_query = (
-            select(Stock, LatestQuote)
-            .outerjoin(LatestQuote, Stock.symbol == LatestQuote.symbol)
+            select(Stock)
             .where(Stock.is_active == True)
-            .where(
-                or_(
-                    Stock.symbol.ilike(search_term),
-                    Stock.name.ilike(search_term)
-                )
-            )
+            .where(filter_first(Stock, text_filter(
+                query, Stock.symbol, Stock.name, Stock.name_th, vector=search_vector(Stock)
+            )))
             .order_by(Stock.symbol)
             .limit(20)
         )
         result = await db.execute(stock_query)
-        rows = result.all()
         
-        for stock, quote in rows:
+        for stock in result.scalars():
             stocks.append({
                 "symbol": stock.symbol,
                 "name": stock.name,
                 "name_th": stock.name_th,
                 "sector": stock.sector,
                 "type": "stock",
-                "price": float(quote.price) if quote and quote.price else None,
-                "change_percent": float(quote.change_percent) if quote and quote.change_percent else None,
-                "trend": quote.trend if quote else None,
             })
     
     # Search ETFs
     if type in ("all", "etf"):
         etf_query = (
-            select(ETF, LatestQuote)
-            .outerjoin(LatestQuote, ETF.symbol == LatestQuote.symbol)
+            select(ETF)
             .where(ETF.is_active == True)
-            .where(
-                or_(
-                    ETF.symbol.ilike(search_term),
-                    ETF.name.ilike(search_term)
-                )
-            )
+            .where(filter_first(ETF, text_filter(
+                query, ETF.symbol, ETF.name, ETF.name_th, vector=search_vector(ETF)
+            )))
             .order_by(ETF.symbol)
             .limit(20)
         )
         result = await db.execute(etf_query)
-        rows = result.all()
         
-        for etf, quote in rows:
+        for etf in result.scalars():
             etfs.append({
                 "symbol": etf.symbol,
                 "name": etf.name,
                 "name_th": etf.name_th,
                 "category": etf.category,
                 "type": "etf",
-                "price": float(quote.price) if quote and quote.price else None,
-                "change_percent": float(quote.change_percent) if quote and quote.change_percent else None,
-                "trend": quote.trend if quote else None,
             })
     
-    data = {"stocks": stocks, "etfs": etfs}
-    await cache.set(cache_k, data, 'search')
-    
-    return {"success": True, "data": data}
+    return {"stocks": stocks, "etfs": etfs}
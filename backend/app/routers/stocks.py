@@ -2,16 +2,30 @@
 Stocks API endpoints.
 """
 from typing import Optional
-from math import ceil
 
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select
 
-from app.database import get_db
+from app.database import get_db, get_session_maker
 from app.models import Stock, LatestQuote, Analysis
 from app.services.yahoo_finance import get_yahoo_service
-from app.services.cache import get_cache_service, quote_key, stock_key
+from app.services.demand_tracker import get_demand_tracker
+from app.services.symbol_registry import check_symbol, remember_missing
+from app.services.enrichment import get_enrichment_queue, needs_enrichment
+from app.services.quote_cache import overlay_quotes
+from app.services.quote_store import quote_to_dict
+from app.services.views import (
+    analysis_to_dict,
+    create_stock,
+    get_stock_page_body,
+    load_history,
+    stock_to_dict,
+)
+from app.services.cache import get_cache_service, count_key, quote_key, stock_key, TAG_CATALOG
+from app.utils.pagination import cached_total, decode_cursor, encode_cursor, page_meta
+from app.utils.text_search import filter_first, search_vector, text_filter
 
 router = APIRouter(prefix="/stocks", tags=["Stocks"])
 
@@ -22,189 +36,171 @@ async def list_stocks(
     per_page: int = Query(20, ge=1, le=100),
     sector: Optional[str] = None,
     search: Optional[str] = None,
+    cursor: Optional[str] = Query(None, description="meta.next_cursor of the previous page"),
     db: AsyncSession = Depends(get_db),
 ):
-    """Get paginated list of stocks."""
-    base_query = select(Stock, LatestQuote).outerjoin(
-        LatestQuote, Stock.symbol == LatestQuote.symbol
-    ).where(Stock.is_active == True)
+    """
+    Get paginated list of stocks.
+    
+    Pass ``cursor`` instead of ``page`` to page by symbol (keyset), at
+    the same cost however deep the page.
+    """
+    base_query = select(Stock).where(Stock.is_active == True)
     
     if sector:
         base_query = base_query.where(Stock.sector == sector)
     
-    if search:
-        search_term = f"%{search.upper()}%"
-        base_query = base_query.where(
-            (Stock.symbol.ilike(search_term)) | 
-            (Stock.name.ilike(search_term))
-        )
+    search_filter = text_filter(
+        search or "", Stock.symbol, Stock.name, Stock.name_th, vector=search_vector(Stock)
+    )
+    if search_filter is not None:
+        base_query = base_query.where(filter_first(Stock, search_filter))
     
     # Count
-    count_query = select(func.count()).select_from(base_query.subquery())
-    total = (await db.execute(count_query)).scalar() or 0
+    cache = await get_cache_service()
+    total = await cached_total(
+        await cache.versioned_key(count_key("stocks", sector, search), TAG_CATALOG),
+        base_query,
+    )
     
     # Paginate
-    offset = (page - 1) * per_page
-    base_query = base_query.order_by(Stock.symbol).offset(offset).limit(per_page)
+    base_query = base_query.order_by(Stock.symbol).limit(per_page)
+    if cursor is not None:
+        (last_symbol,) = decode_cursor(cursor, str)
+        base_query = base_query.where(Stock.symbol > last_symbol)
+    else:
+        base_query = base_query.offset((page - 1) * per_page)
     
     result = await db.execute(base_query)
-    rows = result.all()
     
     stocks = []
-    for stock, quote in rows:
+    for stock in result.scalars():
         stocks.append({
             "symbol": stock.symbol,
             "name": stock.name,
             "name_th": stock.name_th,
             "sector": stock.sector,
-            "price": float(quote.price) if quote and quote.price else None,
-            "change_percent": float(quote.change_percent) if quote and quote.change_percent else None,
-            "trend": quote.trend if quote else None,
         })
     
+    # Price fields come from the quote cache; only misses hit the DB
+    stocks = await overlay_quotes(stocks, db)
+    
+    next_cursor = encode_cursor(stocks[-1]["symbol"]) if len(stocks) == per_page else None
     return {
         "success": True,
         "data": stocks,
-        "meta": {
-            "total": total,
-            "page": page,
-            "per_page": per_page,
-            "total_pages": ceil(total / per_page) if total > 0 else 0,
-        }
+        "meta": page_meta(
+            total, per_page,
+            page=None if cursor is not None else page,
+            next_cursor=next_cursor,
+        ),
     }
 
 
 @router.get("/{symbol}")
 async def get_stock(
     symbol: str,
-    db: AsyncSession = Depends(get_db),
 ):
     """Get complete stock details."""
     symbol = symbol.upper()
-    
-    # Check cache
-    cache = await get_cache_service()
-    cached = await cache.get(stock_key(symbol))
-    if cached:
-        return {"success": True, "data": cached}
-    
-    # Get from database
-    result = await db.execute(
-        select(Stock).where(Stock.symbol == symbol)
-    )
-    stock = result.scalar_one_or_none()
-    
-    if not stock:
-        # Try fetching from Yahoo Finance
-        yf_service = get_yahoo_service()
-        stock_info = await yf_service.get_stock_info(symbol)
-        
-        if not stock_info:
-            raise HTTPException(status_code=404, detail=f"Stock '{symbol}' not found")
-        
-        # Create in database
-        stock = Stock(**stock_info)
-        db.add(stock)
-        await db.commit()
-        await db.refresh(stock)
-        
-    # Lazy load profile data if missing
-    if not stock.ceo or not stock.employees:
-        try:
-            yf_service = get_yahoo_service()
-            info = await yf_service.get_stock_info(symbol)
-            if info:
-                stock.ceo = info.get('ceo')
-                stock.employees = info.get('employees')
-                stock.headquarters = info.get('headquarters')
-                stock.founded_year = info.get('founded_year') # Note: yahoo service returns this? I commented it out in yahoo_finance.py
-                # Re-check yahoo_finance.py return dict in step 976. I commented out founded.
-                # So founded won't update.
-                if not stock.website:
-                    stock.website = info.get('website')
+    known = await check_symbol(symbol, "Stock")
+    await get_demand_tracker().record(symbol)
+    
+    async def load_stock():
+        session_maker = get_session_maker()
+        async with session_maker() as db:
+            # Get from database
+            result = await db.execute(
+                select(Stock).where(Stock.symbol == symbol)
+            )
+            stock = result.scalar_one_or_none()
+            
+            if not stock:
+                # Known symbols missing here are ETFs
+                if known:
+                    raise HTTPException(status_code=404, detail=f"Stock '{symbol}' not found")
                 
-                db.add(stock)
-                await db.commit()
-                await db.refresh(stock)
-        except Exception as e:
-            # Don't fail request if update fails
-            pass
+                # Try fetching from Yahoo Finance
+                stock = await create_stock(db, symbol)
+                if not stock:
+                    raise HTTPException(status_code=404, detail=f"Stock '{symbol}' not found")
+            
+            # Profile fields are fetched in the background; this request
+            # answers with what is stored
+            if needs_enrichment(stock):
+                get_enrichment_queue().enqueue(symbol)
+            
+            return stock_to_dict(stock)
+    
+    # Concurrent misses share one DB/Yahoo lookup
+    cache = await get_cache_service()
+    data = await cache.get_or_load(stock_key(symbol), load_stock, 'stock')
     
-    data = {
-        "symbol": stock.symbol,
-        "name": stock.name,
-        "name_th": stock.name_th,
-        "sector": stock.sector,
-        "industry": stock.industry,
-        "description": stock.description,
-        "description_th": stock.description_th,
-        "logo_url": stock.logo_url or f"https://logo.clearbit.com/{stock.website.replace('https://', '').replace('http://', '').split('/')[0]}" if stock.website else None,
-        "website": stock.website,
-        "ceo": stock.ceo,
-        "employees": stock.employees,
-        "headquarters": stock.headquarters,
-        "founded_year": stock.founded_year,
-        "exchange": stock.exchange,
-        "country": stock.country,
-    }
+    return {"success": True, "data": data}
+
+
+@router.get("/{symbol}/page")
+async def get_stock_page(
+    symbol: str,
+    period: str = Query("1y", pattern="^(none|1d|5d|1mo|3mo|6mo|1y|2y|5y|max)$"),
+):
+    """
+    Get everything the stock detail page shows in one response.
+    
+    Combines the profile, quote, latest published analysis and a history
+    window, replacing four separate requests. ``period=none`` leaves the
+    history out for pages that draw their own chart. The response body is
+    cached already encoded, for a minute. Like GET /stocks/{symbol}, a
+    symbol not yet stored is added from Yahoo Finance.
+    """
+    symbol = symbol.upper()
+    known = await check_symbol(symbol, "Stock")
+    await get_demand_tracker().record(symbol)
     
-    # Cache the response
-    await cache.set(stock_key(symbol), data, 'stock')
+    # Known symbols missing from stocks are ETFs
+    body = await get_stock_page_body(symbol, period, create=not known)
+    if body is None:
+        raise HTTPException(status_code=404, detail=f"Stock '{symbol}' not found")
     
-    return {"success": True, "data": data}
+    return Response(content=body, media_type="application/json")
 
 
 @router.get("/{symbol}/quote")
 async def get_stock_quote(
     symbol: str,
-    db: AsyncSession = Depends(get_db),
 ):
     """Get latest price quote for a stock."""
     symbol = symbol.upper()
+    known = await check_symbol(symbol, "Quote")
+    await get_demand_tracker().record(symbol)
+    
+    async def load_quote():
+        session_maker = get_session_maker()
+        async with session_maker() as db:
+            # Get from database first
+            result = await db.execute(
+                select(LatestQuote).where(LatestQuote.symbol == symbol)
+            )
+            quote = result.scalar_one_or_none()
+            
+            # Stocks added on request have fundamentals before any price
+            if quote and quote.price is not None:
+                return quote_to_dict(quote)
+            
+            # Fetch from Yahoo Finance
+            yf_service = get_yahoo_service()
+            quote_data = await yf_service.get_quote(symbol)
+            if not quote_data and not known:
+                await remember_missing(symbol)
+            return quote_data
     
-    # Check cache
+    # Concurrent misses share one DB/Yahoo lookup
     cache = await get_cache_service()
-    cached = await cache.get(quote_key(symbol))
-    if cached:
-        return {"success": True, "data": cached}
-    
-    # Get from database first
-    result = await db.execute(
-        select(LatestQuote).where(LatestQuote.symbol == symbol)
-    )
-    quote = result.scalar_one_or_none()
-    
-    if quote:
-        data = {
-            "symbol": quote.symbol,
-            "price": float(quote.price) if quote.price else None,
-            "change_amount": float(quote.change_amount) if quote.change_amount else None,
-            "change_percent": float(quote.change_percent) if quote.change_percent else None,
-            "open_price": float(quote.open_price) if quote.open_price else None,
-            "high_price": float(quote.high_price) if quote.high_price else None,
-            "low_price": float(quote.low_price) if quote.low_price else None,
-            "volume": quote.volume,
-            "market_cap": quote.market_cap,
-            "pe_ratio": float(quote.pe_ratio) if quote.pe_ratio else None,
-            "eps": float(quote.eps) if quote.eps else None,
-            "week_52_high": float(quote.week_52_high) if quote.week_52_high else None,
-            "week_52_low": float(quote.week_52_low) if quote.week_52_low else None,
-            "sma_50": float(quote.sma_50) if quote.sma_50 else None,
-            "sma_200": float(quote.sma_200) if quote.sma_200 else None,
-            "trend": quote.trend,
-            "updated_at": quote.updated_at.isoformat() if quote.updated_at else None,
-        }
-        await cache.set(quote_key(symbol), data, 'quote')
-        return {"success": True, "data": data}
-    
-    # Fetch from Yahoo Finance
-    yf_service = get_yahoo_service()
-    quote_data = await yf_service.get_quote(symbol)
+    quote_data = await cache.get_or_load(quote_key(symbol), load_quote, 'quote')
     
     if not quote_data:
         raise HTTPException(status_code=404, detail=f"Quote for '{symbol}' not found")
     
-    await cache.set(quote_key(symbol), quote_data, 'quote')
     return {"success": True, "data": quote_data}
 
 
@@ -212,13 +208,20 @@ async def get_stock_quote(
 async def get_stock_history(
     symbol: str,
     period: str = Query("1y", pattern="^(1d|5d|1mo|3mo|6mo|1y|2y|5y|max)$"),
+    format: str = Query("rows", pattern="^(rows|columns)$"),
     db: AsyncSession = Depends(get_db),
 ):
-    """Get historical OHLCV data for a stock."""
+    """Get historical OHLCV data for a stock.
+    
+    format=columns returns one list per field instead of one object per day.
+    """
     symbol = symbol.upper()
+    known = await check_symbol(symbol, "Stock")
     
-    yf_service = get_yahoo_service()
-    history = await yf_service.get_history(symbol, period)
+    history = await load_history(db, symbol, "stock", period, format)
+    empty = not (history["date"] if format == "columns" else history)
+    if empty and not known:
+        await remember_missing(symbol)
     
     return {"success": True, "data": history}
 
@@ -244,17 +247,4 @@ async def get_stock_analysis(
     if not analysis:
         return {"success": True, "data": None}
     
-    return {
-        "success": True,
-        "data": {
-            "id": analysis.id,
-            "title": analysis.title,
-            "title_th": analysis.title_th,
-            "summary_th": analysis.summary_th,
-            "content_th": analysis.content_th,
-            "trend_opinion": analysis.trend_opinion,
-            "target_price": float(analysis.target_price) if analysis.target_price else None,
-            "author": analysis.author,
-            "published_at": analysis.published_at.isoformat() if analysis.published_at else None,
-        }
-    }
+    return {"success": True, "data": analysis_to_dict(analysis)}
@@ -1,40 +1,160 @@
 """
 Redis caching service.
 """
-import json
+import asyncio
+import time
+import uuid
+from collections import Counter, OrderedDict
 from datetime import timedelta
-from typing import Any, Optional
+from fnmatch import fnmatchcase
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
 import logging
 
+from app.services.serializer import get_serializer
+
 logger = logging.getLogger(__name__)
 
-# Cache TTL settings (in seconds)
+# Cache TTL settings (in seconds). A value is fresh for this long; see
+# CACHE_STALE_TTL for how long it may be served stale afterwards.
 CACHE_TTL = {
     'quote': 300,           # 5 minutes
     'stock': 3600,          # 1 hour
     'etf': 3600,            # 1 hour
     'index_components': 86400,  # 24 hours
+    'components_by_quote': 60,  # 1 minute: change/trend-sorted pages
     'etf_holdings': 86400,  # 24 hours
     'search': 900,          # 15 minutes
+    'top50': 300,           # 5 minutes (carries prices)
+    'count': 300,           # 5 minutes
+    'history': 3600,        # 1 hour (versioned by TAG_HISTORY)
+    'stock_page': 60,       # 1 minute: encoded detail page (profile and analysis unversioned)
+    'enrich': 604800,       # 7 days: Yahoo had no profile data
+    'enrich_retry': 3600,   # 1 hour: the profile lookup failed
+    'missing': 300,         # 5 minutes: unknown symbol, upstream had nothing
+}
+
+# Extra seconds a value may be served by get_or_load after it goes stale,
+# while it is refreshed in the background. The Redis TTL is the sum.
+CACHE_STALE_TTL = {
+    'quote': 1800,          # 30 minutes
+    'stock': 86400,         # 24 hours
+    'etf': 86400,           # 24 hours
+    'index_components': 86400,  # 24 hours
+    'components_by_quote': 300,  # 5 minutes
+    'etf_holdings': 86400,  # 24 hours
+    'search': 0,
+    'top50': 1800,          # 30 minutes
+    'count': 3600,          # 1 hour
+    'history': 86400,       # 24 hours
 }
 
+# Returned by LocalCache.get when a key is absent or expired
+MISS = object()
+
+# Distributed load lock: how long it is held at most, how long other
+# workers wait for the holder's result, and how often they check
+LOCK_TTL_MS = 10000
+LOCK_WAIT = 3.0
+LOCK_POLL = 0.05
+
+# Keys fetched per SCAN step and deleted per UNLINK call
+SCAN_COUNT = 500
+
+# Invalidation tags. Keys built with ``versioned_key`` embed the current
+# generation of their tags, so bumping a tag orphans every such key at
+# once; orphans simply expire.
+TAG_PRICES = 'prices'    # Anything showing prices, change or trend
+TAG_CATALOG = 'catalog'  # Symbol lists, names and index membership
+TAG_HISTORY = 'history'  # Stored daily bars
+
+# Deletes the lock only if it still holds our token
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class LocalCache:
+    """
+    Bounded in-process LRU cache with per-entry expiry.
+    
+    Values are shared with callers, not copied, so they must be treated
+    as read-only.
+    """
+    
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        # key -> (expires_at, value), least recently used first
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+    
+    def __len__(self) -> int:
+        return len(self._data)
+    
+    def get(self, key: str) -> Any:
+        """Get a live value, or MISS."""
+        entry = self._data.get(key)
+        if entry is None:
+            return MISS
+        if entry[0] <= time.monotonic():
+            del self._data[key]
+            return MISS
+        self._data.move_to_end(key)
+        return entry[1]
+    
+    def set(self, key: str, value: Any, ttl: float):
+        """Store a value for ``ttl`` seconds, evicting the LRU entry if full."""
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+    
+    def delete(self, key: str):
+        self._data.pop(key, None)
+    
+    def delete_pattern(self, pattern: str):
+        """Delete keys matching a glob pattern."""
+        for key in [k for k in self._data if fnmatchcase(k, pattern)]:
+            del self._data[key]
+
 
 class CacheService:
     """
-    Redis caching service.
-    Falls back to in-memory cache if Redis is not available.
+    Two-tier cache: a bounded in-process LRU in front of Redis.
+    
+    Hot keys are served from process memory without a network hop. Local
+    entries live at most ``cache_local_max_ttl`` seconds so that writes
+    from other workers show up quickly. If Redis is not available the
+    local tier is the only tier and entries keep their full TTL.
+    
+    Every entry records when it goes stale. ``get`` only returns fresh
+    values; ``get_or_load`` also returns stale ones and refreshes them in
+    the background (stale-while-revalidate).
     """
     
     def __init__(self):
+        from app.config import get_settings
+        settings = get_settings()
         self._redis = None
-        self._memory_cache = {}
         self._connected = False
+        self._local = LocalCache(settings.cache_local_max_entries)
+        self._local_max_ttl = settings.cache_local_max_ttl
+        self._serializer = get_serializer()
+        self._stats: Counter = Counter()
+        # key -> task loading it in this process, for callers waiting on
+        # a miss and for background refreshes of stale values
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        # tag -> (read_at, generation); authoritative without Redis
+        self._generations: Dict[str, Tuple[float, int]] = {}
     
     async def connect(self, redis_url: str):
         """Connect to Redis."""
         try:
             import redis.asyncio as redis
-            self._redis = redis.from_url(redis_url, decode_responses=True)
+            # Values are binary (see app.services.serializer)
+            self._redis = redis.from_url(redis_url, decode_responses=False)
             await self._redis.ping()
             self._connected = True
             logger.info("Connected to Redis")
@@ -48,59 +168,412 @@ class CacheService:
             await self._redis.close()
             self._connected = False
     
+    @property
+    def redis(self):
+        """Underlying Redis client, or None when using the memory cache."""
+        return self._redis if self._connected else None
+    
     def _get_ttl(self, cache_type: str) -> int:
         """Get TTL for cache type."""
         return CACHE_TTL.get(cache_type, 3600)
     
-    async def get(self, key: str) -> Optional[Any]:
-        """Get value from cache."""
+    def _hard_ttl(self, cache_type: str) -> int:
+        """Seconds until an entry is dropped, stale period included."""
+        return self._get_ttl(cache_type) + CACHE_STALE_TTL.get(cache_type, 0)
+    
+    def _local_ttl(self, cache_type: str) -> float:
+        """TTL for the in-process tier."""
+        ttl = self._hard_ttl(cache_type)
+        if self._connected:
+            ttl = min(ttl, self._local_max_ttl)
+        return ttl
+    
+    @staticmethod
+    def _type_of(key: str) -> str:
+        """Cache type from a key's prefix (e.g. 'quote:AAPL' -> 'quote')."""
+        return key.split(':', 1)[0]
+    
+    def _decode(self, key: str, raw: bytes) -> Tuple[float, Any]:
+        """Parse a Redis value into a (fresh_until, value) entry."""
+        data = self._serializer.loads(raw)
+        if isinstance(data, dict) and '_f' in data:
+            return data['_f'], data['_v']
+        # Written before entries carried a freshness stamp
+        return time.time() + self._get_ttl(self._type_of(key)), data
+    
+    async def _get_entry(self, key: str) -> Optional[Tuple[float, Any]]:
+        """Get a (fresh_until, value) entry from the first tier holding it."""
+        entry = self._local.get(key)
+        if entry is not MISS:
+            self._stats['local_hits'] += 1
+            return entry
+        self._stats['local_misses'] += 1
+        
+        if not (self._connected and self._redis):
+            return None
+        
         try:
-            if self._connected and self._redis:
-                value = await self._redis.get(key)
-                if value:
-                    return json.loads(value)
-            else:
-                return self._memory_cache.get(key)
+            raw = await self._redis.get(key)
         except Exception as e:
             logger.error(f"Cache get error: {e}")
-        return None
+            return None
+        
+        if not raw:
+            self._stats['redis_misses'] += 1
+            return None
+        
+        try:
+            entry = self._decode(key, raw)
+        except Exception as e:
+            logger.error(f"Cache decode error for {key}: {e}")
+            self._stats['redis_misses'] += 1
+            return None
+        
+        self._stats['redis_hits'] += 1
+        self._local.set(key, entry, self._local_ttl(self._type_of(key)))
+        return entry
+    
+    async def get(self, key: str) -> Optional[Any]:
+        """Get value from cache if it is still fresh."""
+        entry = await self._get_entry(key)
+        if entry is None or entry[0] <= time.time():
+            return None
+        return entry[1]
     
     async def set(self, key: str, value: Any, cache_type: str = 'stock'):
         """Set value in cache with TTL."""
+        entry = (time.time() + self._get_ttl(cache_type), value)
+        self._local.set(key, entry, self._local_ttl(cache_type))
+        
+        if not (self._connected and self._redis):
+            return
+        
         try:
-            ttl = self._get_ttl(cache_type)
-            serialized = json.dumps(value, default=str)
-            
-            if self._connected and self._redis:
-                await self._redis.setex(key, ttl, serialized)
-            else:
-                self._memory_cache[key] = value
+            serialized = self._serializer.dumps({'_f': entry[0], '_v': value})
+            await self._redis.setex(key, self._hard_ttl(cache_type), serialized)
         except Exception as e:
             logger.error(f"Cache set error: {e}")
     
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """
+        Get several fresh values in one round-trip.
+        
+        Keys held by the local tier are served from it; the rest are
+        fetched from Redis with a single MGET.
+        
+        Args:
+            keys: Cache keys
+        
+        Returns:
+            Key to value for the keys that were found and fresh
+        """
+        now = time.time()
+        found: Dict[str, Any] = {}
+        remote = []
+        for key in dict.fromkeys(keys):
+            entry = self._local.get(key)
+            if entry is MISS:
+                self._stats['local_misses'] += 1
+                remote.append(key)
+                continue
+            self._stats['local_hits'] += 1
+            if entry[0] > now:
+                found[key] = entry[1]
+        
+        if not (remote and self._connected and self._redis):
+            return found
+        
+        try:
+            raws = await self._redis.mget(remote)
+        except Exception as e:
+            logger.error(f"Cache mget error: {e}")
+            return found
+        
+        for key, raw in zip(remote, raws):
+            if not raw:
+                self._stats['redis_misses'] += 1
+                continue
+            try:
+                entry = self._decode(key, raw)
+            except Exception as e:
+                logger.error(f"Cache decode error for {key}: {e}")
+                self._stats['redis_misses'] += 1
+                continue
+            self._stats['redis_hits'] += 1
+            self._local.set(key, entry, self._local_ttl(self._type_of(key)))
+            if entry[0] > now:
+                found[key] = entry[1]
+        return found
+    
+    async def set_many(self, items: Dict[str, Any], cache_type: str = 'stock'):
+        """Set several values with the same TTL in one round-trip."""
+        if not items:
+            return
+        fresh_until = time.time() + self._get_ttl(cache_type)
+        local_ttl = self._local_ttl(cache_type)
+        for key, value in items.items():
+            self._local.set(key, (fresh_until, value), local_ttl)
+        
+        if not (self._connected and self._redis):
+            return
+        
+        try:
+            hard_ttl = self._hard_ttl(cache_type)
+            pipe = self._redis.pipeline(transaction=False)
+            for key, value in items.items():
+                pipe.setex(key, hard_ttl, self._serializer.dumps({'_f': fresh_until, '_v': value}))
+            await pipe.execute()
+        except Exception as e:
+            logger.error(f"Cache set_many error: {e}")
+    
     async def delete(self, key: str):
         """Delete key from cache."""
+        await self.delete_many([key])
+    
+    async def delete_many(self, keys: Iterable[str]):
+        """Delete several keys in one round-trip."""
+        keys = list(keys)
+        if not keys:
+            return
+        for key in keys:
+            self._local.delete(key)
         try:
             if self._connected and self._redis:
-                await self._redis.delete(key)
-            else:
-                self._memory_cache.pop(key, None)
+                await self._redis.unlink(*keys)
         except Exception as e:
             logger.error(f"Cache delete error: {e}")
     
     async def delete_pattern(self, pattern: str):
-        """Delete keys matching pattern."""
+        """
+        Delete keys matching a glob pattern.
+        
+        Redis is walked incrementally with SCAN, so a large keyspace never
+        blocks it the way KEYS does. Prefer tag generations for routine
+        invalidation; this is for cleanup.
+        """
+        self._local.delete_pattern(pattern)
+        if not (self._connected and self._redis):
+            return
+        
         try:
-            if self._connected and self._redis:
-                keys = await self._redis.keys(pattern)
-                if keys:
-                    await self._redis.delete(*keys)
-            else:
-                keys_to_delete = [k for k in self._memory_cache if pattern.replace('*', '') in k]
-                for k in keys_to_delete:
-                    del self._memory_cache[k]
+            batch = []
+            async for key in self._redis.scan_iter(match=pattern, count=SCAN_COUNT):
+                batch.append(key)
+                if len(batch) >= SCAN_COUNT:
+                    await self._redis.unlink(*batch)
+                    batch = []
+            if batch:
+                await self._redis.unlink(*batch)
         except Exception as e:
             logger.error(f"Cache delete pattern error: {e}")
+    
+    async def generation(self, tag: str) -> int:
+        """
+        Current generation of an invalidation tag.
+        
+        With Redis the value is re-read at most every
+        ``cache_local_max_ttl`` seconds, the same staleness bound as the
+        local tier.
+        """
+        cached = self._generations.get(tag)
+        if cached is not None and (
+            not self._connected or time.monotonic() - cached[0] < self._local_max_ttl
+        ):
+            return cached[1]
+        
+        gen = cached[1] if cached else 0
+        if self._connected and self._redis:
+            try:
+                gen = int(await self._redis.get(f"gen:{tag}") or 0)
+            except Exception as e:
+                logger.error(f"Cache generation error: {e}")
+        self._generations[tag] = (time.monotonic(), gen)
+        return gen
+    
+    async def versioned_key(self, key: str, *tags: str) -> str:
+        """Append the current generations of ``tags`` to a cache key."""
+        gens = [str(await self.generation(tag)) for tag in tags]
+        return f"{key}@{'.'.join(gens)}"
+    
+    async def bump(self, *tags: str):
+        """Invalidate every key versioned with any of ``tags`` in O(1)."""
+        if not tags:
+            return
+        now = time.monotonic()
+        
+        if self._connected and self._redis:
+            try:
+                pipe = self._redis.pipeline(transaction=False)
+                for tag in tags:
+                    pipe.incr(f"gen:{tag}")
+                for tag, gen in zip(tags, await pipe.execute()):
+                    self._generations[tag] = (now, int(gen))
+                return
+            except Exception as e:
+                logger.error(f"Cache bump error: {e}")
+        
+        for tag in tags:
+            cached = self._generations.get(tag)
+            self._generations[tag] = (now, (cached[1] if cached else 0) + 1)
+    
+    async def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        cache_type: str = 'stock'
+    ) -> Optional[Any]:
+        """
+        Get a value, calling ``loader`` when it is missing or stale.
+        
+        Stale values (past the soft TTL but within ``CACHE_STALE_TTL``)
+        are returned immediately and refreshed in the background; only a
+        missing value makes the caller wait. The loader may outlive the
+        request, so it must open its own database session.
+        
+        Concurrent misses for the same key in this process share one
+        load (single-flight). Across workers, the loader is guarded by a
+        short Redis lock so that other workers wait for the holder's
+        result instead of loading too. A ``None`` result is not cached;
+        exceptions raised by the loader reach every waiter.
+        
+        Args:
+            key: Cache key
+            loader: Coroutine function producing the value
+            cache_type: Cache type for the TTL
+        
+        Returns:
+            Cached or freshly loaded value
+        """
+        entry = await self._get_entry(key)
+        if entry is not None:
+            fresh_until, value = entry
+            if fresh_until <= time.time():
+                self._stats['stale_served'] += 1
+                self._start_load(key, loader, cache_type, background=True)
+            return value
+        
+        task = self._inflight.get(key)
+        if task is None:
+            task = self._start_load(key, loader, cache_type)
+        else:
+            self._stats['coalesced'] += 1
+        
+        return await asyncio.shield(task)
+    
+    def _start_load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        cache_type: str,
+        background: bool = False
+    ) -> asyncio.Task:
+        """Start loading a key unless a load is already in flight."""
+        tasks = self._refreshing if background else self._inflight
+        task = tasks.get(key)
+        if task is not None:
+            return task
+        
+        # The load runs in its own task so a cancelled caller does not
+        # cancel it for the others
+        task = asyncio.ensure_future(self._load(key, loader, cache_type, background))
+        tasks[key] = task
+        task.add_done_callback(lambda t: self._load_done(key, t, background))
+        return task
+    
+    def _load_done(self, key: str, task: asyncio.Task, background: bool):
+        (self._refreshing if background else self._inflight).pop(key, None)
+        # Nobody awaits a background refresh; report its failure here
+        if background and not task.cancelled() and task.exception() is not None:
+            logger.error(f"Background refresh of {key} failed: {task.exception()}")
+    
+    async def _load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        cache_type: str,
+        background: bool = False
+    ) -> Optional[Any]:
+        """Run a loader under the distributed lock and cache its result."""
+        lock_key = f"lock:{key}"
+        token = None
+        
+        if self._connected and self._redis:
+            try:
+                token = uuid.uuid4().hex
+                if not await self._redis.set(lock_key, token, nx=True, px=LOCK_TTL_MS):
+                    token = None
+                    if background:
+                        # Another worker is already refreshing it
+                        return None
+                    value = await self._wait_for_holder(key)
+                    if value is not None:
+                        self._stats['lock_waits'] += 1
+                        return value
+            except Exception as e:
+                logger.error(f"Cache lock error: {e}")
+                token = None
+        
+        try:
+            self._stats['refreshes' if background else 'loads'] += 1
+            value = await loader()
+            if value is not None:
+                await self.set(key, value, cache_type)
+            return value
+        finally:
+            if token is not None:
+                try:
+                    await self._redis.eval(RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+                except Exception as e:
+                    logger.error(f"Cache unlock error: {e}")
+    
+    async def _wait_for_holder(self, key: str) -> Optional[Any]:
+        """
+        Poll Redis for a value another worker is loading.
+        
+        Returns None (the caller loads the value itself) on timeout, when
+        the holder gives up, or on a Redis or decode error.
+        """
+        deadline = time.monotonic() + LOCK_WAIT
+        while time.monotonic() < deadline:
+            await asyncio.sleep(LOCK_POLL)
+            try:
+                raw = await self._redis.get(key)
+                if not raw and not await self._redis.exists(f"lock:{key}"):
+                    break
+            except Exception as e:
+                logger.error(f"Cache get error: {e}")
+                return None
+            if raw:
+                try:
+                    entry = self._decode(key, raw)
+                except Exception as e:
+                    logger.error(f"Cache decode error for {key}: {e}")
+                    return None
+                self._local.set(key, entry, self._local_ttl(self._type_of(key)))
+                return entry[1]
+        return None
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit and miss counts per tier since startup."""
+        stats = {
+            'backend': 'redis' if self._connected else 'memory',
+            'local_entries': len(self._local),
+            'local_max_entries': self._local.max_entries,
+            'loads': self._stats['loads'],
+            'coalesced': self._stats['coalesced'],
+            'stale_served': self._stats['stale_served'],
+            'refreshes': self._stats['refreshes'],
+            'lock_waits': self._stats['lock_waits'],
+        }
+        for tier in ('local', 'redis'):
+            hits = self._stats[f'{tier}_hits']
+            misses = self._stats[f'{tier}_misses']
+            stats[tier] = {
+                'hits': hits,
+                'misses': misses,
+                'hit_ratio': round(hits / (hits + misses), 4) if hits + misses else None,
+            }
+        return stats
 
 
 # Singleton instance
@@ -136,3 +609,21 @@ def etf_holdings_key(symbol: str) -> str:
 
 def search_key(query: str) -> str:
     return f"search:{query.lower()}"
+
+def top50_key() -> str:
+    return "top50:etfs"
+
+def history_key(symbol: str, period: str) -> str:
+    return f"history:{symbol.upper()}:{period}"
+
+def stock_page_key(symbol: str, period: str) -> str:
+    return f"stock_page:{symbol.upper()}:{period}"
+
+def enrichment_key(symbol: str) -> str:
+    return f"enrich:{symbol.upper()}"
+
+def missing_key(symbol: str) -> str:
+    return f"missing:{symbol.upper()}"
+
+def count_key(listing: str, *filters) -> str:
+    return f"count:{listing}:" + ":".join(str(f) for f in filters)
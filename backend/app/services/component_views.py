@@ -0,0 +1,100 @@
+"""
+Maintenance of the denormalized index_component_views table.
+
+Component pages read this table alone instead of joining
+index_components, stocks and latest_quotes on every request. Rows are
+rebuilt when the catalog changes and their quote fields are updated
+right after each quote sync, so sorting by change or trend always
+reflects the stored prices.
+"""
+from typing import Iterable, Optional
+import logging
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import IndexComponent, IndexComponentView, LatestQuote, Stock
+
+logger = logging.getLogger(__name__)
+
+VIEW_COLUMNS = [
+    "index_symbol", "stock_symbol", "name", "name_th", "sector", "weight",
+    "price", "change_percent", "trend", "refreshed_at",
+]
+
+
+async def rebuild_component_views(db: AsyncSession) -> int:
+    """
+    Replace every row from the source tables.
+    
+    Delete and insert run in the caller's transaction, so readers see
+    the old rows until it commits. The caller commits.
+    
+    Returns:
+        Number of rows written
+    """
+    source = (
+        select(
+            IndexComponent.index_symbol,
+            IndexComponent.stock_symbol,
+            Stock.name,
+            Stock.name_th,
+            Stock.sector,
+            IndexComponent.weight,
+            LatestQuote.price,
+            LatestQuote.change_percent,
+            LatestQuote.trend,
+            func.now(),
+        )
+        .join(Stock, IndexComponent.stock_symbol == Stock.symbol)
+        .outerjoin(LatestQuote, IndexComponent.stock_symbol == LatestQuote.symbol)
+    )
+    
+    await db.execute(delete(IndexComponentView))
+    result = await db.execute(
+        insert(IndexComponentView).from_select(VIEW_COLUMNS, source)
+    )
+    logger.info(f"Rebuilt {result.rowcount} index component view rows")
+    return result.rowcount
+
+
+async def update_component_quotes(
+    db: AsyncSession,
+    symbols: Optional[Iterable[str]] = None
+) -> int:
+    """
+    Copy quote fields from latest_quotes into the view rows.
+    
+    Args:
+        db: Database session (the caller commits)
+        symbols: Only update these stocks (default: all)
+    
+    Returns:
+        Number of rows updated
+    """
+    stmt = (
+        update(IndexComponentView)
+        .where(IndexComponentView.stock_symbol == LatestQuote.symbol)
+        .values(
+            price=LatestQuote.price,
+            change_percent=LatestQuote.change_percent,
+            trend=LatestQuote.trend,
+            refreshed_at=func.now(),
+        )
+    )
+    if symbols is not None:
+        symbols = list(symbols)
+        if not symbols:
+            return 0
+        stmt = stmt.where(LatestQuote.symbol.in_(symbols))
+    
+    result = await db.execute(stmt)
+    return result.rowcount
+
+
+async def ensure_component_views(db: AsyncSession):
+    """Build the view rows if the table is empty (e.g. just created)."""
+    has_rows = (await db.execute(select(IndexComponentView.id).limit(1))).first()
+    if has_rows is None:
+        await rebuild_component_views(db)
+        await db.commit()
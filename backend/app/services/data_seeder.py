@@ -10,6 +10,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, text
 
 from app.models import Stock, ETF, Index, IndexComponent
+from app.services.component_views import rebuild_component_views
 
 logger = logging.getLogger(__name__)
 
@@ -201,5 +202,7 @@ async def run_all_seeds(db: AsyncSession):
     await seed_top50_etfs(db)
     await seed_all_stocks(db)
     await seed_index_components(db)
+    await rebuild_component_views(db)
+    await db.commit()
     logger.info("All seeds completed")
 
@@ -0,0 +1,117 @@
+"""
+Per-symbol request counts used to prioritise quote refreshes.
+
+Requests are counted in memory and periodically added to hourly Redis
+sorted sets, so every worker contributes to one shared view. Without
+Redis the hourly buckets are kept in process.
+"""
+import time
+from collections import Counter
+from typing import Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Hours of history considered, and how fast older hours lose weight
+WINDOW_HOURS = 24
+HALF_LIFE_HOURS = 6
+
+# Seconds between pushes of local counts to Redis
+FLUSH_INTERVAL = 10.0
+
+
+def _bucket_key(hour: int) -> str:
+    return f"demand:{hour}"
+
+
+class DemandTracker:
+    """Recency-weighted request counts per symbol."""
+    
+    def __init__(self):
+        self._pending: Counter = Counter()
+        self._last_flush = time.monotonic()
+        # hour -> counts, used when Redis is unavailable
+        self._buckets: Dict[int, Counter] = {}
+    
+    async def record(self, symbol: str):
+        """Count one request for a symbol."""
+        self._pending[symbol.upper()] += 1
+        if time.monotonic() - self._last_flush >= FLUSH_INTERVAL:
+            await self.flush()
+    
+    async def _redis(self):
+        from app.services.cache import get_cache_service
+        return (await get_cache_service()).redis
+    
+    async def flush(self):
+        """Move pending counts into the current hourly bucket."""
+        self._last_flush = time.monotonic()
+        if not self._pending:
+            return
+        
+        pending, self._pending = self._pending, Counter()
+        hour = int(time.time() // 3600)
+        
+        redis = await self._redis()
+        if redis is not None:
+            try:
+                key = _bucket_key(hour)
+                pipe = redis.pipeline(transaction=False)
+                for symbol, count in pending.items():
+                    pipe.zincrby(key, count, symbol)
+                pipe.expire(key, (WINDOW_HOURS + 1) * 3600)
+                await pipe.execute()
+                return
+            except Exception as e:
+                logger.warning(f"Could not flush demand counts to Redis: {e}")
+        
+        self._buckets.setdefault(hour, Counter()).update(pending)
+        for old in [h for h in self._buckets if h <= hour - WINDOW_HOURS]:
+            del self._buckets[old]
+    
+    async def scores(self) -> Dict[str, float]:
+        """
+        Demand score per symbol over the last ``WINDOW_HOURS`` hours.
+        
+        Each hour's count is halved every ``HALF_LIFE_HOURS`` hours of age.
+        
+        Returns:
+            Symbol to score (symbols never requested are absent)
+        """
+        await self.flush()
+        hour = int(time.time() // 3600)
+        scores: Counter = Counter()
+        
+        redis = await self._redis()
+        if redis is not None:
+            try:
+                pipe = redis.pipeline(transaction=False)
+                for age in range(WINDOW_HOURS):
+                    pipe.zrange(_bucket_key(hour - age), 0, -1, withscores=True)
+                for age, members in enumerate(await pipe.execute()):
+                    weight = 0.5 ** (age / HALF_LIFE_HOURS)
+                    for symbol, count in members:
+                        if isinstance(symbol, bytes):
+                            symbol = symbol.decode()
+                        scores[symbol] += count * weight
+                return dict(scores)
+            except Exception as e:
+                logger.warning(f"Could not read demand counts from Redis: {e}")
+        
+        for bucket_hour, counts in self._buckets.items():
+            weight = 0.5 ** ((hour - bucket_hour) / HALF_LIFE_HOURS)
+            for symbol, count in counts.items():
+                scores[symbol] += count * weight
+        return dict(scores)
+
+
+# Singleton instance
+_demand_tracker: Optional[DemandTracker] = None
+
+
+def get_demand_tracker() -> DemandTracker:
+    """Get demand tracker singleton."""
+    global _demand_tracker
+    if _demand_tracker is None:
+        _demand_tracker = DemandTracker()
+    return _demand_tracker
@@ -0,0 +1,149 @@
+"""
+Background enrichment of incomplete stock profiles.
+
+Read paths never call Yahoo for profile data. They enqueue the symbol
+and answer from the database or cache; a single worker per process
+fills in the profile and drops the cached detail so the next read shows
+it. A symbol is queued at most once at a time, a Redis claim keeps
+workers from fetching the same symbol, and lookups that find nothing (or
+fail) are remembered for a while so they are not retried on every view.
+"""
+import asyncio
+import uuid
+from typing import Optional, Set
+import logging
+
+from sqlalchemy import select
+
+from app.config import get_settings
+from app.database import get_session_maker
+from app.models import Stock
+from app.services.cache import get_cache_service, enrichment_key, stock_key
+from app.services.yahoo_finance import get_yahoo_service
+
+logger = logging.getLogger(__name__)
+
+# Milliseconds another worker's claim on a symbol is honoured
+CLAIM_TTL_MS = 60000
+
+
+def needs_enrichment(stock: Stock) -> bool:
+    """Whether a stock's profile is missing fields filled from Yahoo."""
+    return not stock.ceo or not stock.employees
+
+
+class EnrichmentQueue:
+    """Deduplicated queue of symbols whose profiles should be fetched."""
+    
+    def __init__(self, max_size: int):
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_size)
+        self._pending: Set[str] = set()
+        self._worker: Optional[asyncio.Task] = None
+    
+    def enqueue(self, symbol: str) -> bool:
+        """
+        Queue a symbol for enrichment without waiting.
+        
+        Returns:
+            True if queued; False if already queued or the queue is full
+        """
+        symbol = symbol.upper()
+        if symbol in self._pending:
+            return False
+        try:
+            self._queue.put_nowait(symbol)
+        except asyncio.QueueFull:
+            logger.debug(f"Enrichment queue full; dropping {symbol}")
+            return False
+        self._pending.add(symbol)
+        return True
+    
+    def start(self):
+        """Start the worker."""
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """Stop the worker; queued symbols are dropped."""
+        if self._worker is not None:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
+    
+    def size(self) -> int:
+        return self._queue.qsize()
+    
+    async def _run(self):
+        while True:
+            symbol = await self._queue.get()
+            try:
+                await self._enrich(symbol)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Enrichment of {symbol} failed: {e}")
+                cache = await get_cache_service()
+                await cache.set(enrichment_key(symbol), "failed", 'enrich_retry')
+            finally:
+                self._pending.discard(symbol)
+                self._queue.task_done()
+    
+    async def _claim(self, symbol: str) -> bool:
+        """Claim a symbol across workers (always granted without Redis)."""
+        cache = await get_cache_service()
+        if cache.redis is None:
+            return True
+        try:
+            return bool(await cache.redis.set(
+                f"lock:{enrichment_key(symbol)}", uuid.uuid4().hex, nx=True, px=CLAIM_TTL_MS
+            ))
+        except Exception as e:
+            logger.warning(f"Could not claim {symbol} for enrichment: {e}")
+            return True
+    
+    async def _enrich(self, symbol: str):
+        cache = await get_cache_service()
+        # A recent lookup found nothing (or failed)
+        if await cache.get(enrichment_key(symbol)) is not None:
+            return
+        if not await self._claim(symbol):
+            return
+        
+        session_maker = get_session_maker()
+        async with session_maker() as db:
+            stock = (await db.execute(
+                select(Stock).where(Stock.symbol == symbol)
+            )).scalar_one_or_none()
+            if stock is None or not needs_enrichment(stock):
+                return
+            
+            info = await get_yahoo_service().get_stock_info(symbol)
+            if not info:
+                # Lookup errors are reported as no data; retry sooner
+                await cache.set(enrichment_key(symbol), "failed", 'enrich_retry')
+                return
+            
+            stock.ceo = info.get('ceo') or stock.ceo
+            stock.employees = info.get('employees') or stock.employees
+            stock.headquarters = info.get('headquarters') or stock.headquarters
+            if not stock.website:
+                stock.website = info.get('website')
+            await db.commit()
+            await cache.delete(stock_key(symbol))
+            logger.info(f"Enriched profile for {symbol}")
+            
+            # Yahoo has nothing more for this symbol; stop asking for a while
+            if needs_enrichment(stock):
+                await cache.set(enrichment_key(symbol), "missing", 'enrich')
+
+
+# Singleton instance
+_enrichment_queue: Optional[EnrichmentQueue] = None
+
+
+def get_enrichment_queue() -> EnrichmentQueue:
+    """Get enrichment queue singleton."""
+    global _enrichment_queue
+    if _enrichment_queue is None:
+        _enrichment_queue = EnrichmentQueue(get_settings().enrichment_queue_size)
+    return _enrichment_queue
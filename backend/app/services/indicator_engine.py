@@ -0,0 +1,268 @@
+"""
+Vectorized indicator engine for the whole symbol universe.
+
+Daily closes for every symbol are packed into one (symbols x days) matrix
+and SMA50, SMA200, 52-week range, average volume and trend are computed
+with a handful of NumPy reductions instead of one pandas call per ticker.
+"""
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+import logging
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import StockPrice, ETFPrice
+
+logger = logging.getLogger(__name__)
+
+# Trading days in the matrix (52 weeks)
+MATRIX_DAYS = 252
+
+# Trading days averaged for avg_volume_10d
+AVG_VOLUME_DAYS = 10
+
+
+@dataclass
+class PriceMatrix:
+    """
+    Daily bars for many symbols, one row per symbol.
+    
+    Rows are right-aligned: column -1 holds each symbol's latest bar and
+    symbols with shorter histories are padded with NaN on the left.
+    """
+    symbols: List[str]
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+
+@dataclass
+class IndicatorResult:
+    """Indicator arrays aligned with ``symbols``."""
+    symbols: List[str]
+    price: np.ndarray
+    sma_50: np.ndarray
+    sma_200: np.ndarray
+    week_52_high: np.ndarray
+    week_52_low: np.ndarray
+    avg_volume_10d: np.ndarray
+    trend: np.ndarray
+    
+    def to_quote_rows(self) -> List[Dict[str, Any]]:
+        """
+        Convert to LatestQuote rows for a bulk upsert.
+        
+        Only indicator columns are included; price fields stay owned by
+        the quote sync. Indicators whose window is not covered by stored
+        history (NaN) are left out, so the upsert keeps the values the
+        quote sync computed from a full download, and trend is left out
+        unless both SMAs are known. Symbols with nothing to write are
+        skipped.
+        """
+        rows = []
+        for i, symbol in enumerate(self.symbols):
+            if np.isnan(self.price[i]):
+                continue
+            row = {
+                'sma_50': _to_float(self.sma_50[i]),
+                'sma_200': _to_float(self.sma_200[i]),
+                'week_52_high': _to_float(self.week_52_high[i]),
+                'week_52_low': _to_float(self.week_52_low[i]),
+                'avg_volume_10d': _to_int(self.avg_volume_10d[i]),
+            }
+            row = {k: v for k, v in row.items() if v is not None}
+            if 'sma_50' in row and 'sma_200' in row:
+                row['trend'] = str(self.trend[i])
+            if row:
+                rows.append({'symbol': symbol, **row})
+        return rows
+
+
+def _to_float(value: float) -> Optional[float]:
+    return None if np.isnan(value) else round(float(value), 4)
+
+
+def _to_int(value: float) -> Optional[int]:
+    return None if np.isnan(value) else int(value)
+
+
+def build_price_matrix(
+    series: Dict[str, List[tuple]],
+    days: int = MATRIX_DAYS
+) -> PriceMatrix:
+    """
+    Pack per-symbol bars into a right-aligned price matrix.
+    
+    Args:
+        series: Symbol to list of (high, low, close, volume), oldest first
+        days: Number of trailing days to keep per symbol
+    
+    Returns:
+        PriceMatrix with one row per symbol
+    """
+    symbols = list(series.keys())
+    shape = (len(symbols), days)
+    high = np.full(shape, np.nan)
+    low = np.full(shape, np.nan)
+    close = np.full(shape, np.nan)
+    volume = np.full(shape, np.nan)
+    
+    for row, symbol in enumerate(symbols):
+        bars = series[symbol][-days:]
+        if not bars:
+            continue
+        block = np.array(bars, dtype=float)
+        high[row, -len(bars):] = block[:, 0]
+        low[row, -len(bars):] = block[:, 1]
+        close[row, -len(bars):] = block[:, 2]
+        volume[row, -len(bars):] = block[:, 3]
+    
+    return PriceMatrix(symbols, high, low, close, volume)
+
+
+def _trailing_mean(values: np.ndarray, n: int) -> np.ndarray:
+    """Mean of the last ``n`` columns; NaN unless all ``n`` are present."""
+    if values.shape[1] < n:
+        return np.full(values.shape[0], np.nan)
+    return values[:, -n:].mean(axis=1)
+
+
+def _trailing_nanmean(values: np.ndarray, n: int) -> np.ndarray:
+    """Mean of the present values among the last ``n`` columns."""
+    window = values[:, -n:]
+    present = ~np.isnan(window)
+    counts = present.sum(axis=1)
+    totals = np.where(present, window, 0.0).sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts > 0, totals / counts, np.nan)
+
+
+def _nan_extreme(values: np.ndarray, highest: bool) -> np.ndarray:
+    """Row-wise max (or min) ignoring NaN; NaN for all-NaN rows."""
+    fill = -np.inf if highest else np.inf
+    filled = np.where(np.isnan(values), fill, values)
+    result = filled.max(axis=1) if highest else filled.min(axis=1)
+    return np.where(np.isinf(result), np.nan, result)
+
+
+def calculate_trends(
+    price: np.ndarray,
+    sma_50: np.ndarray,
+    sma_200: np.ndarray
+) -> np.ndarray:
+    """
+    Vectorized counterpart of ``calculate_trend``.
+    
+    NaN inputs compare False everywhere and therefore map to 'sideways'.
+    """
+    return np.select(
+        [
+            (price > sma_50) & (sma_50 > sma_200),
+            (price < sma_50) & (sma_50 < sma_200),
+        ],
+        ["uptrend", "downtrend"],
+        default="sideways",
+    )
+
+
+def compute_indicators(matrix: PriceMatrix) -> IndicatorResult:
+    """
+    Compute indicators for every symbol in one pass.
+    
+    Args:
+        matrix: Right-aligned price matrix
+    
+    Returns:
+        IndicatorResult with one entry per symbol
+    """
+    days = matrix.close.shape[1]
+    price = matrix.close[:, -1] if days else np.full(len(matrix.symbols), np.nan)
+    sma_50 = _trailing_mean(matrix.close, 50)
+    sma_200 = _trailing_mean(matrix.close, 200)
+    
+    # Ranges and averages over a partly stored window would understate
+    # them; such symbols get NaN, like an SMA without enough closes
+    bars = (~np.isnan(matrix.close)).sum(axis=1)
+    full_year = bars >= days
+    
+    return IndicatorResult(
+        symbols=matrix.symbols,
+        price=price,
+        sma_50=sma_50,
+        sma_200=sma_200,
+        week_52_high=np.where(full_year, _nan_extreme(matrix.high, highest=True), np.nan),
+        week_52_low=np.where(full_year, _nan_extreme(matrix.low, highest=False), np.nan),
+        avg_volume_10d=np.where(
+            bars >= AVG_VOLUME_DAYS,
+            _trailing_nanmean(matrix.volume, AVG_VOLUME_DAYS),
+            np.nan,
+        ),
+        trend=calculate_trends(price, sma_50, sma_200),
+    )
+
+
+async def load_price_matrix(
+    db: AsyncSession,
+    type_map: Dict[str, str],
+    days: int = MATRIX_DAYS
+) -> PriceMatrix:
+    """
+    Build a price matrix from the stock_prices and etf_prices tables.
+    
+    Args:
+        db: Database session
+        type_map: Symbol to symbol type ('stock' or 'etf')
+        days: Number of trailing days to keep per symbol
+    
+    Returns:
+        PriceMatrix for every symbol that has stored prices
+    """
+    # Calendar window comfortably covering ``days`` trading days
+    cutoff = date.today() - timedelta(days=int(days * 1.5) + 10)
+    series: Dict[str, List[tuple]] = {}
+    
+    for model, symbol_type in ((StockPrice, "stock"), (ETFPrice, "etf")):
+        symbols = [s for s, t in type_map.items() if t == symbol_type]
+        if not symbols:
+            continue
+        
+        result = await db.execute(
+            select(model.symbol, model.high, model.low, model.close, model.volume)
+            .where(model.symbol.in_(symbols))
+            .where(model.date >= cutoff)
+            .where(model.close.isnot(None))
+            .order_by(model.symbol, model.date)
+        )
+        for sym, high, low, close, volume in result.all():
+            series.setdefault(sym, []).append((
+                float(high) if high is not None else np.nan,
+                float(low) if low is not None else np.nan,
+                float(close),
+                float(volume) if volume is not None else np.nan,
+            ))
+    
+    return build_price_matrix(series, days)
+
+
+async def recompute_indicators(
+    db: AsyncSession,
+    type_map: Dict[str, str]
+) -> List[Dict[str, Any]]:
+    """
+    Recompute indicators for all symbols from stored prices.
+    
+    Args:
+        db: Database session
+        type_map: Symbol to symbol type ('stock' or 'etf')
+    
+    Returns:
+        LatestQuote rows holding the indicator columns
+    """
+    matrix = await load_price_matrix(db, type_map)
+    rows = compute_indicators(matrix).to_quote_rows()
+    logger.info(f"Recomputed indicators for {len(rows)} symbols")
+    return rows
@@ -0,0 +1,197 @@
+"""
+Columnar on-disk archive of daily prices.
+
+Each symbol's history is one fixed-width NumPy record file (dates as
+datetime64[D], OHLC as float32, volume as int64) that is memory-mapped on
+read. Range queries are a binary search on the date column and a slice,
+so long-range charts never build per-row Python objects from the DB.
+"""
+import os
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+import numpy as np
+
+from app.config import get_settings
+from app.services.sma_tracker import Bar
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).parent.parent.parent
+
+ARCHIVE_DTYPE = np.dtype([
+    ("date", "datetime64[D]"),
+    ("open", "<f4"),
+    ("high", "<f4"),
+    ("low", "<f4"),
+    ("close", "<f4"),
+    ("volume", "<i8"),
+])
+
+PRICE_COLUMNS = ("open", "high", "low", "close")
+
+
+class PriceArchive:
+    """Per-symbol record files under a single directory."""
+    
+    def __init__(self, root: Path):
+        self.root = root
+        self.root.mkdir(parents=True, exist_ok=True)
+        # symbol -> (mtime_ns, memory-mapped array)
+        self._maps: Dict[str, Tuple[int, np.ndarray]] = {}
+    
+    def _path(self, symbol: str) -> Path:
+        return self.root / f"{symbol.upper()}.npy"
+    
+    def _full_marker(self, symbol: str) -> Path:
+        """Present once a symbol's entire history has been archived."""
+        return self.root / f"{symbol.upper()}.full"
+    
+    def _to_records(self, bars: List[Bar]) -> np.ndarray:
+        records = np.empty(len(bars), dtype=ARCHIVE_DTYPE)
+        records["date"] = [bar.date for bar in bars]
+        records["open"] = [bar.open if bar.open is not None else np.nan for bar in bars]
+        records["high"] = [bar.high if bar.high is not None else np.nan for bar in bars]
+        records["low"] = [bar.low if bar.low is not None else np.nan for bar in bars]
+        records["close"] = [bar.close for bar in bars]
+        records["volume"] = [bar.volume or 0 for bar in bars]
+        return records
+    
+    def load(self, symbol: str) -> Optional[np.ndarray]:
+        """
+        Memory-map a symbol's full history.
+        
+        The mapping is reused until the file is replaced on disk.
+        
+        Returns:
+            Read-only record array, or None if the symbol is not archived
+        """
+        symbol = symbol.upper()
+        path = self._path(symbol)
+        try:
+            mtime = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            self._maps.pop(symbol, None)
+            return None
+        
+        cached = self._maps.get(symbol)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        
+        records = np.load(path, mmap_mode="r")
+        self._maps[symbol] = (mtime, records)
+        return records
+    
+    def append(self, symbol: str, bars: List[Bar], full: bool = False):
+        """
+        Merge bars (oldest first) into a symbol's history.
+        
+        Stored bars on or after the first new date are replaced. The file
+        is rewritten to a temporary path and swapped in atomically, so
+        concurrent readers always see a complete file.
+        
+        Args:
+            symbol: Stock or ETF symbol
+            bars: Daily bars, oldest first
+            full: The bars are the symbol's entire history ('max')
+        """
+        if not bars:
+            return
+        
+        new = self._to_records(bars)
+        existing = self.load(symbol)
+        if existing is not None and len(existing):
+            keep = np.searchsorted(existing["date"], new["date"][0], side="left")
+            new = np.concatenate([np.asarray(existing[:keep]), new])
+        
+        path = self._path(symbol)
+        tmp = path.with_suffix(".tmp.npy")
+        np.save(tmp, new)
+        os.replace(tmp, path)
+        if full:
+            self._full_marker(symbol).touch()
+    
+    def append_many(self, bars_by_symbol: Dict[str, List[Bar]], full: bool = False):
+        """Merge bars for several symbols."""
+        for symbol, bars in bars_by_symbol.items():
+            try:
+                self.append(symbol, bars, full)
+            except Exception as e:
+                logger.error(f"Error archiving prices for {symbol}: {e}")
+    
+    def read(self, symbol: str, period: str = "max") -> Optional[np.ndarray]:
+        """
+        Slice a symbol's history to a period without copying.
+        
+        Daily appends alone leave only recent bars, so a period is served
+        only if the archive reaches back to its start; 'max' needs a full
+        history download.
+        
+        Args:
+            symbol: Stock or ETF symbol
+            period: Time period (1d, 5d, 1mo, 3mo, 6mo, 1y, 2y, 5y, max)
+        
+        Returns:
+            Record array view, or None if the symbol is not archived or
+            the archive does not cover the period
+        """
+        from app.services.price_history import COVERAGE_SLACK_DAYS, PERIOD_BARS, PERIOD_DAYS
+        
+        records = self.load(symbol)
+        if records is None or not len(records):
+            return None
+        
+        if period in PERIOD_BARS:
+            if len(records) < PERIOD_BARS[period]:
+                return None
+            return records[-PERIOD_BARS[period]:]
+        if period in PERIOD_DAYS:
+            start = date.today() - timedelta(days=PERIOD_DAYS[period])
+            latest_first = np.datetime64(start + timedelta(days=COVERAGE_SLACK_DAYS), "D")
+            if records["date"][0] > latest_first:
+                return None
+            cutoff = np.datetime64(start, "D")
+            return records[np.searchsorted(records["date"], cutoff, side="left"):]
+        if not self._full_marker(symbol).exists():
+            return None
+        return records
+
+
+def to_columns(records: np.ndarray) -> Dict[str, List[Any]]:
+    """Convert a record slice to column lists for a JSON response."""
+    columns = {"date": np.datetime_as_string(records["date"], unit="D").tolist()}
+    for name in PRICE_COLUMNS:
+        values = np.round(records[name].astype(np.float64), 4)
+        # JSON has no NaN; gaps become null
+        columns[name] = np.where(np.isnan(values), None, values).tolist()
+    columns["volume"] = records["volume"].tolist()
+    return columns
+
+
+def to_rows(records: np.ndarray) -> List[Dict[str, Any]]:
+    """Convert a record slice to the row-oriented history format."""
+    columns = to_columns(records)
+    return [
+        {"date": d, "open": o, "high": h, "low": l, "close": c, "volume": v}
+        for d, o, h, l, c, v in zip(
+            columns["date"], columns["open"], columns["high"],
+            columns["low"], columns["close"], columns["volume"],
+        )
+    ]
+
+
+# Singleton instance
+_price_archive: Optional[PriceArchive] = None
+
+
+def get_price_archive() -> PriceArchive:
+    """Get price archive singleton."""
+    global _price_archive
+    if _price_archive is None:
+        root = Path(get_settings().price_archive_dir)
+        if not root.is_absolute():
+            root = BASE_DIR / root
+        _price_archive = PriceArchive(root)
+    return _price_archive
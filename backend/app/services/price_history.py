@@ -0,0 +1,209 @@
+"""
+Daily OHLCV history stored in the stock_prices and etf_prices tables.
+"""
+import asyncio
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+import logging
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import StockPrice, ETFPrice
+from app.services.sma_tracker import Bar
+
+logger = logging.getLogger(__name__)
+
+PRICE_MODELS = {
+    "stock": StockPrice,
+    "etf": ETFPrice,
+}
+
+# Periods measured in calendar days back from today
+PERIOD_DAYS = {
+    "1mo": 31,
+    "3mo": 92,
+    "6mo": 183,
+    "1y": 366,
+    "2y": 731,
+    "5y": 1827,
+}
+
+# Periods measured in trading days (most recent bars)
+PERIOD_BARS = {
+    "1d": 1,
+    "5d": 5,
+}
+
+# Days the first stored bar may trail a period's start (weekends and
+# holidays) while still covering the period
+COVERAGE_SLACK_DAYS = 7
+
+# Rows per INSERT statement (8 bound parameters each)
+INSERT_CHUNK = 2000
+
+
+def _round(value) -> Optional[float]:
+    return round(float(value), 4) if value is not None else None
+
+
+async def store_bars(
+    db: AsyncSession,
+    symbol_type: str,
+    bars_by_symbol: Dict[str, List[Bar]]
+) -> int:
+    """
+    Upsert daily bars into the price table for ``symbol_type``.
+    
+    Existing rows for the same (symbol, date) are overwritten, so the
+    bar for the current session is revised on every call. The caller
+    commits.
+    
+    Args:
+        db: Database session
+        symbol_type: 'stock' or 'etf'
+        bars_by_symbol: Symbol to bars, oldest first
+    
+    Returns:
+        Number of rows written
+    """
+    model = PRICE_MODELS[symbol_type]
+    rows = [
+        {
+            "symbol": symbol,
+            "date": bar.date,
+            "open": bar.open,
+            "high": bar.high,
+            "low": bar.low,
+            "close": bar.close,
+            # Downloads are split/dividend adjusted already
+            "adj_close": bar.close,
+            "volume": bar.volume,
+        }
+        for symbol, bars in bars_by_symbol.items()
+        for bar in bars
+    ]
+    
+    for i in range(0, len(rows), INSERT_CHUNK):
+        stmt = insert(model).values(rows[i:i + INSERT_CHUNK])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[model.symbol, model.date],
+            set_={
+                col: stmt.excluded[col]
+                for col in ("open", "high", "low", "close", "adj_close", "volume")
+            },
+        )
+        await db.execute(stmt)
+    
+    return len(rows)
+
+
+async def sync_history_batch(
+    db: AsyncSession,
+    symbols: List[str],
+    type_map: Dict[str, str],
+    period: str = "5d"
+) -> Dict[str, List[Bar]]:
+    """
+    Download daily bars for one batch of symbols and store them in the
+    database and the on-disk price archive. The caller commits.
+    
+    Args:
+        db: Database session
+        symbols: Symbols in this batch
+        type_map: Symbol to symbol type ('stock' or 'etf')
+        period: yfinance period to download
+    
+    Returns:
+        Downloaded bars by symbol
+    
+    Raises:
+        Exception: If a download chunk failed or returned nothing
+    """
+    from app.services.price_archive import get_price_archive
+    from app.services.yahoo_finance import get_yahoo_service
+    
+    # A failed download raises, so the job does not checkpoint past it
+    bars_by_symbol = await get_yahoo_service().batch_get_bars(symbols, period, strict=True)
+    
+    # Long-range charts read from the on-disk archive
+    await asyncio.to_thread(
+        get_price_archive().append_many, bars_by_symbol, period == "max"
+    )
+    
+    for symbol_type in PRICE_MODELS:
+        subset = {
+            sym: bars for sym, bars in bars_by_symbol.items()
+            if type_map.get(sym) == symbol_type
+        }
+        if subset:
+            await store_bars(db, symbol_type, subset)
+    
+    return bars_by_symbol
+
+
+def covers_period(history: List[Dict[str, Any]], period: str) -> bool:
+    """
+    Whether stored bars (oldest first) span the whole period.
+    
+    Daily appends alone leave only the latest bars, which must not be
+    served as a long chart. Whether a 'max' history is complete cannot
+    be told from the bars, so it never counts as covered.
+    """
+    if not history:
+        return False
+    if period in PERIOD_BARS:
+        return len(history) >= PERIOD_BARS[period]
+    if period in PERIOD_DAYS:
+        start = date.today() - timedelta(days=PERIOD_DAYS[period] - COVERAGE_SLACK_DAYS)
+        return history[0]["date"] <= start.isoformat()
+    return False
+
+
+async def get_history(
+    db: AsyncSession,
+    symbol: str,
+    symbol_type: str,
+    period: str = "1y"
+) -> List[Dict[str, Any]]:
+    """
+    Read stored daily bars for a symbol.
+    
+    Args:
+        db: Database session
+        symbol: Stock or ETF symbol
+        symbol_type: 'stock' or 'etf'
+        period: Time period (1d, 5d, 1mo, 3mo, 6mo, 1y, 2y, 5y, max)
+    
+    Returns:
+        List of OHLCV data, oldest first (empty if nothing is stored)
+    """
+    model = PRICE_MODELS[symbol_type]
+    query = select(
+        model.date, model.open, model.high, model.low, model.close, model.volume
+    ).where(model.symbol == symbol)
+    
+    if period in PERIOD_BARS:
+        query = query.order_by(model.date.desc()).limit(PERIOD_BARS[period])
+    else:
+        if period in PERIOD_DAYS:
+            cutoff = date.today() - timedelta(days=PERIOD_DAYS[period])
+            query = query.where(model.date >= cutoff)
+        query = query.order_by(model.date)
+    
+    rows = (await db.execute(query)).all()
+    if period in PERIOD_BARS:
+        rows.reverse()
+    
+    return [
+        {
+            "date": day.isoformat(),
+            "open": _round(open_),
+            "high": _round(high),
+            "low": _round(low),
+            "close": _round(close),
+            "volume": int(volume) if volume is not None else 0,
+        }
+        for day, open_, high, low, close, volume in rows
+    ]
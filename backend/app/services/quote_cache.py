@@ -0,0 +1,92 @@
+"""
+Cached quote fields for list endpoints.
+
+List rows carry a symbol's price, change and trend. Instead of joining
+LatestQuote into every list query, the catalog rows are selected alone and
+the quote fields are read from the ``quote:`` cache keys in one
+round-trip; only the symbols missing from the cache are read from the
+database, and those are cached for the next request.
+"""
+from typing import Any, Dict, Iterable, List, Optional
+import logging
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_session_maker
+from app.models import LatestQuote
+from app.services.cache import get_cache_service, quote_key
+from app.services.quote_store import quote_to_dict
+
+logger = logging.getLogger(__name__)
+
+# Quote fields shown on list rows
+LIST_FIELDS = ("price", "change_percent", "trend")
+
+
+async def _load_quotes(db: AsyncSession, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+    result = await db.execute(select(LatestQuote).where(LatestQuote.symbol.in_(symbols)))
+    return {quote.symbol: quote_to_dict(quote) for quote in result.scalars()}
+
+
+async def get_quotes(
+    symbols: Iterable[str],
+    db: Optional[AsyncSession] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Get quotes for several symbols, cache first.
+    
+    Args:
+        symbols: Symbols to look up
+        db: Session for cache misses; one is opened when needed if omitted
+    
+    Returns:
+        Symbol to quote dictionary (symbols without a quote are absent)
+    """
+    symbols = list(dict.fromkeys(symbols))
+    if not symbols:
+        return {}
+    
+    cache = await get_cache_service()
+    cached = await cache.get_many(quote_key(s) for s in symbols)
+    quotes = {s: cached[quote_key(s)] for s in symbols if quote_key(s) in cached}
+    
+    missing = [s for s in symbols if s not in quotes]
+    if not missing:
+        return quotes
+    
+    if db is not None:
+        loaded = await _load_quotes(db, missing)
+    else:
+        session_maker = get_session_maker()
+        async with session_maker() as session:
+            loaded = await _load_quotes(session, missing)
+    
+    await cache.set_many({quote_key(s): q for s, q in loaded.items()}, 'quote')
+    quotes.update(loaded)
+    return quotes
+
+
+async def overlay_quotes(
+    items: List[Dict[str, Any]],
+    db: Optional[AsyncSession] = None
+) -> List[Dict[str, Any]]:
+    """
+    Fill the list quote fields of rows keyed by 'symbol'.
+    
+    Rows are copied rather than updated in place, since they may be held
+    by the in-process cache.
+    
+    Args:
+        items: Rows with a 'symbol' key
+        db: Session for cache misses; one is opened when needed if omitted
+    
+    Returns:
+        New rows with ``LIST_FIELDS`` set (None without a quote)
+    """
+    quotes = await get_quotes((item["symbol"] for item in items), db)
+    rows = []
+    for item in items:
+        quote = quotes.get(item["symbol"]) or {}
+        rows.append({**item, **{f: quote.get(f) for f in LIST_FIELDS}})
+    return rows
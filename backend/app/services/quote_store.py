@@ -0,0 +1,130 @@
+"""
+Persistence helpers for LatestQuote rows.
+"""
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional
+import logging
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import LatestQuote, Stock, ETF
+
+logger = logging.getLogger(__name__)
+
+# LatestQuote columns filled from quote dictionaries
+QUOTE_FIELDS = [
+    "price", "change_amount", "change_percent",
+    "open_price", "high_price", "low_price", "volume",
+    "market_cap", "pe_ratio", "eps",
+    "week_52_high", "week_52_low", "avg_volume_10d", "dividend_yield",
+    "sma_50", "sma_200", "trend",
+]
+
+# Quote fields refreshed from ticker.info rather than price downloads
+FUNDAMENTAL_FIELDS = ["market_cap", "pe_ratio", "eps", "dividend_yield"]
+
+# Rows per INSERT statement (stays well under the 32767 parameter limit)
+UPSERT_CHUNK = 1000
+
+
+def quote_to_dict(quote: LatestQuote) -> Dict[str, Any]:
+    """
+    Convert a LatestQuote row to the quote dictionary served by the API.
+    
+    This is also the shape stored under ``quote:`` cache keys, so the
+    quote endpoints and the list endpoints read the same entries.
+    """
+    data = {"symbol": quote.symbol}
+    for field in QUOTE_FIELDS:
+        value = getattr(quote, field)
+        data[field] = float(value) if isinstance(value, Decimal) else value
+    data["updated_at"] = quote.updated_at.isoformat() if quote.updated_at else None
+    return data
+
+
+def fundamentals_quote(symbol: str, fundamentals: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Build a partial quote from the fundamentals of a ``ticker.info`` lookup.
+    
+    Fields Yahoo did not report are left out, so ``save_quotes`` keeps
+    the stored values instead of clearing them.
+    
+    Returns:
+        Quote dictionary, or None if no field was reported
+    """
+    data = {f: fundamentals[f] for f in FUNDAMENTAL_FIELDS if fundamentals.get(f) is not None}
+    if not data:
+        return None
+    return {"symbol": symbol, **data}
+
+
+async def load_type_map(db: AsyncSession) -> Dict[str, str]:
+    """
+    Map every tracked symbol to its symbol type.
+    
+    Returns:
+        Symbol to 'stock' or 'etf'
+    """
+    type_map = {sym: "stock" for sym in (await db.execute(select(Stock.symbol))).scalars()}
+    type_map.update({sym: "etf" for sym in (await db.execute(select(ETF.symbol))).scalars()})
+    return type_map
+
+
+async def save_quotes(
+    db: AsyncSession,
+    quotes: Iterable[Dict[str, Any]],
+    type_map: Dict[str, str]
+) -> int:
+    """
+    Insert or update LatestQuote rows with set-based upserts.
+    
+    Quotes are written with ``INSERT ... ON CONFLICT (symbol) DO UPDATE``,
+    one statement per group of quotes carrying the same fields. Only the
+    fields present in a quote are written, so partial quotes (price-only
+    batch quotes, fundamentals-only and indicator-only rows) leave other
+    columns untouched. The caller commits.
+    
+    Args:
+        db: Database session
+        quotes: Quote dictionaries, each with a 'symbol' key
+        type_map: Symbol to symbol type ('stock' or 'etf')
+    
+    Returns:
+        Number of rows written
+    """
+    # A statement may not touch the same row twice; the last quote wins
+    by_symbol = {q["symbol"]: q for q in quotes if q}
+    
+    groups: Dict[FrozenSet[str], List[Dict[str, Any]]] = {}
+    for data in by_symbol.values():
+        fields = frozenset(f for f in QUOTE_FIELDS if f in data)
+        groups.setdefault(fields, []).append(data)
+    
+    now = datetime.utcnow()
+    for fields, group in groups.items():
+        columns = sorted(fields)
+        rows = [
+            {
+                "symbol": data["symbol"],
+                "symbol_type": type_map.get(data["symbol"], "stock"),
+                "updated_at": now,
+                **{f: data[f] for f in columns},
+            }
+            for data in group
+        ]
+        
+        for i in range(0, len(rows), UPSERT_CHUNK):
+            stmt = insert(LatestQuote).values(rows[i:i + UPSERT_CHUNK])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[LatestQuote.symbol],
+                set_={
+                    **{f: stmt.excluded[f] for f in columns},
+                    "updated_at": stmt.excluded.updated_at,
+                },
+            )
+            await db.execute(stmt)
+    
+    return len(by_symbol)
@@ -0,0 +1,215 @@
+"""
+Token-bucket rate limiting for outbound Yahoo Finance requests.
+"""
+import asyncio
+import time
+from typing import Dict, Tuple
+import logging
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Reserves tokens from a bucket stored as a Redis hash and returns the
+# number of milliseconds the caller must wait before using it. Tokens may
+# go negative: each caller books the next free slot, so callers are served
+# in arrival order across every worker sharing the bucket.
+#
+# KEYS[1]: bucket key
+# ARGV[1]: refill rate (tokens per second)
+# ARGV[2]: capacity (burst size)
+# ARGV[3]: tokens requested
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1])
+local ts = tonumber(state[2])
+if tokens == nil or ts == nil then
+    tokens = capacity
+    ts = now
+end
+
+tokens = math.min(capacity, tokens + (now - ts) * rate) - requested
+
+local wait_ms = 0
+if tokens < 0 then
+    wait_ms = math.ceil(-tokens / rate * 1000)
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate * 1000) + 1000)
+return wait_ms
+"""
+
+
+class TokenBucket:
+    """
+    In-process token bucket.
+    
+    Refills at ``rate`` tokens per second up to ``capacity``. Each call to
+    ``acquire`` books the next free slot before sleeping, so concurrent
+    coroutines are released in arrival order without racing each other.
+    """
+    
+    def __init__(self, rate: float, capacity: int):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+    
+    def _reserve(self, tokens: int) -> float:
+        """Take tokens and return how long to wait before using them."""
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity,
+            self._tokens + (now - self._updated) * self.rate
+        ) - tokens
+        self._updated = now
+        return -self._tokens / self.rate if self._tokens < 0 else 0.0
+    
+    async def acquire(self, tokens: int = 1):
+        """
+        Wait until ``tokens`` requests may be sent.
+        
+        Args:
+            tokens: Number of outbound requests about to be made
+        """
+        wait = self._reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class RedisTokenBucket:
+    """
+    Token bucket shared by every worker through Redis.
+    
+    The bucket state lives in a single Redis hash updated by a Lua script,
+    so the combined outbound rate of all processes stays within ``rate``.
+    If Redis stops answering, callers fall back to an in-process bucket.
+    """
+    
+    def __init__(self, redis, key: str, rate: float, capacity: int):
+        self.rate = float(rate)
+        self.capacity = capacity
+        self._redis = redis
+        self._key = key
+        self._script = redis.register_script(TOKEN_BUCKET_SCRIPT)
+        self._fallback = TokenBucket(rate, capacity)
+        self._degraded = False
+    
+    async def acquire(self, tokens: int = 1):
+        """
+        Wait until ``tokens`` requests may be sent.
+        
+        Args:
+            tokens: Number of outbound requests about to be made
+        """
+        try:
+            wait_ms = await self._script(
+                keys=[self._key], args=[self.rate, self.capacity, tokens]
+            )
+            if self._degraded:
+                logger.info("Redis rate limiter recovered")
+                self._degraded = False
+        except Exception as e:
+            if not self._degraded:
+                logger.warning(f"Redis rate limiter unavailable, limiting locally: {e}")
+                self._degraded = True
+            await self._fallback.acquire(tokens)
+            return
+        
+        if wait_ms:
+            await asyncio.sleep(int(wait_ms) / 1000)
+
+
+# Budgets: the deployment-wide rate is split in two. Requests served
+# while a visitor waits draw from a reserved share; syncs and background
+# jobs get the rest, so a sync chunk that books a hundred tokens never
+# delays a page load and the two together stay within the total
+BULK = "bulk"
+INTERACTIVE = "interactive"
+
+# Seconds before Redis is tried again after it could not be reached
+REDIS_RETRY_INTERVAL = 30.0
+
+# Singleton instances, by budget
+_rate_limiters: Dict[str, object] = {}
+# Budget -> (next Redis probe, in-process bucket used until then)
+_local_fallbacks: Dict[str, Tuple[float, TokenBucket]] = {}
+
+
+def budget_limits(settings, budget: str) -> Tuple[float, int]:
+    """
+    Rate and burst of a budget, as shares of the configured totals.
+    
+    Args:
+        settings: Application settings
+        budget: BULK or INTERACTIVE
+    
+    Returns:
+        (requests per second, burst size)
+    
+    Raises:
+        ValueError: If the interactive share leaves nothing for syncs
+    """
+    rate = settings.yfinance_interactive_rate_limit
+    burst = settings.yfinance_interactive_burst
+    bulk_rate = settings.yfinance_rate_limit - rate
+    bulk_burst = settings.yfinance_burst - burst
+    if bulk_rate <= 0 or bulk_burst <= 0:
+        raise ValueError(
+            "yfinance_interactive_rate_limit and yfinance_interactive_burst "
+            "must be below yfinance_rate_limit and yfinance_burst"
+        )
+    if budget == INTERACTIVE:
+        return rate, burst
+    return bulk_rate, bulk_burst
+
+
+async def get_rate_limiter(budget: str = BULK):
+    """
+    Get the Yahoo Finance rate limiter for a budget.
+    
+    Uses a Redis-backed bucket when ``yfinance_rate_limit_backend`` is
+    ``redis``. While Redis cannot be reached an in-process bucket is
+    returned and Redis is tried again every ``REDIS_RETRY_INTERVAL``
+    seconds, so workers go back to sharing one limit once it is up.
+    
+    Args:
+        budget: BULK or INTERACTIVE
+    """
+    limiter = _rate_limiters.get(budget)
+    if limiter is not None:
+        return limiter
+    
+    settings = get_settings()
+    rate, burst = budget_limits(settings, budget)
+    if settings.yfinance_rate_limit_backend != "redis":
+        limiter = _rate_limiters[budget] = TokenBucket(rate, burst)
+        return limiter
+    
+    fallback = _local_fallbacks.get(budget)
+    if fallback is not None and time.monotonic() < fallback[0]:
+        return fallback[1]
+    
+    local = fallback[1] if fallback else TokenBucket(rate, burst)
+    # Callers arriving during the probe limit locally instead of probing too
+    _local_fallbacks[budget] = (time.monotonic() + REDIS_RETRY_INTERVAL, local)
+    try:
+        import redis.asyncio as redis
+        client = redis.from_url(settings.redis_url)
+        await client.ping()
+    except Exception as e:
+        logger.warning(f"Redis not available, using local rate limiter ({budget}): {e}")
+        return local
+    
+    key = "ratelimit:yfinance:interactive" if budget == INTERACTIVE else "ratelimit:yfinance"
+    limiter = _rate_limiters[budget] = RedisTokenBucket(client, key, rate, burst)
+    _local_fallbacks.pop(budget, None)
+    logger.info(f"Using Redis rate limiter for Yahoo Finance ({budget})")
+    return limiter
@@ -0,0 +1,151 @@
+"""
+Priority tiers for quote refreshes.
+
+Symbols are ranked by request demand, index weight and top-50 ETF
+membership, then split into a hot tier refreshed every minute, a warm
+tier and a long tail refreshed hourly. The Yahoo request budget goes
+where users are looking.
+"""
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.models import ETF, IndexComponent
+from app.services.demand_tracker import get_demand_tracker
+from app.services.quote_store import load_type_map
+
+logger = logging.getLogger(__name__)
+
+TIERS = ("hot", "warm", "tail")
+
+# Score contributions. Demand is log-scaled so a burst of traffic on one
+# page cannot push everything else out of the hot tier; index weights
+# are percentages (e.g. ~7 for the largest S&P 500 names).
+DEMAND_FACTOR = 2.0
+INDEX_WEIGHT_FACTOR = 1.0
+TOP50_BONUS = 3.0
+
+
+@dataclass
+class RefreshPlan:
+    """Symbols per tier, highest priority first."""
+    tiers: Dict[str, List[str]]
+    scores: Dict[str, float] = field(default_factory=dict)
+
+
+def tier_intervals() -> Dict[str, int]:
+    """Refresh interval in seconds for each tier."""
+    settings = get_settings()
+    return {
+        "hot": settings.refresh_hot_interval,
+        "warm": settings.refresh_warm_interval,
+        "tail": settings.refresh_tail_interval,
+    }
+
+
+async def build_plan(db: AsyncSession) -> RefreshPlan:
+    """
+    Rank every symbol and split the ranking into tiers.
+    
+    Args:
+        db: Database session
+    
+    Returns:
+        RefreshPlan covering every stock and ETF
+    """
+    settings = get_settings()
+    type_map = await load_type_map(db)
+    demand = await get_demand_tracker().scores()
+    
+    weights = dict((await db.execute(
+        select(IndexComponent.stock_symbol, func.sum(IndexComponent.weight))
+        .group_by(IndexComponent.stock_symbol)
+    )).all())
+    
+    # Same selection as /etfs/top50
+    top50 = set((await db.execute(
+        select(ETF.symbol).where(ETF.is_active == True).order_by(ETF.id).limit(50)
+    )).scalars())
+    
+    scores = {}
+    for symbol in type_map:
+        score = DEMAND_FACTOR * math.log1p(demand.get(symbol, 0.0))
+        score += INDEX_WEIGHT_FACTOR * float(weights.get(symbol) or 0)
+        if symbol in top50:
+            score += TOP50_BONUS
+        scores[symbol] = score
+    
+    # Ties (e.g. symbols with no signal at all) fall back to symbol order
+    ranked = sorted(scores, key=lambda s: (-scores[s], s))
+    hot_end = settings.refresh_hot_size
+    warm_end = hot_end + settings.refresh_warm_size
+    
+    return RefreshPlan(
+        tiers={
+            "hot": ranked[:hot_end],
+            "warm": ranked[hot_end:warm_end],
+            "tail": ranked[warm_end:],
+        },
+        scores=scores,
+    )
+
+
+class RefreshPlanner:
+    """
+    Tracks when each tier was last refreshed.
+    
+    Timestamps are per process; only the scheduler leader (see
+    app.jobs.scheduler) ticks, so they are not repeated per worker.
+    """
+    
+    def __init__(self):
+        self._last_refresh: Dict[str, float] = {}
+    
+    def due_tiers(self) -> List[str]:
+        """Tiers whose refresh interval has elapsed."""
+        now = time.monotonic()
+        intervals = tier_intervals()
+        return [
+            tier for tier in TIERS
+            if now - self._last_refresh.get(tier, float("-inf")) >= intervals[tier]
+        ]
+    
+    async def due_symbols(self, db: AsyncSession) -> Tuple[List[str], List[str]]:
+        """
+        Symbols to refresh now.
+        
+        Returns:
+            (due tiers, their symbols); call ``mark_refreshed`` with the
+            tiers once the refresh has been started
+        """
+        tiers = self.due_tiers()
+        if not tiers:
+            return [], []
+        
+        plan = await build_plan(db)
+        symbols = [s for tier in tiers for s in plan.tiers[tier]]
+        return tiers, symbols
+    
+    def mark_refreshed(self, tiers: List[str]):
+        """Record that the given tiers were just refreshed."""
+        now = time.monotonic()
+        for tier in tiers:
+            self._last_refresh[tier] = now
+
+
+# Singleton instance
+_refresh_planner: Optional[RefreshPlanner] = None
+
+
+def get_refresh_planner() -> RefreshPlanner:
+    """Get refresh planner singleton."""
+    global _refresh_planner
+    if _refresh_planner is None:
+        _refresh_planner = RefreshPlanner()
+    return _refresh_planner
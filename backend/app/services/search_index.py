@@ -0,0 +1,341 @@
+"""
+In-process symbol search.
+
+Stocks and ETFs are indexed by symbol, English name and Thai name.
+Short queries (one or two characters) match the start of the symbol or
+of a name word; longer ones also match anywhere in a name, through a
+trigram index. Results are ranked as exact symbol, symbol prefix, name
+word prefix and then substring. Within each group, larger companies and
+funds (by market cap or AUM) come first.
+
+The whole catalog is a few hundred entries, so a query takes
+microseconds and needs neither the database nor Redis. The index is
+rebuilt in full when the catalog tag generation changes or every few
+minutes, which also keeps the market-cap ordering current. One request
+rebuilds while the others keep searching the previous index. Only
+stocks created on the detail path are added incrementally, so they are
+searchable before the next rebuild.
+"""
+import asyncio
+import bisect
+import re
+import time
+import unicodedata
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+import logging
+
+from sqlalchemy import select
+
+from app.database import get_session_maker
+from app.models import ETF, LatestQuote, Stock
+from app.services.cache import get_cache_service, TAG_CATALOG
+
+logger = logging.getLogger(__name__)
+
+NGRAM = 3
+
+# Seconds between rebuilds even if the catalog generation is unchanged
+RELOAD_INTERVAL = 300
+
+# Seconds before a failed rebuild is tried again
+RETRY_DELAY = 30
+
+# Rank groups, best first
+EXACT, SYMBOL_PREFIX, WORD_PREFIX, SUBSTRING = range(4)
+
+_WORD_SPLIT = re.compile(r"[\s,.()&/\-]+")
+
+
+def normalize(text: Optional[str]) -> str:
+    """Case- and width-insensitive form used for matching."""
+    if not text:
+        return ""
+    return unicodedata.normalize("NFKC", text).casefold().strip()
+
+
+def _grams(text: str) -> Set[str]:
+    return {text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+
+@dataclass
+class SearchEntry:
+    """One searchable stock or ETF."""
+    symbol: str
+    type: str  # 'stock' or 'etf'
+    name: str
+    name_th: Optional[str] = None
+    group: Optional[str] = None  # sector for stocks, category for ETFs
+    popularity: float = 0.0  # market cap or AUM
+    
+    def texts(self) -> Tuple[str, ...]:
+        return tuple(t for t in (normalize(self.name), normalize(self.name_th)) if t)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        group_field = "sector" if self.type == "stock" else "category"
+        return {
+            "symbol": self.symbol,
+            "name": self.name,
+            "name_th": self.name_th,
+            group_field: self.group,
+            "type": self.type,
+        }
+
+
+class SearchIndex:
+    """Prefix and trigram index over a set of entries."""
+    
+    def __init__(self, entries: Iterable[SearchEntry] = ()):
+        self._entries: Dict[str, SearchEntry] = {}
+        # gram -> symbols whose symbol or names contain it
+        self._grams: Dict[str, Set[str]] = defaultdict(set)
+        # Sorted (word, symbol) pairs for prefix lookups
+        self._words: List[Tuple[str, str]] = []
+        for entry in entries:
+            self.add(entry)
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    @staticmethod
+    def _terms(entry: SearchEntry) -> Tuple[Set[str], Set[str]]:
+        """(trigrams, words) indexed for an entry."""
+        texts = (normalize(entry.symbol),) + entry.texts()
+        grams: Set[str] = set()
+        words: Set[str] = {normalize(entry.symbol)}
+        for text in texts:
+            grams |= _grams(text)
+            words.update(w for w in _WORD_SPLIT.split(text) if w)
+        return grams, words
+    
+    def add(self, entry: SearchEntry):
+        """Add an entry, replacing any entry with the same symbol."""
+        self.remove(entry.symbol)
+        self._entries[entry.symbol] = entry
+        grams, words = self._terms(entry)
+        for gram in grams:
+            self._grams[gram].add(entry.symbol)
+        for word in words:
+            bisect.insort(self._words, (word, entry.symbol))
+    
+    def remove(self, symbol: str):
+        """Remove an entry if present."""
+        entry = self._entries.pop(symbol, None)
+        if entry is None:
+            return
+        grams, words = self._terms(entry)
+        for gram in grams:
+            postings = self._grams.get(gram)
+            if postings is not None:
+                postings.discard(symbol)
+                if not postings:
+                    del self._grams[gram]
+        for word in words:
+            i = bisect.bisect_left(self._words, (word, symbol))
+            if i < len(self._words) and self._words[i] == (word, symbol):
+                del self._words[i]
+    
+    def _prefix_matches(self, query: str) -> Set[str]:
+        matches = set()
+        i = bisect.bisect_left(self._words, (query, ""))
+        while i < len(self._words) and self._words[i][0].startswith(query):
+            matches.add(self._words[i][1])
+            i += 1
+        return matches
+    
+    def _substring_candidates(self, query: str) -> Set[str]:
+        postings = sorted((self._grams.get(g, set()) for g in _grams(query)), key=len)
+        if not postings:
+            return set()
+        candidates = set(postings[0])
+        for other in postings[1:]:
+            candidates &= other
+            if not candidates:
+                break
+        return candidates
+    
+    def _rank(self, entry: SearchEntry, query: str) -> Optional[int]:
+        symbol = normalize(entry.symbol)
+        if symbol == query:
+            return EXACT
+        if symbol.startswith(query):
+            return SYMBOL_PREFIX
+        texts = entry.texts()
+        if any(
+            w.startswith(query)
+            for text in texts for w in _WORD_SPLIT.split(text)
+        ) or any(text.startswith(query) for text in texts):
+            return WORD_PREFIX
+        if len(query) >= NGRAM and (
+            query in symbol or any(query in text for text in texts)
+        ):
+            return SUBSTRING
+        return None
+    
+    def search(
+        self,
+        query: str,
+        types: Iterable[str] = ("stock", "etf"),
+        limit: int = 20
+    ) -> Dict[str, List[SearchEntry]]:
+        """
+        Best matches per type.
+        
+        Args:
+            query: Free text (symbol or name, English or Thai)
+            types: Entry types to return
+            limit: Maximum results per type
+        
+        Returns:
+            Type to ranked entries
+        """
+        query = normalize(query)
+        results: Dict[str, List[Tuple[Any, ...]]] = {t: [] for t in types}
+        if not query:
+            return {t: [] for t in results}
+        
+        candidates = self._prefix_matches(query)
+        if len(query) >= NGRAM:
+            candidates |= self._substring_candidates(query)
+        
+        for symbol in candidates:
+            entry = self._entries[symbol]
+            if entry.type not in results:
+                continue
+            rank = self._rank(entry, query)
+            if rank is not None:
+                results[entry.type].append((rank, -entry.popularity, entry.symbol, entry))
+        
+        return {
+            t: [row[-1] for row in sorted(rows, key=lambda r: r[:3])[:limit]]
+            for t, rows in results.items()
+        }
+
+
+async def load_entries() -> List[SearchEntry]:
+    """Active stocks and ETFs with their market cap or AUM."""
+    session_maker = get_session_maker()
+    async with session_maker() as db:
+        stocks = (await db.execute(
+            select(Stock, LatestQuote.market_cap)
+            .outerjoin(LatestQuote, Stock.symbol == LatestQuote.symbol)
+            .where(Stock.is_active == True)
+        )).all()
+        etfs = (await db.execute(select(ETF).where(ETF.is_active == True))).scalars().all()
+    
+    entries = [stock_entry(stock, market_cap) for stock, market_cap in stocks]
+    entries += [
+        SearchEntry(
+            symbol=etf.symbol,
+            type="etf",
+            name=etf.name,
+            name_th=etf.name_th,
+            group=etf.category,
+            popularity=float(etf.aum or 0),
+        )
+        for etf in etfs
+    ]
+    return entries
+
+
+def stock_entry(stock: Stock, market_cap: Optional[int] = None) -> SearchEntry:
+    """Search entry for a stock row."""
+    return SearchEntry(
+        symbol=stock.symbol,
+        type="stock",
+        name=stock.name,
+        name_th=stock.name_th,
+        group=stock.sector,
+        popularity=float(market_cap or 0),
+    )
+
+
+class SymbolSearch:
+    """Search index kept in step with the catalog."""
+    
+    def __init__(self):
+        self._index = SearchIndex()
+        self._generation: Optional[int] = None
+        self._loaded_at = float("-inf")
+        self._retry_at = float("-inf")
+        self._lock = asyncio.Lock()
+    
+    def _is_current(self, generation: int) -> bool:
+        return (
+            generation == self._generation
+            and time.monotonic() - self._loaded_at < RELOAD_INTERVAL
+        ) or time.monotonic() < self._retry_at
+    
+    async def _refresh(self):
+        cache = await get_cache_service()
+        generation = await cache.generation(TAG_CATALOG)
+        if self._is_current(generation):
+            return
+        # One rebuild at a time; others keep searching the old index
+        if self._lock.locked() and self._generation is not None:
+            return
+        
+        async with self._lock:
+            # Rebuilt while this request waited for the lock
+            if self._is_current(generation):
+                return
+            try:
+                # Build aside and swap, so searches never see a partial index
+                index = SearchIndex(await load_entries())
+            except Exception:
+                self._retry_at = time.monotonic() + RETRY_DELAY
+                raise
+            self._index = index
+            self._generation = generation
+            self._loaded_at = time.monotonic()
+            logger.info(f"Search index built with {len(index)} entries")
+    
+    async def search(
+        self,
+        query: str,
+        type: str = "all",
+        limit: int = 20
+    ) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+        """
+        Search stocks and ETFs.
+        
+        Args:
+            query: Free text
+            type: 'all', 'stock' or 'etf'
+            limit: Maximum results per type
+        
+        Returns:
+            {"stocks": [...], "etfs": [...]} without quote fields, or
+            None if the index could never be built
+        """
+        try:
+            await self._refresh()
+        except Exception as e:
+            # Keep answering from the last built index
+            logger.warning(f"Could not rebuild search index: {e}")
+        if self._generation is None:
+            return None
+        
+        types = ("stock", "etf") if type == "all" else (type,)
+        found = self._index.search(query, types, limit)
+        return {
+            "stocks": [e.to_dict() for e in found.get("stock", [])],
+            "etfs": [e.to_dict() for e in found.get("etf", [])],
+        }
+    
+    def add(self, entry: SearchEntry):
+        """Add or update one entry in place."""
+        self._index.add(entry)
+
+
+# Singleton instance
+_symbol_search: Optional[SymbolSearch] = None
+
+
+def get_symbol_search() -> SymbolSearch:
+    """Get symbol search singleton."""
+    global _symbol_search
+    if _symbol_search is None:
+        _symbol_search = SymbolSearch()
+    return _symbol_search
@@ -0,0 +1,148 @@
+"""
+Byte encoding for cached values.
+
+Each payload starts with a one-byte header naming its codec and
+compression, so entries written under different settings stay readable.
+The header is always >= 0x80 and therefore never the first byte of a
+plain JSON document, which lets values written before headers existed
+be read as JSON.
+"""
+import json
+from typing import Any, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+HEADER_MARK = 0x80
+
+CODECS = {"json": 0, "orjson": 1, "msgpack": 2}
+COMPRESSIONS = {"none": 0, "zstd": 1, "lz4": 2}
+
+
+def _available(name: str) -> bool:
+    return {
+        "orjson": orjson is not None,
+        "msgpack": msgpack is not None,
+        "zstd": zstandard is not None,
+        "lz4": lz4_frame is not None,
+    }.get(name, True)
+
+
+class Serializer:
+    """
+    Encode values with a configurable codec and optional compression.
+    
+    Payloads of at least ``threshold`` bytes are compressed; smaller
+    ones are stored as-is, where compression costs more than it saves.
+    Unavailable codecs fall back to stdlib JSON and no compression.
+    """
+    
+    def __init__(
+        self,
+        codec: str = "orjson",
+        compression: str = "none",
+        threshold: int = 1024,
+        level: int = 3
+    ):
+        if codec not in CODECS:
+            raise ValueError(f"Unknown cache serializer: {codec}")
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown cache compression: {compression}")
+        
+        if not _available(codec):
+            logger.warning(f"{codec} is not installed; caching with stdlib json")
+            codec = "json"
+        if not _available(compression):
+            logger.warning(f"{compression} is not installed; caching uncompressed")
+            compression = "none"
+        
+        self.codec = codec
+        self.compression = compression
+        self.threshold = threshold
+        self.level = level
+        self._zstd_c = zstandard.ZstdCompressor(level=level) if compression == "zstd" else None
+        self._zstd_d = zstandard.ZstdDecompressor() if zstandard is not None else None
+    
+    def _encode(self, value: Any) -> bytes:
+        if self.codec == "orjson":
+            return orjson.dumps(value, default=str, option=orjson.OPT_NON_STR_KEYS)
+        if self.codec == "msgpack":
+            return msgpack.packb(value, default=str, use_bin_type=True)
+        return json.dumps(value, default=str, separators=(",", ":")).encode()
+    
+    def dumps(self, value: Any) -> bytes:
+        """Encode a value to header-prefixed bytes."""
+        body = self._encode(value)
+        
+        compression = "none"
+        if self.compression != "none" and len(body) >= self.threshold:
+            if self.compression == "zstd":
+                body = self._zstd_c.compress(body)
+            else:
+                body = lz4_frame.compress(body)
+            compression = self.compression
+        
+        header = HEADER_MARK | (CODECS[self.codec] << 2) | COMPRESSIONS[compression]
+        return bytes([header]) + body
+    
+    def loads(self, data: bytes) -> Any:
+        """Decode bytes written by ``dumps`` (or legacy plain JSON)."""
+        if isinstance(data, str):
+            data = data.encode()
+        if not data or data[0] < HEADER_MARK:
+            return json.loads(data)
+        
+        header = data[0]
+        codec = (header >> 2) & 0x07
+        compression = header & 0x03
+        body = data[1:]
+        
+        if compression == COMPRESSIONS["zstd"]:
+            body = self._zstd_d.decompress(body)
+        elif compression == COMPRESSIONS["lz4"]:
+            body = lz4_frame.decompress(body)
+        
+        if codec == CODECS["msgpack"]:
+            return msgpack.unpackb(body, raw=False)
+        if codec == CODECS["orjson"] and orjson is not None:
+            return orjson.loads(body)
+        # orjson output is plain JSON
+        return json.loads(body)
+
+
+# Singleton instance
+_serializer: Optional[Serializer] = None
+
+
+def get_serializer() -> Serializer:
+    """Get cache serializer singleton."""
+    global _serializer
+    if _serializer is None:
+        from app.config import get_settings
+        settings = get_settings()
+        _serializer = Serializer(
+            codec=settings.cache_serializer,
+            compression=settings.cache_compression,
+            threshold=settings.cache_compression_threshold,
+        )
+    return _serializer
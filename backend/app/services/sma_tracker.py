@@ -0,0 +1,194 @@
+"""
+Rolling moving-average state for incremental quote updates.
+"""
+from collections import deque
+from datetime import date, timedelta
+from itertools import islice
+from typing import Deque, Dict, Iterable, List, NamedTuple, Optional
+import logging
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import StockPrice, ETFPrice
+
+logger = logging.getLogger(__name__)
+
+# Trading days kept per symbol (52 weeks)
+WINDOW_DAYS = 252
+
+# A window whose last bar is older than this needs a full reload
+MAX_GAP_DAYS = 7
+
+
+class Bar(NamedTuple):
+    """One daily OHLCV bar."""
+    date: date
+    open: Optional[float]
+    high: Optional[float]
+    low: Optional[float]
+    close: float
+    volume: Optional[int]
+
+
+class RollingWindow:
+    """
+    Last 52 weeks of daily bars for one symbol.
+    
+    Running sums over the last 50 and 200 closes are kept alongside the
+    bars, so adding or revising the newest bar updates both SMAs in O(1).
+    """
+    
+    def __init__(self):
+        self.bars: Deque[Bar] = deque(maxlen=WINDOW_DAYS)
+        self._sum_50 = 0.0
+        self._sum_200 = 0.0
+    
+    def update(self, bar: Bar):
+        """
+        Add the newest bar, or revise it if the date is already present.
+        
+        Bars older than the newest one are ignored.
+        """
+        if self.bars:
+            last = self.bars[-1]
+            if bar.date < last.date:
+                return
+            if bar.date == last.date:
+                # Intraday refresh of today's bar
+                diff = bar.close - last.close
+                self.bars[-1] = bar
+                self._sum_50 += diff
+                self._sum_200 += diff
+                return
+        
+        self.bars.append(bar)
+        self._sum_50 += bar.close
+        self._sum_200 += bar.close
+        
+        n = len(self.bars)
+        if n > 50:
+            self._sum_50 -= self.bars[-51].close
+        if n > 200:
+            self._sum_200 -= self.bars[-201].close
+    
+    @property
+    def last_date(self) -> Optional[date]:
+        return self.bars[-1].date if self.bars else None
+    
+    @property
+    def sma_50(self) -> Optional[float]:
+        return self._sum_50 / 50 if len(self.bars) >= 50 else None
+    
+    @property
+    def sma_200(self) -> Optional[float]:
+        return self._sum_200 / 200 if len(self.bars) >= 200 else None
+    
+    @property
+    def week_52_high(self) -> Optional[float]:
+        highs = [b.high for b in self.bars if b.high is not None]
+        return max(highs) if highs else None
+    
+    @property
+    def week_52_low(self) -> Optional[float]:
+        lows = [b.low for b in self.bars if b.low is not None]
+        return min(lows) if lows else None
+    
+    @property
+    def avg_volume_10d(self) -> Optional[int]:
+        volumes = [b.volume for b in islice(reversed(self.bars), 10) if b.volume is not None]
+        return int(sum(volumes) / len(volumes)) if volumes else None
+
+
+class SMATracker:
+    """Rolling windows for every symbol seen by the price sync."""
+    
+    def __init__(self):
+        self._windows: Dict[str, RollingWindow] = {}
+    
+    def get(self, symbol: str) -> Optional[RollingWindow]:
+        """Get the window for a symbol, if one is loaded."""
+        return self._windows.get(symbol.upper())
+    
+    def is_current(self, symbol: str) -> bool:
+        """
+        Check whether a symbol only needs its newest bars fetched.
+        
+        True when the window holds a bar from the last ``MAX_GAP_DAYS``
+        days, so a short download cannot leave a hole in the series.
+        """
+        window = self.get(symbol)
+        if window is None or window.last_date is None:
+            return False
+        return window.last_date >= date.today() - timedelta(days=MAX_GAP_DAYS)
+    
+    def seed(self, symbol: str, bars: Iterable[Bar]) -> RollingWindow:
+        """Replace a symbol's window with the given bars (oldest first)."""
+        window = RollingWindow()
+        for bar in bars:
+            window.update(bar)
+        self._windows[symbol.upper()] = window
+        return window
+    
+    def update(self, symbol: str, bars: Iterable[Bar]) -> RollingWindow:
+        """Feed new bars (oldest first) into a symbol's window."""
+        window = self._windows.get(symbol.upper())
+        if window is None:
+            return self.seed(symbol, bars)
+        for bar in bars:
+            window.update(bar)
+        return window
+    
+    async def load_from_db(self, db: AsyncSession, type_map: Dict[str, str]):
+        """
+        Seed windows from the stock_prices and etf_prices tables.
+        
+        Args:
+            db: Database session
+            type_map: Symbol to symbol type ('stock' or 'etf')
+        """
+        cutoff = date.today() - timedelta(days=380)
+        
+        for model, symbol_type in ((StockPrice, "stock"), (ETFPrice, "etf")):
+            symbols = [s for s, t in type_map.items() if t == symbol_type]
+            if not symbols:
+                continue
+            
+            result = await db.execute(
+                select(
+                    model.symbol, model.date, model.open, model.high,
+                    model.low, model.close, model.volume,
+                )
+                .where(model.symbol.in_(symbols))
+                .where(model.date >= cutoff)
+                .where(model.close.isnot(None))
+                .order_by(model.symbol, model.date)
+            )
+            
+            grouped: Dict[str, List[Bar]] = {}
+            for sym, day, open_, high, low, close, volume in result.all():
+                grouped.setdefault(sym, []).append(Bar(
+                    day,
+                    float(open_) if open_ is not None else None,
+                    float(high) if high is not None else None,
+                    float(low) if low is not None else None,
+                    float(close),
+                    volume,
+                ))
+            
+            for sym, bars in grouped.items():
+                self.seed(sym, bars)
+            
+            logger.info(f"Loaded {len(grouped)} {symbol_type} price windows from database")
+
+
+# Singleton instance
+_sma_tracker: Optional[SMATracker] = None
+
+
+def get_sma_tracker() -> SMATracker:
+    """Get SMA tracker singleton."""
+    global _sma_tracker
+    if _sma_tracker is None:
+        _sma_tracker = SMATracker()
+    return _sma_tracker
@@ -0,0 +1,129 @@
+"""
+Known symbols and negative caching of unknown ones.
+
+Endpoints that may fall back to Yahoo for a symbol missing from the
+database check it here first. Malformed symbols are rejected outright.
+Symbols in the catalog (stocks and ETFs) pass straight through. Other
+symbols get one upstream lookup, and a failed lookup is remembered for a
+short while, so a crawler or a typo loop cannot spend the Yahoo budget.
+
+The catalog is a few hundred symbols, so it is held as an in-process
+set. Lookups are exact, unlike a Bloom filter, and the set is reloaded
+whenever the catalog tag generation changes.
+"""
+import asyncio
+import re
+import time
+from typing import FrozenSet, Optional
+import logging
+
+from fastapi import HTTPException
+
+from app.database import get_session_maker
+from app.services.cache import get_cache_service, missing_key, TAG_CATALOG
+from app.services.quote_store import load_type_map
+
+logger = logging.getLogger(__name__)
+
+# Ticker format: a letter, then letters, digits, '.' or '-' (BRK.B, BF-B),
+# at most 10 characters as stored in the symbol columns
+SYMBOL_PATTERN = re.compile(r"^[A-Z][A-Z0-9.\-]{0,9}$")
+
+# Seconds between reloads even if the catalog generation is unchanged
+RELOAD_INTERVAL = 600
+
+
+def is_valid_symbol(symbol: str) -> bool:
+    """Whether a (normalised, upper-case) symbol is well formed."""
+    return bool(SYMBOL_PATTERN.match(symbol))
+
+
+class SymbolRegistry:
+    """In-process set of catalog symbols."""
+    
+    def __init__(self):
+        self._symbols: FrozenSet[str] = frozenset()
+        self._generation: Optional[int] = None
+        self._loaded_at = float("-inf")
+        self._lock = asyncio.Lock()
+    
+    def _is_current(self, generation: int) -> bool:
+        return (
+            generation == self._generation
+            and time.monotonic() - self._loaded_at < RELOAD_INTERVAL
+        )
+    
+    async def _refresh(self):
+        cache = await get_cache_service()
+        generation = await cache.generation(TAG_CATALOG)
+        if self._is_current(generation):
+            return
+        
+        # One reload at a time; requests that waited use its result
+        async with self._lock:
+            if self._is_current(generation):
+                return
+            session_maker = get_session_maker()
+            async with session_maker() as db:
+                self._symbols = frozenset(await load_type_map(db))
+            self._generation = generation
+            self._loaded_at = time.monotonic()
+            logger.debug(f"Loaded {len(self._symbols)} known symbols")
+    
+    async def is_known(self, symbol: str) -> bool:
+        """Whether a symbol is in the catalog."""
+        try:
+            await self._refresh()
+        except Exception as e:
+            # Keep answering from the last loaded set
+            logger.warning(f"Could not reload known symbols: {e}")
+        return symbol in self._symbols
+    
+    def add(self, symbol: str):
+        """Record a symbol added to the catalog by this process."""
+        self._symbols = self._symbols | {symbol}
+
+
+# Singleton instance
+_symbol_registry: Optional[SymbolRegistry] = None
+
+
+def get_symbol_registry() -> SymbolRegistry:
+    """Get symbol registry singleton."""
+    global _symbol_registry
+    if _symbol_registry is None:
+        _symbol_registry = SymbolRegistry()
+    return _symbol_registry
+
+
+async def check_symbol(symbol: str, resource: str = "Symbol") -> bool:
+    """
+    Reject symbols that must not reach the database or Yahoo.
+    
+    Args:
+        symbol: Upper-case symbol from the request path
+        resource: Name used in the 404 message
+    
+    Returns:
+        True if the symbol is in the catalog, False if it is unknown but
+        may be looked up upstream
+    
+    Raises:
+        HTTPException: 404 for malformed symbols and recent failed lookups
+    """
+    if not is_valid_symbol(symbol):
+        raise HTTPException(status_code=404, detail=f"{resource} '{symbol}' not found")
+    
+    if await get_symbol_registry().is_known(symbol):
+        return True
+    
+    cache = await get_cache_service()
+    if await cache.get(missing_key(symbol)) is not None:
+        raise HTTPException(status_code=404, detail=f"{resource} '{symbol}' not found")
+    return False
+
+
+async def remember_missing(symbol: str):
+    """Remember for a while that an upstream lookup found nothing."""
+    cache = await get_cache_service()
+    await cache.set(missing_key(symbol), True, 'missing')
@@ -0,0 +1,502 @@
+"""
+Cached response builders shared by the API endpoints and the cache
+warm-up (app.jobs.warmup).
+
+Each builder produces exactly what its endpoint caches, under the same
+key, so a warmed entry is indistinguishable from one filled by a request.
+"""
+import asyncio
+from typing import Any, Dict, List, Optional, Union
+
+import orjson
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_session_maker
+from app.models import Analysis, ETF, IndexComponentView, LatestQuote, Stock
+from app.services.cache import (
+    CacheService,
+    get_cache_service,
+    count_key,
+    history_key,
+    index_components_key,
+    quote_key,
+    stock_key,
+    stock_page_key,
+    top50_key,
+    TAG_PRICES,
+    TAG_CATALOG,
+    TAG_HISTORY,
+)
+from app.services.enrichment import get_enrichment_queue, needs_enrichment
+from app.services.price_archive import get_price_archive, to_columns, to_rows
+from app.services.price_history import covers_period, get_history as get_price_history
+from app.services.quote_cache import overlay_quotes
+from app.services.quote_store import fundamentals_quote, quote_to_dict, save_quotes
+from app.services.search_index import get_symbol_search, stock_entry
+from app.services.symbol_registry import get_symbol_registry, remember_missing
+from app.services.yahoo_finance import get_yahoo_service
+from app.utils.pagination import (
+    cached_total,
+    decode_cursor,
+    encode_cursor,
+    keyset_after,
+    order_by_keyset,
+    page_meta,
+    to_decimal,
+)
+from app.utils.text_search import text_filter
+
+# Component sort parameter -> index_component_views column
+COMPONENT_SORTS = {
+    "weight": IndexComponentView.weight,
+    "name": IndexComponentView.name,
+    "change": IndexComponentView.change_percent,
+    "trend": IndexComponentView.trend,
+}
+NUMERIC_SORTS = {"weight", "change"}
+
+# History periods served from the on-disk price archive
+ARCHIVE_PERIODS = {"2y", "5y", "max"}
+
+HISTORY_FIELDS = ("date", "open", "high", "low", "close", "volume")
+
+# Index components page shown by default
+DEFAULT_COMPONENTS_PAGE = {
+    "per_page": 50,
+    "sector": None,
+    "sort": "weight",
+    "order": "desc",
+    "search": None,
+}
+
+
+def stock_to_dict(stock: Stock) -> Dict[str, Any]:
+    """Stock detail as served by GET /stocks/{symbol}."""
+    return {
+        "symbol": stock.symbol,
+        "name": stock.name,
+        "name_th": stock.name_th,
+        "sector": stock.sector,
+        "industry": stock.industry,
+        "description": stock.description,
+        "description_th": stock.description_th,
+        "logo_url": stock.logo_url or f"https://logo.clearbit.com/{stock.website.replace('https://', '').replace('http://', '').split('/')[0]}" if stock.website else None,
+        "website": stock.website,
+        "ceo": stock.ceo,
+        "employees": stock.employees,
+        "headquarters": stock.headquarters,
+        "founded_year": stock.founded_year,
+        "exchange": stock.exchange,
+        "country": stock.country,
+    }
+
+
+async def create_stock(db: AsyncSession, symbol: str) -> Optional[Stock]:
+    """
+    Add a stock that is not in the database yet from Yahoo Finance.
+    
+    The profile goes into ``stocks`` and the fundamentals of the same
+    lookup into its LatestQuote row; prices follow with the next sync.
+    
+    Args:
+        db: Database session
+        symbol: Stock symbol (upper case)
+    
+    Returns:
+        The new stock, or None if Yahoo does not know the symbol
+    """
+    info = await get_yahoo_service().get_stock_info(symbol)
+    if not info:
+        await remember_missing(symbol)
+        return None
+    
+    fundamentals = info.pop('fundamentals', {})
+    stock = Stock(**info)
+    db.add(stock)
+    await save_quotes(db, [fundamentals_quote(symbol, fundamentals)], {symbol: "stock"})
+    await db.commit()
+    await db.refresh(stock)
+    
+    get_symbol_registry().add(symbol)
+    get_symbol_search().add(stock_entry(stock))
+    await (await get_cache_service()).bump(TAG_CATALOG)
+    return stock
+
+
+async def load_top50(db: AsyncSession) -> List[Dict[str, Any]]:
+    """Top 50 ETFs without quote fields."""
+    result = await db.execute(
+        select(ETF)
+        .where(ETF.is_active == True)
+        .order_by(ETF.id)
+        .limit(50)
+    )
+    
+    etfs = []
+    for etf in result.scalars():
+        etfs.append({
+            "symbol": etf.symbol,
+            "name": etf.name,
+            "name_th": etf.name_th,
+            "category": etf.category,
+            "provider": etf.provider,
+            "expense_ratio": float(etf.expense_ratio) if etf.expense_ratio else None,
+            "aum": etf.aum,
+        })
+    return etfs
+
+
+async def get_top50(db: AsyncSession) -> List[Dict[str, Any]]:
+    """
+    Top 50 ETFs with quote fields.
+    
+    The list itself only changes with the catalog; prices are filled
+    from the quote cache on every call.
+    """
+    cache = await get_cache_service()
+    cache_k = await cache.versioned_key(top50_key(), TAG_CATALOG)
+    etfs = await cache.get(cache_k)
+    
+    if etfs is None:
+        etfs = await load_top50(db)
+        await cache.set(cache_k, etfs, 'top50')
+    
+    return await overlay_quotes(etfs, db)
+
+
+def _sorts_by_quote(sort: str) -> bool:
+    # Pages sorted by price fields change whenever prices do; others are
+    # re-filled from the quote cache on every request
+    return sort in ("change", "trend")
+
+
+async def components_cache_key(
+    cache: CacheService,
+    symbol: str,
+    page: int,
+    per_page: int,
+    sector: Optional[str],
+    sort: str,
+    order: str,
+    search: Optional[str]
+) -> str:
+    """Cache key of one index components page."""
+    tags = (TAG_PRICES, TAG_CATALOG) if _sorts_by_quote(sort) else (TAG_CATALOG,)
+    return await cache.versioned_key(
+        f"{index_components_key(symbol)}:{page}:{per_page}:{sector}:{sort}:{order}:{search}",
+        *tags,
+    )
+
+
+def _components_filters(symbol: str, sector: Optional[str], search: Optional[str]) -> list:
+    view = IndexComponentView
+    filters = [view.index_symbol == symbol]
+    if sector:
+        filters.append(view.sector == sector)
+    search_filter = text_filter(search or "", view.stock_symbol, view.name, view.name_th)
+    if search_filter is not None:
+        filters.append(search_filter)
+    return filters
+
+
+async def components_total(symbol: str, sector: Optional[str], search: Optional[str]) -> int:
+    """Number of components matching the filters (cached)."""
+    cache = await get_cache_service()
+    key = await cache.versioned_key(
+        count_key("index_components", symbol, sector, search), TAG_CATALOG
+    )
+    query = select(IndexComponentView.id).where(*_components_filters(symbol, sector, search))
+    return await cached_total(key, query)
+
+
+async def load_components_page(
+    symbol: str,
+    page: int,
+    per_page: int,
+    sector: Optional[str],
+    sort: str,
+    order: str,
+    search: Optional[str],
+    cursor: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Build one index components page from index_component_views.
+    
+    Pages are selected with OFFSET, or with a keyset condition when a
+    ``cursor`` from a previous page is given. Either way the response
+    carries the cursor of the following page.
+    
+    Opens its own session, since it also runs as a background refresh.
+    """
+    view = IndexComponentView
+    sort_col = COMPONENT_SORTS[sort]
+    descending = order == "desc"
+    
+    query = (
+        select(view)
+        .where(*_components_filters(symbol, sector, search))
+        .order_by(*order_by_keyset(sort_col, view.stock_symbol, descending))
+        .limit(per_page)
+    )
+    if cursor is not None:
+        # Sort values are encoded as strings (Decimals too), NULL as None
+        sort_value, last_symbol = decode_cursor(cursor, (str, type(None)), str)
+        if sort in NUMERIC_SORTS:
+            sort_value = to_decimal(sort_value)
+        query = query.where(
+            keyset_after(sort_col, view.stock_symbol, sort_value, last_symbol, descending)
+        )
+    else:
+        query = query.offset((page - 1) * per_page)
+    
+    total = await components_total(symbol, sector, search)
+    
+    session_maker = get_session_maker()
+    async with session_maker() as db:
+        rows = list((await db.execute(query)).scalars())
+    
+    components = []
+    for row in rows:
+        components.append({
+            "symbol": row.stock_symbol,
+            "name": row.name,
+            "name_th": row.name_th,
+            "sector": row.sector,
+            "weight": float(row.weight) if row.weight else None,
+            "price": float(row.price) if row.price else None,
+            "change_percent": float(row.change_percent) if row.change_percent else None,
+            "trend": row.trend,
+        })
+    
+    next_cursor = None
+    if len(rows) == per_page:
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, sort_col.key), last.stock_symbol)
+    
+    return {
+        "success": True,
+        "data": components,
+        "meta": page_meta(
+            total, per_page,
+            page=None if cursor is not None else page,
+            next_cursor=next_cursor,
+        ),
+    }
+
+
+async def get_components_page(
+    symbol: str,
+    page: int,
+    per_page: int,
+    sector: Optional[str],
+    sort: str,
+    order: str,
+    search: Optional[str],
+    cursor: Optional[str] = None,
+    with_quotes: bool = True
+) -> Dict[str, Any]:
+    """
+    One index components page.
+    
+    Numbered pages are cached and served stale while a background
+    refresh runs; cursor pages are cheap indexed reads and are not.
+    
+    Args:
+        symbol: Index symbol
+        page, per_page, sector, sort, order, search: Page parameters
+        cursor: ``meta.next_cursor`` of the previous page (overrides page)
+        with_quotes: Fill quote fields from the quote cache
+    
+    Returns:
+        Response body of GET /indices/{symbol}/components
+    """
+    args = (symbol, page, per_page, sector, sort, order, search)
+    if cursor is not None:
+        response = await load_components_page(*args, cursor=cursor)
+    else:
+        cache = await get_cache_service()
+        cache_key = await components_cache_key(cache, *args)
+        # Quote-sorted pages expire quickly: quote tier ticks re-sort them
+        # without bumping the prices tag
+        cache_type = 'components_by_quote' if _sorts_by_quote(sort) else 'index_components'
+        response = await cache.get_or_load(
+            cache_key, lambda: load_components_page(*args), cache_type
+        )
+    if not with_quotes:
+        return response
+    return {**response, "data": await overlay_quotes(response["data"])}
+
+
+def analysis_to_dict(analysis: Analysis) -> Dict[str, Any]:
+    """Published analysis as served by the analysis endpoints."""
+    return {
+        "id": analysis.id,
+        "title": analysis.title,
+        "title_th": analysis.title_th,
+        "summary_th": analysis.summary_th,
+        "content_th": analysis.content_th,
+        "trend_opinion": analysis.trend_opinion,
+        "target_price": float(analysis.target_price) if analysis.target_price else None,
+        "author": analysis.author,
+        "published_at": analysis.published_at.isoformat() if analysis.published_at else None,
+    }
+
+
+async def load_history(
+    db: AsyncSession,
+    symbol: str,
+    symbol_type: str,
+    period: str,
+    format: str = "rows"
+) -> Union[List[Dict[str, Any]], Dict[str, List[Any]]]:
+    """
+    Daily bars for a symbol, oldest first.
+    
+    Long ranges are sliced from the memory-mapped archive; others are
+    read from the price tables. Either source is used only if it reaches
+    back to the start of the period, so symbols that have not been
+    backfilled are fetched from Yahoo Finance instead.
+    
+    Args:
+        format: 'rows' (one object per day) or 'columns' (one list per
+            field in HISTORY_FIELDS)
+    """
+    if period in ARCHIVE_PERIODS:
+        records = get_price_archive().read(symbol, period)
+        if records is not None:
+            return to_columns(records) if format == "columns" else to_rows(records)
+    
+    history = await get_price_history(db, symbol, symbol_type, period)
+    if not covers_period(history, period):
+        yf_service = get_yahoo_service()
+        # If Yahoo has nothing either, serve what is stored
+        history = await yf_service.get_history(symbol, period) or history
+    if format == "columns":
+        return {f: [row[f] for row in history] for f in HISTORY_FIELDS}
+    return history
+
+
+async def build_stock_page(
+    symbol: str,
+    period: str = "1y",
+    create: bool = False
+) -> Optional[Dict[str, Any]]:
+    """
+    Everything the stock detail page shows, in one payload.
+    
+    Profile, quote and history are looked up in one MGET. Profile,
+    quote and the latest published analysis are then read in a single
+    query, since the analysis is not cached on its own; its row also
+    fills any profile or quote cache miss. History needs a second query
+    only when it was not cached.
+    
+    Args:
+        symbol: Stock symbol (upper case)
+        period: History window, or 'none' to leave history out
+        create: Add the stock from Yahoo Finance if it is not stored
+    
+    Returns:
+        Page data, or None if the stock is unknown
+    """
+    with_history = period != "none"
+    cache = await get_cache_service()
+    keys = {"profile": stock_key(symbol), "quote": quote_key(symbol)}
+    # Archive reads are already cheap and too large to cache
+    if with_history and period not in ARCHIVE_PERIODS:
+        keys["history"] = await cache.versioned_key(history_key(symbol, period), TAG_HISTORY)
+    
+    cached = await cache.get_many(keys.values())
+    parts = {name: cached.get(key) for name, key in keys.items()}
+    
+    latest_analysis = (
+        select(Analysis.id)
+        .where(Analysis.symbol == symbol)
+        .where(Analysis.symbol_type == "stock")
+        .where(Analysis.status == "published")
+        .order_by(Analysis.published_at.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    query = (
+        select(Stock, LatestQuote, Analysis)
+        .outerjoin(LatestQuote, LatestQuote.symbol == Stock.symbol)
+        .outerjoin(Analysis, Analysis.id == latest_analysis)
+        .where(Stock.symbol == symbol)
+    )
+    
+    session_maker = get_session_maker()
+    async with session_maker() as db:
+        row = (await db.execute(query)).first()
+        if row is not None:
+            stock, quote, analysis = row
+        elif create:
+            stock = await create_stock(db, symbol)
+            if stock is None:
+                return None
+            quote = analysis = None
+        else:
+            return None
+        
+        history = parts.get("history")
+        if history is None and with_history:
+            history = await load_history(db, symbol, "stock", period)
+    
+    fills = []
+    if parts["profile"] is None:
+        parts["profile"] = stock_to_dict(stock)
+        fills.append(cache.set(keys["profile"], parts["profile"], 'stock'))
+        # Enrichment drops the cached profile once it has filled it in
+        if needs_enrichment(stock):
+            get_enrichment_queue().enqueue(symbol)
+    # Stocks added on request have no price until the next sync
+    if parts["quote"] is None and quote is not None and quote.price is not None:
+        parts["quote"] = quote_to_dict(quote)
+        fills.append(cache.set(keys["quote"], parts["quote"], 'quote'))
+    if "history" in keys and parts.get("history") is None and history:
+        fills.append(cache.set(keys["history"], history, 'history'))
+    await asyncio.gather(*fills)
+    
+    return {
+        "profile": parts["profile"],
+        "quote": parts["quote"],
+        "analysis": analysis_to_dict(analysis) if analysis else None,
+        "history": {"period": period, "data": history} if with_history else None,
+    }
+
+
+async def get_stock_page_body(
+    symbol: str,
+    period: str = "1y",
+    create: bool = False
+) -> Optional[str]:
+    """
+    Encoded body of GET /stocks/{symbol}/page.
+    
+    The JSON text is cached, so repeat views within a minute skip the
+    query and the encoding. The key is versioned with the prices,
+    history and catalog tags; profile and analysis edits show up when
+    the entry expires.
+    
+    Args:
+        symbol: Stock symbol (upper case)
+        period: History window, or 'none' to leave history out
+        create: Add the stock from Yahoo Finance if it is not stored
+    
+    Returns:
+        JSON response body, or None if the stock is unknown
+    """
+    async def load() -> Optional[str]:
+        data = await build_stock_page(symbol, period, create)
+        if data is None:
+            return None
+        return orjson.dumps(
+            {"success": True, "data": data},
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY,
+        ).decode()
+    
+    cache = await get_cache_service()
+    key = await cache.versioned_key(
+        stock_page_key(symbol, period), TAG_PRICES, TAG_HISTORY, TAG_CATALOG
+    )
+    return await cache.get_or_load(key, load, 'stock_page')
@@ -2,15 +2,18 @@
 Yahoo Finance service for fetching stock and ETF data.
 """
 import asyncio
-from datetime import datetime, timedelta
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from decimal import Decimal
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Tuple, Any
 import logging
 
 import yfinance as yf
 import pandas as pd
 
 from app.config import get_settings
+from app.services.rate_limiter import BULK, INTERACTIVE, get_rate_limiter
+from app.services.sma_tracker import Bar, RollingWindow, get_sma_tracker
 from app.utils.helpers import calculate_trend
 
 logger = logging.getLogger(__name__)
@@ -18,23 +21,69 @@ settings = get_settings()
 
 
 class YahooFinanceService:
-    """Service for fetching data from Yahoo Finance."""
+    """
+    Service for fetching data from Yahoo Finance.
+    
+    yfinance is blocking, so every call is handed to a bounded thread
+    pool and awaited with a timeout. The event loop stays free to serve
+    other requests while Yahoo is slow.
+    """
     
     def __init__(self):
         self.rate_limit = settings.yfinance_rate_limit
-        self._last_request_time = None
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.yfinance_max_workers,
+            thread_name_prefix="yfinance",
+        )
+        self._semaphore = asyncio.Semaphore(settings.yfinance_max_concurrency)
+    
+    async def _rate_limit_wait(self, requests: int = 1, budget: str = BULK):
+        """
+        Wait for tokens from the shared Yahoo Finance rate limiter.
+        
+        Args:
+            requests: Number of outbound requests about to be made
+            budget: INTERACTIVE for lookups a visitor is waiting on,
+                BULK for syncs and background jobs
+        """
+        limiter = await get_rate_limiter(budget)
+        await limiter.acquire(requests)
     
-    async def _rate_limit_wait(self):
-        """Wait to respect rate limiting."""
-        if self._last_request_time:
-            elapsed = (datetime.now() - self._last_request_time).total_seconds()
-            if elapsed < 1.0 / self.rate_limit:
-                await asyncio.sleep(1.0 / self.rate_limit - elapsed)
-        self._last_request_time = datetime.now()
+    async def _run_sync(
+        self,
+        func,
+        *args,
+        timeout: Optional[float] = None,
+        **kwargs
+    ):
+        """
+        Run a blocking yfinance call in the worker pool.
+        
+        At most ``yfinance_max_concurrency`` calls run at once. If the
+        call does not finish within ``timeout`` seconds the caller gets
+        a TimeoutError; a call still queued in the pool is cancelled,
+        one already running is left to finish in its thread.
+        
+        Args:
+            func: Blocking callable
+            timeout: Seconds to wait (defaults to ``yfinance_timeout``)
+        
+        Returns:
+            Whatever ``func`` returns
+        """
+        if timeout is None:
+            timeout = settings.yfinance_timeout
+        
+        loop = asyncio.get_running_loop()
+        async with self._semaphore:
+            future = loop.run_in_executor(
+                self._executor, functools.partial(func, *args, **kwargs)
+            )
+            return await asyncio.wait_for(future, timeout)
     
-    def _run_sync(self, func, *args, **kwargs):
-        """Run synchronous yfinance call."""
-        return func(*args, **kwargs)
+    def close(self):
+        """Stop the worker pool, dropping calls that have not started."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
     
     async def get_quote(self, symbol: str) -> Optional[Dict[str, Any]]:
         """
@@ -42,60 +91,83 @@ class YahooFinanceService:
         
         Args:
             symbol: Stock or ETF symbol
-            
+        
         Returns:
             Quote data dictionary or None if not found
         """
-        await self._rate_limit_wait()
+        await self._rate_limit_wait(budget=INTERACTIVE)
+        
+        # Only the newest bars are needed once a symbol's window is loaded
+        tracker = get_sma_tracker()
+        current = tracker.is_current(symbol)
+        period = "5d" if current else "1y"
         
         try:
-            ticker = yf.Ticker(symbol)
-            info = ticker.info
-            
-            if not info or 'regularMarketPrice' not in info:
-                return None
-            
-            # Get historical data for moving averages
-            hist = ticker.history(period="1y")
-            
-            sma_50 = None
-            sma_200 = None
-            
-            if len(hist) >= 50:
-                sma_50 = float(hist['Close'].tail(50).mean())
-            if len(hist) >= 200:
-                sma_200 = float(hist['Close'].tail(200).mean())
-            
-            price = info.get('regularMarketPrice') or info.get('currentPrice')
-            prev_close = info.get('regularMarketPreviousClose', price)
-            change = (price - prev_close) if price and prev_close else 0
-            change_pct = (change / prev_close * 100) if prev_close else 0
-            
-            trend = calculate_trend(price, sma_50, sma_200)
-            
-            return {
-                'symbol': symbol.upper(),
-                'price': price,
-                'change_amount': round(change, 4),
-                'change_percent': round(change_pct, 4),
-                'open_price': info.get('regularMarketOpen'),
-                'high_price': info.get('regularMarketDayHigh'),
-                'low_price': info.get('regularMarketDayLow'),
-                'volume': info.get('regularMarketVolume'),
-                'market_cap': info.get('marketCap'),
-                'pe_ratio': info.get('trailingPE'),
-                'eps': info.get('trailingEps'),
-                'week_52_high': info.get('fiftyTwoWeekHigh'),
-                'week_52_low': info.get('fiftyTwoWeekLow'),
-                'avg_volume_10d': info.get('averageVolume10days'),
-                'dividend_yield': info.get('dividendYield'),
-                'sma_50': sma_50,
-                'sma_200': sma_200,
-                'trend': trend,
-            }
+            result = await self._run_sync(self._fetch_quote, symbol, period)
         except Exception as e:
             logger.error(f"Error fetching quote for {symbol}: {e}")
             return None
+        
+        if not result:
+            return None
+        
+        quote, bars = result
+        window = tracker.update(symbol, bars) if current else tracker.seed(symbol, bars)
+        quote['sma_50'] = window.sma_50
+        quote['sma_200'] = window.sma_200
+        quote['trend'] = calculate_trend(quote['price'], window.sma_50, window.sma_200)
+        return quote
+    
+    def _fetch_quote(self, symbol: str, period: str) -> Optional[Tuple[Dict[str, Any], List[Bar]]]:
+        """
+        Blocking part of get_quote.
+        
+        Returns the quote fields from ``ticker.info`` together with the
+        daily bars for ``period``; moving averages are filled in by the
+        caller from the symbol's rolling window.
+        """
+        ticker = yf.Ticker(symbol)
+        info = ticker.info
+        
+        if not info or 'regularMarketPrice' not in info:
+            return None
+        
+        # Get daily bars for the moving averages
+        bars = self._bars_from_frame(ticker.history(period=period))
+        
+        price = info.get('regularMarketPrice') or info.get('currentPrice')
+        prev_close = info.get('regularMarketPreviousClose', price)
+        change = (price - prev_close) if price and prev_close else 0
+        change_pct = (change / prev_close * 100) if prev_close else 0
+        
+        return {
+            'symbol': symbol.upper(),
+            'price': price,
+            'change_amount': round(change, 4),
+            'change_percent': round(change_pct, 4),
+            'open_price': info.get('regularMarketOpen'),
+            'high_price': info.get('regularMarketDayHigh'),
+            'low_price': info.get('regularMarketDayLow'),
+            'volume': info.get('regularMarketVolume'),
+            'week_52_high': info.get('fiftyTwoWeekHigh'),
+            'week_52_low': info.get('fiftyTwoWeekLow'),
+            'avg_volume_10d': info.get('averageVolume10days'),
+            **self._fundamentals_from_info(info),
+        }, bars
+    
+    def _fundamentals_from_info(self, info: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Quote fields that only ``ticker.info`` carries.
+        
+        Price downloads do not include these, so batch quotes leave them
+        out and the nightly profile and holdings syncs refresh them.
+        """
+        return {
+            'market_cap': info.get('marketCap'),
+            'pe_ratio': info.get('trailingPE'),
+            'eps': info.get('trailingEps'),
+            'dividend_yield': info.get('dividendYield'),
+        }
     
     async def get_stock_info(self, symbol: str) -> Optional[Dict[str, Any]]:
         """
@@ -103,106 +175,116 @@ class YahooFinanceService:
         
         Args:
             symbol: Stock symbol
-            
+        
         Returns:
             Stock info dictionary
         """
         await self._rate_limit_wait()
         
         try:
-            ticker = yf.Ticker(symbol)
-            info = ticker.info
-            
-            if not info:
-                return None
-            
-            # Extract CEO
-            ceo = None
-            officers = info.get('companyOfficers', [])
-            if officers:
-                for o in officers:
-                    if 'CEO' in o.get('title', '').upper():
-                        ceo = o.get('name')
-                        break
-            
-            # Construct HQ Address
-            city = info.get('city', '')
-            state = info.get('state', '')
-            country = info.get('country', '')
-            hq_parts = [p for p in [city, state, country] if p]
-            headquarters = ", ".join(hq_parts) if hq_parts else None
-
-            # Financial Ratios for Analysis (subset handled here, rest in LatestQuote)
-            # We can return them for immediate storage
-            
-            return {
-                'symbol': symbol.upper(),
-                'name': info.get('longName') or info.get('shortName', ''),
-                'sector': info.get('sector'),
-                'industry': info.get('industry'),
-                'description': info.get('longBusinessSummary'),
-                'website': info.get('website'),
-                'exchange': info.get('exchange'),
-                'country': info.get('country', 'USA'),
-                'ceo': ceo,
-                'employees': info.get('fullTimeEmployees'),
-                'headquarters': headquarters,
-                # founded? yfinance key varies. Skip for now.
-            }
+            return await self._run_sync(self._fetch_stock_info, symbol)
         except Exception as e:
             logger.error(f"Error fetching stock info for {symbol}: {e}")
             return None
     
+    def _fetch_stock_info(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Blocking part of get_stock_info."""
+        ticker = yf.Ticker(symbol)
+        info = ticker.info
+        
+        if not info:
+            return None
+        
+        # Extract CEO
+        ceo = None
+        officers = info.get('companyOfficers', [])
+        if officers:
+            for o in officers:
+                if 'CEO' in o.get('title', '').upper():
+                    ceo = o.get('name')
+                    break
+        
+        # Construct HQ Address
+        city = info.get('city', '')
+        state = info.get('state', '')
+        country = info.get('country', '')
+        hq_parts = [p for p in [city, state, country] if p]
+        headquarters = ", ".join(hq_parts) if hq_parts else None
+        
+        # Financial Ratios for Analysis (subset handled here, rest in LatestQuote)
+        # We can return them for immediate storage
+        
+        return {
+            'symbol': symbol.upper(),
+            'name': info.get('longName') or info.get('shortName', ''),
+            'sector': info.get('sector'),
+            'industry': info.get('industry'),
+            'description': info.get('longBusinessSummary'),
+            'website': info.get('website'),
+            'exchange': info.get('exchange'),
+            'country': info.get('country', 'USA'),
+            'ceo': ceo,
+            'employees': info.get('fullTimeEmployees'),
+            'headquarters': headquarters,
+            # founded? yfinance key varies. Skip for now.
+            'fundamentals': self._fundamentals_from_info(info),
+        }
+    
     async def get_etf_info(self, symbol: str) -> Optional[Dict[str, Any]]:
         """
         Get ETF information including holdings.
         
         Args:
             symbol: ETF symbol
-            
+        
         Returns:
             ETF info dictionary
         """
         await self._rate_limit_wait()
         
         try:
-            ticker = yf.Ticker(symbol)
-            info = ticker.info
-            
-            if not info:
-                return None
-            
-            # Get top holdings if available
-            holdings = []
-            try:
-                if hasattr(ticker, 'major_holders'):
-                    holder_data = ticker.institutional_holders
-                    if holder_data is not None and not holder_data.empty:
-                        for _, row in holder_data.head(20).iterrows():
-                            holdings.append({
-                                'holding_name': row.get('Holder', ''),
-                                'weight': None,
-                                'shares': row.get('Shares', 0)
-                            })
-            except:
-                pass
-            
-            return {
-                'symbol': symbol.upper(),
-                'name': info.get('longName') or info.get('shortName', ''),
-                'category': info.get('category'),
-                'expense_ratio': info.get('annualReportExpenseRatio'),
-                'aum': info.get('totalAssets'),
-                'description': info.get('longBusinessSummary'),
-                'holdings': holdings,
-            }
+            return await self._run_sync(self._fetch_etf_info, symbol)
         except Exception as e:
             logger.error(f"Error fetching ETF info for {symbol}: {e}")
             return None
     
+    def _fetch_etf_info(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Blocking part of get_etf_info."""
+        ticker = yf.Ticker(symbol)
+        info = ticker.info
+        
+        if not info:
+            return None
+        
+        # Get top holdings if available
+        holdings = []
+        try:
+            if hasattr(ticker, 'major_holders'):
+                holder_data = ticker.institutional_holders
+                if holder_data is not None and not holder_data.empty:
+                    for _, row in holder_data.head(20).iterrows():
+                        holdings.append({
+                            'holding_name': row.get('Holder', ''),
+                            'weight': None,
+                            'shares': row.get('Shares', 0)
+                        })
+        except:
+            pass
+        
+        return {
+            'symbol': symbol.upper(),
+            'name': info.get('longName') or info.get('shortName', ''),
+            'category': info.get('category'),
+            'expense_ratio': info.get('annualReportExpenseRatio'),
+            'aum': info.get('totalAssets'),
+            'description': info.get('longBusinessSummary'),
+            'holdings': holdings,
+            'fundamentals': self._fundamentals_from_info(info),
+        }
+    
     async def get_history(
-        self, 
-        symbol: str, 
+        self,
+        symbol: str,
         period: str = "1y"
     ) -> List[Dict[str, Any]]:
         """
@@ -211,50 +293,236 @@ class YahooFinanceService:
         Args:
             symbol: Stock or ETF symbol
             period: Time period (1d, 5d, 1mo, 3mo, 6mo, 1y, 2y, 5y, max)
-            
+        
         Returns:
             List of OHLCV data
         """
-        await self._rate_limit_wait()
+        await self._rate_limit_wait(budget=INTERACTIVE)
         
         try:
-            ticker = yf.Ticker(symbol)
-            hist = ticker.history(period=period)
-            
-            if hist.empty:
-                return []
-            
-            result = []
-            for date, row in hist.iterrows():
-                result.append({
-                    'date': date.strftime('%Y-%m-%d'),
-                    'open': round(row['Open'], 4),
-                    'high': round(row['High'], 4),
-                    'low': round(row['Low'], 4),
-                    'close': round(row['Close'], 4),
-                    'volume': int(row['Volume']),
-                })
-            
-            return result
+            return await self._run_sync(self._fetch_history, symbol, period)
         except Exception as e:
             logger.error(f"Error fetching history for {symbol}: {e}")
             return []
     
-    async def batch_get_quotes(self, symbols: List[str]) -> Dict[str, Dict]:
+    def _fetch_history(self, symbol: str, period: str) -> List[Dict[str, Any]]:
+        """Blocking part of get_history."""
+        ticker = yf.Ticker(symbol)
+        hist = ticker.history(period=period)
+        
+        if hist.empty:
+            return []
+        
+        result = []
+        for date, row in hist.iterrows():
+            result.append({
+                'date': date.strftime('%Y-%m-%d'),
+                'open': round(row['Open'], 4),
+                'high': round(row['High'], 4),
+                'low': round(row['Low'], 4),
+                'close': round(row['Close'], 4),
+                'volume': int(row['Volume']),
+            })
+        
+        return result
+    
+    def _bars_from_frame(self, hist: pd.DataFrame) -> List[Bar]:
+        """Convert a frame of daily OHLCV rows to bars, oldest first."""
+        hist = hist.dropna(subset=['Close'])
+        return [
+            Bar(
+                ts.date(),
+                float(o),
+                float(h),
+                float(l),
+                float(c),
+                int(v) if v == v else None,
+            )
+            for ts, o, h, l, c, v in zip(
+                hist.index,
+                hist['Open'].tolist(),
+                hist['High'].tolist(),
+                hist['Low'].tolist(),
+                hist['Close'].tolist(),
+                hist['Volume'].tolist(),
+            )
+        ]
+    
+    def _quote_from_window(
+        self,
+        symbol: str,
+        window: RollingWindow
+    ) -> Optional[Dict[str, Any]]:
         """
-        Get quotes for multiple symbols.
+        Build a quote dictionary from a symbol's rolling window.
+        
+        Only price-derived fields are filled in; fundamentals such as
+        market cap or P/E are not part of a price download and are left
+        out so callers do not overwrite stored values with None. They are
+        refreshed from ``ticker.info`` by the profile and holdings syncs.
+        
+        Args:
+            symbol: Stock or ETF symbol
+            window: Rolling window holding the symbol's daily bars
+        
+        Returns:
+            Quote data dictionary or None if there are no bars
+        """
+        if not window.bars:
+            return None
+        
+        last = window.bars[-1]
+        price = last.close
+        prev_close = window.bars[-2].close if len(window.bars) >= 2 else price
+        change = price - prev_close
+        change_pct = (change / prev_close * 100) if prev_close else 0
+        
+        sma_50 = window.sma_50
+        sma_200 = window.sma_200
+        
+        return {
+            'symbol': symbol.upper(),
+            'price': price,
+            'change_amount': round(change, 4),
+            'change_percent': round(change_pct, 4),
+            'open_price': last.open,
+            'high_price': last.high,
+            'low_price': last.low,
+            'volume': last.volume,
+            'week_52_high': window.week_52_high,
+            'week_52_low': window.week_52_low,
+            'avg_volume_10d': window.avg_volume_10d,
+            'sma_50': sma_50,
+            'sma_200': sma_200,
+            'trend': calculate_trend(price, sma_50, sma_200),
+        }
+    
+    def _symbol_frame(self, frame: pd.DataFrame, symbol: str) -> Optional[pd.DataFrame]:
+        """Extract one ticker's bars from a multi-ticker download."""
+        if not isinstance(frame.columns, pd.MultiIndex):
+            # Single-ticker downloads come back with flat columns
+            return frame
+        if symbol not in frame.columns.get_level_values(0):
+            return None
+        return frame[symbol]
+    
+    def _download_bars(self, symbols: List[str], period: str) -> Dict[str, List[Bar]]:
+        """Blocking multi-ticker download of daily bars for one chunk."""
+        frame = yf.download(
+            symbols,
+            period=period,
+            interval="1d",
+            group_by="ticker",
+            auto_adjust=True,
+            threads=True,
+            progress=False,
+        )
+        
+        results = {}
+        if frame is None or frame.empty:
+            return results
+        
+        for symbol in symbols:
+            try:
+                hist = self._symbol_frame(frame, symbol)
+                if hist is None:
+                    continue
+                bars = self._bars_from_frame(hist)
+                if bars:
+                    results[symbol] = bars
+            except Exception as e:
+                logger.error(f"Error reading bars for {symbol}: {e}")
+        
+        return results
+    
+    async def batch_get_bars(
+        self,
+        symbols: List[str],
+        period: str = "5d",
+        strict: bool = False
+    ) -> Dict[str, List[Bar]]:
+        """
+        Get daily bars for multiple symbols.
+        
+        Symbols are fetched in chunks of ``yfinance_batch_size`` with a
+        single multi-ticker download per chunk.
         
         Args:
             symbols: List of stock/ETF symbols
+            period: Time period (5d, 1mo, 3mo, 6mo, 1y, 2y, 5y, 10y, max)
+            strict: Raise when a chunk fails or downloads nothing, instead
+                of logging it and returning the other chunks (jobs must
+                not checkpoint past such a chunk)
+        
+        Returns:
+            Dictionary mapping symbols to their bars, oldest first
+        """
+        results = {}
+        batch_size = settings.yfinance_batch_size
+        
+        for i in range(0, len(symbols), batch_size):
+            chunk = symbols[i:i + batch_size]
+            # yfinance fetches each ticker of a download separately
+            await self._rate_limit_wait(len(chunk))
+            
+            try:
+                bars = await self._run_sync(
+                    self._download_bars,
+                    chunk,
+                    period,
+                    timeout=settings.yfinance_batch_timeout,
+                )
+            except Exception as e:
+                if strict:
+                    raise
+                logger.error(f"Error downloading bars for {len(chunk)} symbols: {e}")
+                continue
             
+            # yfinance reports failed tickers as missing rather than raising
+            if strict and not bars:
+                raise RuntimeError(f"No bars downloaded for {chunk[0]}..{chunk[-1]}")
+            results.update(bars)
+        
+        return results
+    
+    async def batch_get_quotes(
+        self,
+        symbols: List[str],
+        strict: bool = False
+    ) -> Dict[str, Dict]:
+        """
+        Get quotes for multiple symbols.
+        
+        Symbols are downloaded together with ``batch_get_bars``. Symbols
+        whose rolling window is current only download the last few bars;
+        the rest download a year to seed their window.
+        
+        Args:
+            symbols: List of stock/ETF symbols
+            strict: Raise on a failed download (see ``batch_get_bars``)
+        
         Returns:
             Dictionary mapping symbols to their quote data
         """
+        tracker = get_sma_tracker()
+        current = [s for s in symbols if tracker.is_current(s)]
+        stale = [s for s in symbols if not tracker.is_current(s)]
+        
         results = {}
-        for symbol in symbols:
-            quote = await self.get_quote(symbol)
-            if quote:
-                results[symbol] = quote
+        for group, period in ((current, "5d"), (stale, "1y")):
+            if not group:
+                continue
+            
+            bars_by_symbol = await self.batch_get_bars(group, period, strict)
+            for symbol, bars in bars_by_symbol.items():
+                if period == "1y":
+                    window = tracker.seed(symbol, bars)
+                else:
+                    window = tracker.update(symbol, bars)
+                quote = self._quote_from_window(symbol, window)
+                if quote:
+                    results[symbol] = quote
+        
         return results
 
 
@@ -268,3 +536,11 @@ def get_yahoo_service() -> YahooFinanceService:
     if _yahoo_service is None:
         _yahoo_service = YahooFinanceService()
     return _yahoo_service
+
+
+def close_yahoo_service() -> None:
+    """Shut down the Yahoo Finance worker pool."""
+    global _yahoo_service
+    if _yahoo_service is not None:
+        _yahoo_service.close()
+        _yahoo_service = None
@@ -1,12 +1,13 @@
 """
 Utils package initialization.
 """
-from app.utils.helpers import calculate_trend, is_market_open
+from app.utils.helpers import calculate_trend, is_market_open, is_trading_day
 from app.utils.exceptions import NotFoundError, ValidationError
 
 __all__ = [
     "calculate_trend",
     "is_market_open",
+    "is_trading_day",
     "NotFoundError",
     "ValidationError",
 ]
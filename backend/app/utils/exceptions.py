@@ -30,6 +30,19 @@ class ValidationError(HTTPException):
         )
 
 
+class BadRequestError(HTTPException):
+    """Malformed request exception."""
+    
+    def __init__(self, message: str):
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "code": "BAD_REQUEST",
+                "message": message
+            }
+        )
+
+
 class RateLimitError(HTTPException):
     """Rate limit exceeded exception."""
     
@@ -1,9 +1,10 @@
 """
 Helper utilities.
 """
-from datetime import datetime, time
+from datetime import date, datetime, time, timedelta
 from decimal import Decimal
-from typing import Optional
+from functools import lru_cache
+from typing import FrozenSet, Optional
 
 import pytz
 
@@ -39,11 +40,93 @@ def calculate_trend(
         return "sideways"
 
 
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """Date of the n-th given weekday of a month (n=-1 for the last)."""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    next_month = date(year + month // 12, month % 12 + 1, 1)
+    last = next_month - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _easter(year: int) -> date:
+    """Western Easter Sunday (anonymous Gregorian algorithm)."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _observed(day: date) -> date:
+    """Saturday holidays are observed on Friday, Sunday ones on Monday."""
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+@lru_cache(maxsize=16)
+def nyse_holidays(year: int) -> FrozenSet[date]:
+    """
+    Full-day NYSE closures for a year.
+    
+    Args:
+        year: Calendar year
+    
+    Returns:
+        Set of dates the exchange is closed (weekends excluded)
+    """
+    holidays = {
+        _nth_weekday(year, 1, 0, 3),  # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),  # Washington's Birthday
+        _easter(year) - timedelta(days=2),  # Good Friday
+        _nth_weekday(year, 5, 0, -1),  # Memorial Day
+        _observed(date(year, 7, 4)),  # Independence Day
+        _nth_weekday(year, 9, 0, 1),  # Labor Day
+        _nth_weekday(year, 11, 3, 4),  # Thanksgiving
+        _observed(date(year, 12, 25)),  # Christmas
+    }
+    
+    # New Year's Day on a Saturday is not made up on the Friday before
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:
+        holidays.add(_observed(new_year))
+    
+    if year >= 2022:
+        holidays.add(_observed(date(year, 6, 19)))  # Juneteenth
+    
+    return frozenset(holidays)
+
+
+def is_trading_day(day: Optional[date] = None) -> bool:
+    """
+    Check if the US stock market trades on a date.
+    
+    Args:
+        day: Date in US Eastern time (default: today)
+    
+    Returns:
+        True on weekdays that are not NYSE holidays
+    """
+    if day is None:
+        day = datetime.now(pytz.timezone('America/New_York')).date()
+    return day.weekday() < 5 and day not in nyse_holidays(day.year)
+
+
 def is_market_open() -> bool:
     """
     Check if US stock market is currently open.
     
-    Market hours: 9:30 AM - 4:00 PM ET, Monday-Friday
+    Market hours: 9:30 AM - 4:00 PM ET, Monday-Friday, except NYSE holidays
     
     Returns:
         True if market is open, False otherwise
@@ -51,8 +134,8 @@ def is_market_open() -> bool:
     et = pytz.timezone('America/New_York')
     now = datetime.now(et)
     
-    # Weekend check
-    if now.weekday() >= 5:
+    # Weekend and holiday check
+    if not is_trading_day(now.date()):
         return False
     
     # Market hours: 9:30 AM - 4:00 PM ET
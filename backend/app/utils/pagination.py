@@ -0,0 +1,145 @@
+"""
+Keyset (cursor) pagination helpers.
+
+A cursor encodes the sort value and symbol of the last row served. The
+next page continues with ``WHERE (sort, symbol) > cursor`` on an index,
+so its cost does not grow with depth the way OFFSET does. Cursors are
+opaque to clients: base64 of a small JSON array.
+
+NULL sort values are ordered as the smallest values (NULLS FIRST
+ascending, NULLS LAST descending), matching the page-number API.
+"""
+import base64
+import json
+from decimal import Decimal, InvalidOperation
+from math import ceil
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import Select, and_, func, literal, or_, select
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.utils.exceptions import BadRequestError
+
+
+def encode_cursor(*values: Any) -> str:
+    """Encode key values (Decimals as strings) into an opaque cursor."""
+    raw = json.dumps(list(values), default=str, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *types) -> List[Any]:
+    """
+    Decode a cursor produced by ``encode_cursor``.
+    
+    Cursors come back from clients, so each value is checked against the
+    type the query expects before it reaches a comparison.
+    
+    Args:
+        cursor: Cursor from a previous response
+        types: Allowed type (or tuple of types) of each key value
+    
+    Raises:
+        BadRequestError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise BadRequestError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != len(types):
+        raise BadRequestError("Invalid cursor")
+    for value, expected in zip(values, types):
+        if not isinstance(value, expected) or isinstance(value, bool):
+            raise BadRequestError("Invalid cursor")
+    return values
+
+
+def to_decimal(value: Any) -> Optional[Decimal]:
+    """Cursor value of a numeric column."""
+    if value is None:
+        return None
+    try:
+        return Decimal(str(value))
+    except InvalidOperation:
+        raise BadRequestError("Invalid cursor")
+
+
+def order_by_keyset(sort_col, tie_col, descending: bool) -> list:
+    """ORDER BY clauses matching ``keyset_after``."""
+    if descending:
+        return [sort_col.desc().nullslast(), tie_col.asc()]
+    return [sort_col.asc().nullsfirst(), tie_col.asc()]
+
+
+def keyset_after(
+    sort_col,
+    tie_col,
+    sort_value: Any,
+    tie_value: str,
+    descending: bool
+) -> ColumnElement:
+    """
+    Condition selecting the rows after (sort_value, tie_value).
+    
+    Args:
+        sort_col: Column sorted on (may be NULL)
+        tie_col: Unique, non-NULL column breaking ties (always ascending)
+        sort_value: Sort value of the last row served
+        tie_value: Tie value of the last row served
+        descending: Whether ``sort_col`` is sorted descending
+    """
+    if sort_value is None:
+        same_null = and_(sort_col.is_(None), tie_col > tie_value)
+        # Descending: NULLs come last, so only NULLs remain
+        return same_null if descending else or_(same_null, sort_col.isnot(None))
+    
+    beyond = sort_col < sort_value if descending else sort_col > sort_value
+    condition = or_(beyond, and_(sort_col == sort_value, tie_col > tie_value))
+    if descending:
+        condition = or_(condition, sort_col.is_(None))
+    return condition
+
+
+async def cached_total(key: str, query: Select) -> int:
+    """
+    Row count of a filtered listing, cached briefly.
+    
+    Listings change with the catalog, not with prices, so a short-lived
+    count avoids a COUNT(*) per page. The key should be versioned with
+    the catalog tag.
+    
+    Args:
+        key: Cache key
+        query: Listing query, without ordering or pagination
+    """
+    from app.database import get_session_maker
+    from app.services.cache import get_cache_service
+    
+    async def count() -> int:
+        # Own session: the count may be refreshed in the background
+        session_maker = get_session_maker()
+        async with session_maker() as db:
+            # Count rows, not columns: entity selects would pull in every
+            # column, deferred ones included
+            rows = query.with_only_columns(literal(1), maintain_column_froms=True)
+            count_query = select(func.count()).select_from(rows.subquery())
+            return (await db.execute(count_query)).scalar() or 0
+    
+    cache = await get_cache_service()
+    return await cache.get_or_load(key, count, 'count') or 0
+
+
+def page_meta(
+    total: int,
+    per_page: int,
+    page: Optional[int] = None,
+    next_cursor: Optional[str] = None
+) -> Dict[str, Any]:
+    """Pagination metadata; ``page`` is omitted for cursor requests."""
+    meta: Dict[str, Any] = {"total": total}
+    if page is not None:
+        meta["page"] = page
+    meta["per_page"] = per_page
+    meta["total_pages"] = ceil(total / per_page) if total > 0 else 0
+    meta["next_cursor"] = next_cursor
+    return meta
@@ -0,0 +1,104 @@
+"""
+Text search filters backed by Postgres pg_trgm and full-text indexes.
+
+Substring filters (``ILIKE '%term%'``) are served by GIN trigram indexes
+on the name and symbol columns. Stocks and ETFs also have a generated
+``search_vector`` (symbol, names and descriptions, English and Thai)
+with a GIN index, so a search term matches whole words in the
+descriptions too.
+
+The 'simple' text search configuration is used throughout: ticker
+symbols and company names should not be stemmed, and Postgres has no
+Thai dictionary. Thai text has no spaces between words, so Thai
+substrings are matched through the trigram indexes instead.
+
+If migration 005 has not been applied the ``search_vector`` columns do
+not exist; ``search_vector`` then returns None and searches fall back
+to substring matching alone.
+
+Listings sorted by symbol with a LIMIT would otherwise walk the symbol
+index and test every row against the filter, which the planner prefers
+because it cannot estimate how few rows a term matches.
+``filter_first`` collects the matching ids through the GIN indexes
+before the sort instead.
+"""
+from typing import FrozenSet, Optional
+
+from sqlalchemy import any_, func, literal_column, or_, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlalchemy.sql.elements import ColumnElement
+
+# Text search configuration of the search_vector columns (migration 005)
+TS_CONFIG = "simple"
+
+# Tables whose search_vector column exists; filled in at startup
+_vector_tables: FrozenSet[str] = frozenset()
+
+
+async def detect_search_vectors(conn: AsyncConnection) -> FrozenSet[str]:
+    """
+    Record which tables have a search_vector column.
+
+    Returns:
+        Names of those tables
+    """
+    global _vector_tables
+    result = await conn.execute(text(
+        "SELECT table_name FROM information_schema.columns "
+        "WHERE table_schema = current_schema() AND column_name = 'search_vector'"
+    ))
+    _vector_tables = frozenset(result.scalars())
+    return _vector_tables
+
+
+def search_vector(model):
+    """A model's search_vector column, or None if the table lacks it."""
+    if model.__tablename__ in _vector_tables:
+        return model.search_vector
+    return None
+
+
+def like_pattern(term: str) -> str:
+    """``%term%`` with LIKE wildcards in the term escaped."""
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def text_filter(term: str, *columns, vector=None) -> Optional[ColumnElement]:
+    """
+    Condition matching rows whose columns contain ``term``.
+    
+    Args:
+        term: User search text
+        columns: Columns matched by case-insensitive substring
+        vector: Optional tsvector column also matched by whole words
+    
+    Returns:
+        OR of the conditions, or None for a blank term
+    """
+    term = term.strip()
+    if not term:
+        return None
+    
+    pattern = like_pattern(term)
+    conditions = [column.ilike(pattern, escape="\\") for column in columns]
+    if vector is not None:
+        config = literal_column(f"'{TS_CONFIG}'")
+        conditions.append(vector.op("@@")(func.plainto_tsquery(config, term)))
+    return or_(*conditions)
+
+
+def filter_first(model, condition: ColumnElement) -> ColumnElement:
+    """
+    ``condition`` evaluated before sorting, as ``id = ANY(ARRAY(...))``.
+    
+    The array of matching ids is built once (from the GIN indexes), so
+    ORDER BY ... LIMIT sorts the matches instead of scanning the table
+    in sort order until enough rows pass the filter.
+    
+    Args:
+        model: Model with an ``id`` primary key
+        condition: Filter from ``text_filter``
+    """
+    matches = select(model.id).where(condition).scalar_subquery()
+    return model.id == any_(func.array(matches))
@@ -0,0 +1,91 @@
+"""
+Show query plans and timings for the text search filters.
+
+Runs EXPLAIN (ANALYZE, BUFFERS) for the searches behind /stocks?search=,
+/indices/{symbol}/components?search= and the /search fallback. Run it
+before and after migration 005 to compare plans:
+
+    python scripts/explain_search.py [term ...]
+
+Before 005 the search_vector columns do not exist and the stock and ETF
+searches match substrings only, as the API does in that case. The
+stock and ETF searches are filtered before sorting (``filter_first``),
+as in the API.
+
+With only a few hundred rows the planner may still prefer a sequential
+scan; set ENABLE_SEQSCAN=0 to see the index plans it would use as the
+tables grow.
+"""
+import asyncio
+import os
+import sys
+
+# Add the backend directory to sys.path so we can import app modules
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(backend_dir)
+
+from sqlalchemy import select
+
+from app.database import get_session_maker
+from app.models import ETF, IndexComponentView, Stock
+from app.utils.text_search import detect_search_vectors, filter_first, search_vector, text_filter
+
+DEFAULT_TERMS = ["APP", "micro", "semiconductor", "แอปเปิ้ล"]
+
+
+def queries(term: str):
+    """(label, statement) pairs for one search term."""
+    yield "stocks list", (
+        select(Stock.symbol)
+        .where(Stock.is_active == True)
+        .where(filter_first(Stock, text_filter(
+            term, Stock.symbol, Stock.name, Stock.name_th, vector=search_vector(Stock)
+        )))
+        .order_by(Stock.symbol)
+        .limit(20)
+    )
+    yield "etfs search", (
+        select(ETF.symbol)
+        .where(ETF.is_active == True)
+        .where(filter_first(ETF, text_filter(
+            term, ETF.symbol, ETF.name, ETF.name_th, vector=search_vector(ETF)
+        )))
+        .order_by(ETF.symbol)
+        .limit(20)
+    )
+    view = IndexComponentView
+    yield "components", (
+        select(view.stock_symbol)
+        .where(view.index_symbol == "SPX")
+        .where(text_filter(term, view.stock_symbol, view.name, view.name_th))
+        .order_by(view.weight.desc())
+        .limit(20)
+    )
+
+
+def compile_sql(stmt, dialect) -> str:
+    return str(stmt.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+
+
+async def explain(terms):
+    session_maker = get_session_maker()
+    async with session_maker() as db:
+        # Raw driver SQL: search terms may contain ':' or '%'
+        conn = await db.connection()
+        await detect_search_vectors(conn)
+        if os.environ.get("ENABLE_SEQSCAN") == "0":
+            await conn.exec_driver_sql("SET enable_seqscan = off")
+        
+        for term in terms:
+            for label, stmt in queries(term):
+                result = await conn.exec_driver_sql(
+                    "EXPLAIN (ANALYZE, BUFFERS) " + compile_sql(stmt, conn.dialect)
+                )
+                print(f"=== {label}: {term!r}")
+                for (line,) in result:
+                    print(line)
+                print()
+
+
+if __name__ == "__main__":
+    asyncio.run(explain(sys.argv[1:] or DEFAULT_TERMS))
@@ -5,9 +5,10 @@ set -e
 echo "Waiting for database..."
 sleep 5
 
-# Run migrations (continue even if they fail for now)
+# Run migrations. The models expect the latest schema (e.g. the
+# generated search_vector columns), so a failed migration stops the deploy
 echo "Running migrations..."
-alembic upgrade head || echo "Migration failed, continuing..."
+alembic upgrade head
 
 # Start the server
 echo "Starting server on port ${PORT:-8000}..."
@@ -0,0 +1,47 @@
+"""
+Tests for market calendar helpers.
+"""
+from datetime import date
+
+from app.utils.helpers import is_trading_day, nyse_holidays
+
+
+def test_nyse_holidays_2024():
+    assert nyse_holidays(2024) == {
+        date(2024, 1, 1),
+        date(2024, 1, 15),
+        date(2024, 2, 19),
+        date(2024, 3, 29),
+        date(2024, 5, 27),
+        date(2024, 6, 19),
+        date(2024, 7, 4),
+        date(2024, 9, 2),
+        date(2024, 11, 28),
+        date(2024, 12, 25),
+    }
+
+
+def test_weekend_holidays_are_observed_on_weekdays():
+    holidays = nyse_holidays(2027)
+
+    # Juneteenth and Christmas fall on Saturdays, Independence Day on a Sunday
+    assert date(2027, 6, 18) in holidays
+    assert date(2027, 12, 24) in holidays
+    assert date(2027, 7, 5) in holidays
+    assert date(2027, 3, 26) in holidays  # Good Friday
+
+
+def test_saturday_new_year_is_not_made_up():
+    assert date(2021, 12, 31) not in nyse_holidays(2021)
+    assert not any(day.month == 1 and day.day <= 3 for day in nyse_holidays(2022))
+
+
+def test_juneteenth_starts_in_2022():
+    assert date(2021, 6, 18) not in nyse_holidays(2021)
+    assert date(2022, 6, 20) in nyse_holidays(2022)
+
+
+def test_is_trading_day():
+    assert is_trading_day(date(2024, 7, 3))
+    assert not is_trading_day(date(2024, 7, 4))
+    assert not is_trading_day(date(2024, 7, 6))
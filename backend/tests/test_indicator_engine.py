@@ -0,0 +1,90 @@
+"""
+Tests for the vectorized indicator engine.
+"""
+import numpy as np
+
+from app.services.indicator_engine import build_price_matrix, compute_indicators
+
+
+def _bars(closes, volume=1000.0):
+    """(high, low, close, volume) tuples with a 1.0 spread around each close."""
+    return [(c + 1.0, c - 1.0, c, volume) for c in closes]
+
+
+def test_build_price_matrix_right_aligns_rows():
+    matrix = build_price_matrix({"AAA": _bars([1, 2, 3]), "BBB": _bars([5])}, days=4)
+
+    assert matrix.symbols == ["AAA", "BBB"]
+    np.testing.assert_array_equal(matrix.close[0], [np.nan, 1, 2, 3])
+    np.testing.assert_array_equal(matrix.close[1], [np.nan, np.nan, np.nan, 5])
+
+
+def test_build_price_matrix_keeps_trailing_days():
+    matrix = build_price_matrix({"AAA": _bars(range(10))}, days=3)
+
+    np.testing.assert_array_equal(matrix.close[0], [7, 8, 9])
+
+
+def test_compute_indicators_matches_per_symbol_math():
+    closes = [float(i) for i in range(1, 253)]
+    result = compute_indicators(build_price_matrix({"AAA": _bars(closes)}))
+
+    assert result.price[0] == 252.0
+    assert result.sma_50[0] == np.mean(closes[-50:])
+    assert result.sma_200[0] == np.mean(closes[-200:])
+    assert result.week_52_high[0] == 253.0
+    assert result.week_52_low[0] == 0.0
+    assert result.avg_volume_10d[0] == 1000.0
+    assert result.trend[0] == "uptrend"
+
+
+def test_compute_indicators_short_history_has_no_long_sma():
+    result = compute_indicators(build_price_matrix({"NEW": _bars([10.0] * 60)}))
+
+    assert result.sma_50[0] == 10.0
+    assert np.isnan(result.sma_200[0])
+    assert result.trend[0] == "sideways"
+
+
+def test_compute_indicators_downtrend():
+    closes = [float(i) for i in range(300, 48, -1)]
+    result = compute_indicators(build_price_matrix({"DDD": _bars(closes)}))
+
+    assert result.trend[0] == "downtrend"
+
+
+def test_average_volume_ignores_missing_days():
+    bars = _bars([10.0] * 10)
+    bars[-1] = (11.0, 9.0, 10.0, np.nan)
+    bars[-2] = (11.0, 9.0, 10.0, 4000.0)
+    result = compute_indicators(build_price_matrix({"AAA": bars}))
+
+    # Nine present volumes: eight of 1000 and one of 4000
+    assert result.avg_volume_10d[0] == 12000.0 / 9
+
+
+def test_short_history_leaves_out_incomplete_windows():
+    result = compute_indicators(build_price_matrix({"NEW": _bars([10.0] * 60)}))
+
+    assert np.isnan(result.week_52_high[0])
+    assert np.isnan(result.week_52_low[0])
+    assert result.avg_volume_10d[0] == 1000.0
+
+
+def test_to_quote_rows_writes_only_complete_indicators():
+    closes = [float(i) for i in range(1, 253)]
+    matrix = build_price_matrix({
+        "FULL": _bars(closes),
+        "NEW": _bars([10.0] * 60),
+        "FIVE": _bars([10.0] * 5),
+        "EMPTY": [],
+    })
+    rows = {row["symbol"]: row for row in compute_indicators(matrix).to_quote_rows()}
+
+    assert set(rows) == {"FULL", "NEW"}
+    assert set(rows["FULL"]) == {
+        "symbol", "sma_50", "sma_200", "week_52_high", "week_52_low",
+        "avg_volume_10d", "trend",
+    }
+    assert rows["FULL"]["trend"] == "uptrend"
+    assert rows["NEW"] == {"symbol": "NEW", "sma_50": 10.0, "avg_volume_10d": 1000}
@@ -0,0 +1,95 @@
+"""
+Tests for keyset pagination helpers.
+"""
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import Column, MetaData, Numeric, String, Table
+from sqlalchemy.dialects import postgresql
+
+from app.utils.exceptions import BadRequestError
+from app.utils.pagination import (
+    decode_cursor,
+    encode_cursor,
+    keyset_after,
+    page_meta,
+    to_decimal,
+)
+
+rows = Table(
+    "rows", MetaData(),
+    Column("symbol", String),
+    Column("change", Numeric),
+)
+
+
+def _sql(condition) -> str:
+    return str(condition.compile(
+        dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+    ))
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor(Decimal("1.50"), "AAPL")
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor, str, str) == ["1.50", "AAPL"]
+    assert decode_cursor(encode_cursor(None, "MSFT"), (str, type(None)), str) == [None, "MSFT"]
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    encode_cursor("AAPL"),
+    "e30",
+    encode_cursor(1, "AAPL"),
+    encode_cursor("1.5", ["AAPL"]),
+    encode_cursor(True, "AAPL"),
+    encode_cursor("1.5", None),
+])
+def test_decode_cursor_rejects_malformed_cursors(cursor):
+    with pytest.raises(BadRequestError) as exc:
+        decode_cursor(cursor, (str, type(None)), str)
+    assert exc.value.status_code == 400
+
+
+def test_to_decimal():
+    assert to_decimal("1.50") == Decimal("1.50")
+    assert to_decimal(None) is None
+    with pytest.raises(BadRequestError):
+        to_decimal("abc")
+
+
+def test_keyset_after_ascending():
+    sql = _sql(keyset_after(rows.c.change, rows.c.symbol, Decimal("1.5"), "AAPL", False))
+
+    assert sql == "rows.change > 1.5 OR rows.change = 1.5 AND rows.symbol > 'AAPL'"
+
+
+def test_keyset_after_descending_keeps_nulls_last():
+    sql = _sql(keyset_after(rows.c.change, rows.c.symbol, Decimal("1.5"), "AAPL", True))
+
+    assert sql == (
+        "rows.change < 1.5 OR rows.change = 1.5 AND rows.symbol > 'AAPL' "
+        "OR rows.change IS NULL"
+    )
+
+
+def test_keyset_after_null_ascending_continues_into_values():
+    sql = _sql(keyset_after(rows.c.change, rows.c.symbol, None, "AAPL", False))
+
+    assert sql == (
+        "rows.change IS NULL AND rows.symbol > 'AAPL' OR rows.change IS NOT NULL"
+    )
+
+
+def test_keyset_after_null_descending_stays_in_nulls():
+    sql = _sql(keyset_after(rows.c.change, rows.c.symbol, None, "AAPL", True))
+
+    assert sql == "rows.change IS NULL AND rows.symbol > 'AAPL'"
+
+
+def test_page_meta():
+    assert page_meta(41, 20, page=2) == {
+        "total": 41, "page": 2, "per_page": 20, "total_pages": 3, "next_cursor": None,
+    }
+    assert "page" not in page_meta(0, 20, next_cursor="abc")
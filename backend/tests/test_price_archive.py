@@ -0,0 +1,70 @@
+"""
+Tests for the on-disk price archive and stored-history coverage.
+"""
+from datetime import date, timedelta
+
+from app.services.price_archive import PriceArchive, to_rows
+from app.services.price_history import covers_period
+from app.services.sma_tracker import Bar
+
+
+def _bars(start: date, days: int):
+    return [
+        Bar(start + timedelta(days=i), 10.0, 11.0, 9.0, 10.0 + i, 1000)
+        for i in range(days)
+    ]
+
+
+def test_append_replaces_overlapping_days(tmp_path):
+    archive = PriceArchive(tmp_path)
+    start = date.today() - timedelta(days=10)
+    archive.append("AAA", _bars(start, 5))
+    archive.append("AAA", _bars(start + timedelta(days=3), 5))
+
+    rows = to_rows(archive.load("AAA"))
+
+    assert [row["date"] for row in rows] == [
+        (start + timedelta(days=i)).isoformat() for i in range(8)
+    ]
+    assert rows[3]["close"] == 10.0
+
+
+def test_recent_bars_only_do_not_cover_long_periods(tmp_path):
+    archive = PriceArchive(tmp_path)
+    archive.append("NEW", _bars(date.today() - timedelta(days=6), 5))
+
+    assert archive.read("NEW", "5y") is None
+    assert archive.read("NEW", "max") is None
+    assert len(archive.read("NEW", "5d")) == 5
+    assert archive.read("MISSING", "5y") is None
+
+
+def test_backfilled_archive_serves_the_period(tmp_path):
+    archive = PriceArchive(tmp_path)
+    # Listing may start a few days after the cutoff (weekend, holiday)
+    archive.append("OLD", _bars(date.today() - timedelta(days=1827 - 3), 1827 - 3))
+
+    records = archive.read("OLD", "5y")
+
+    assert records is not None and len(records) == 1824
+    assert archive.read("OLD", "max") is None
+
+
+def test_max_needs_a_full_history_download(tmp_path):
+    archive = PriceArchive(tmp_path)
+    archive.append("FULL", _bars(date.today() - timedelta(days=30), 20), full=True)
+    archive.append("FULL", _bars(date.today() - timedelta(days=5), 5))
+
+    assert len(archive.read("FULL", "max")) == 25
+
+
+def test_covers_period():
+    today = date.today()
+    history = [{"date": (today - timedelta(days=d)).isoformat()} for d in (370, 5, 1)]
+
+    assert covers_period(history, "1y")
+    assert not covers_period(history[1:], "1y")
+    assert covers_period(history[1:], "1d")
+    assert not covers_period(history, "5d")
+    assert not covers_period(history, "max")
+    assert not covers_period([], "1mo")
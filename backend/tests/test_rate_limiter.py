@@ -0,0 +1,130 @@
+"""
+Tests for the token buckets and rate budgets.
+"""
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import rate_limiter
+from app.services.rate_limiter import (
+    BULK,
+    INTERACTIVE,
+    RedisTokenBucket,
+    TokenBucket,
+    budget_limits,
+    get_rate_limiter,
+)
+
+SETTINGS = SimpleNamespace(
+    yfinance_rate_limit=5,
+    yfinance_burst=10,
+    yfinance_interactive_rate_limit=2,
+    yfinance_interactive_burst=4,
+    yfinance_rate_limit_backend="redis",
+    redis_url="redis://localhost:6379",
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter.time, "monotonic", clock)
+    return clock
+
+
+def test_burst_is_served_without_waiting(clock):
+    bucket = TokenBucket(rate=5, capacity=10)
+
+    assert [bucket._reserve(1) for _ in range(10)] == [0.0] * 10
+
+
+def test_callers_past_the_burst_book_later_slots(clock):
+    bucket = TokenBucket(rate=5, capacity=2)
+    bucket._reserve(2)
+
+    assert bucket._reserve(1) == pytest.approx(0.2)
+    assert bucket._reserve(1) == pytest.approx(0.4)
+    assert bucket._reserve(5) == pytest.approx(1.4)
+
+
+def test_tokens_refill_up_to_capacity(clock):
+    bucket = TokenBucket(rate=5, capacity=2)
+    bucket._reserve(2)
+
+    clock.now += 0.2
+    assert bucket._reserve(1) == 0.0
+
+    clock.now += 60
+    assert bucket._reserve(2) == 0.0
+    assert bucket._reserve(1) == pytest.approx(0.2)
+
+
+@pytest.mark.asyncio
+async def test_acquire_sleeps_for_the_booked_wait(clock, monkeypatch):
+    sleeps = []
+
+    async def fake_sleep(seconds):
+        sleeps.append(seconds)
+
+    monkeypatch.setattr(rate_limiter.asyncio, "sleep", fake_sleep)
+    bucket = TokenBucket(rate=2, capacity=1)
+
+    await bucket.acquire()
+    await bucket.acquire(3)
+
+    assert sleeps == [pytest.approx(1.5)]
+
+
+def test_budgets_split_the_total_rate():
+    assert budget_limits(SETTINGS, INTERACTIVE) == (2, 4)
+    assert budget_limits(SETTINGS, BULK) == (3, 6)
+
+
+def test_interactive_share_must_leave_room_for_syncs():
+    settings = SimpleNamespace(**{**vars(SETTINGS), "yfinance_interactive_rate_limit": 5})
+
+    with pytest.raises(ValueError):
+        budget_limits(settings, BULK)
+
+
+class FakeRedis:
+    def __init__(self, up):
+        self.up = up
+
+    async def ping(self):
+        if not self.up:
+            raise ConnectionError("down")
+
+    def register_script(self, script):
+        return None
+
+
+@pytest.mark.asyncio
+async def test_redis_is_probed_again_after_an_outage(clock, monkeypatch):
+    import redis.asyncio as redis
+
+    server = {"up": False}
+    monkeypatch.setattr(redis, "from_url", lambda url: FakeRedis(server["up"]))
+    monkeypatch.setattr(rate_limiter, "get_settings", lambda: SETTINGS)
+    monkeypatch.setattr(rate_limiter, "_rate_limiters", {})
+    monkeypatch.setattr(rate_limiter, "_local_fallbacks", {})
+
+    local = await get_rate_limiter(BULK)
+    assert isinstance(local, TokenBucket)
+
+    server["up"] = True
+    assert await get_rate_limiter(BULK) is local
+
+    clock.now += rate_limiter.REDIS_RETRY_INTERVAL
+    shared = await get_rate_limiter(BULK)
+    assert isinstance(shared, RedisTokenBucket)
+    assert (shared.rate, shared.capacity) == (3, 6)
+    assert await get_rate_limiter(BULK) is shared
@@ -0,0 +1,68 @@
+"""
+Tests for the in-process symbol search index.
+"""
+from app.services.search_index import SearchEntry, SearchIndex
+
+ENTRIES = [
+    SearchEntry("AAPL", "stock", "Apple Inc.", "แอปเปิ้ล", "Information Technology", 3e12),
+    SearchEntry("APP", "stock", "AppLovin", None, "Information Technology", 1e11),
+    SearchEntry("AMAT", "stock", "Applied Materials", None, "Information Technology", 1.5e11),
+    SearchEntry("MSFT", "stock", "Microsoft", None, "Information Technology", 3.1e12),
+    SearchEntry("AMD", "stock", "Advanced Micro Devices", None, "Information Technology", 2e11),
+    SearchEntry("SMH", "etf", "VanEck Semiconductor ETF", None, "Sector", 2e10),
+    SearchEntry("SOXX", "etf", "iShares Semiconductor ETF", None, "Sector", 1.3e10),
+]
+
+
+def _symbols(results, type="stock"):
+    return [entry.symbol for entry in results[type]]
+
+
+def test_exact_symbol_then_prefix_then_name_words():
+    results = SearchIndex(ENTRIES).search("app")
+
+    # APP matches exactly; Apple and Applied Materials by a name word,
+    # larger market cap first
+    assert _symbols(results) == ["APP", "AAPL", "AMAT"]
+
+
+def test_name_word_prefix_ranks_by_popularity():
+    results = SearchIndex(ENTRIES).search("micro")
+
+    assert _symbols(results) == ["MSFT", "AMD"]
+
+
+def test_substring_match_needs_three_characters():
+    index = SearchIndex(ENTRIES)
+
+    assert _symbols(index.search("conductor"), "etf") == ["SMH", "SOXX"]
+    assert index.search("ft") == {"stock": [], "etf": []}
+
+
+def test_thai_names_are_searchable():
+    results = SearchIndex(ENTRIES).search("แอป")
+
+    assert _symbols(results) == ["AAPL"]
+
+
+def test_type_filter_and_limit():
+    index = SearchIndex(ENTRIES)
+
+    assert list(index.search("a", types=("etf",))) == ["etf"]
+    assert len(index.search("a", limit=2)["stock"]) == 2
+
+
+def test_add_replaces_and_remove_forgets():
+    index = SearchIndex(ENTRIES)
+    index.add(SearchEntry("APP", "stock", "Renamed Co", None, None, 0))
+
+    assert "APP" not in _symbols(index.search("applovin"))
+    assert _symbols(index.search("renamed")) == ["APP"]
+
+    index.remove("APP")
+    assert len(index) == len(ENTRIES) - 1
+    assert index.search("renamed") == {"stock": [], "etf": []}
+
+
+def test_blank_query_matches_nothing():
+    assert SearchIndex(ENTRIES).search("  ") == {"stock": [], "etf": []}
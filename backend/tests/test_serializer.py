@@ -0,0 +1,71 @@
+"""
+Tests for cache value serialization.
+"""
+import json
+
+import pytest
+
+from app.services.serializer import HEADER_MARK, Serializer
+
+VALUE = {"symbol": "AAPL", "price": 189.5, "tags": ["tech", "แอปเปิ้ล"], "volume": None}
+
+
+@pytest.mark.parametrize("codec", ["json", "orjson", "msgpack"])
+@pytest.mark.parametrize("compression", ["none", "zstd"])
+def test_round_trip(codec, compression):
+    serializer = Serializer(codec, compression, threshold=0)
+
+    assert serializer.loads(serializer.dumps(VALUE)) == VALUE
+
+
+def test_small_payloads_stay_uncompressed():
+    serializer = Serializer("orjson", "zstd", threshold=1024)
+    data = serializer.dumps(VALUE)
+
+    assert data[0] & 0x03 == 0
+    assert json.loads(data[1:]) == VALUE
+
+
+def test_large_payloads_are_compressed():
+    serializer = Serializer("orjson", "zstd", threshold=1024)
+    value = [VALUE] * 200
+    data = serializer.dumps(value)
+
+    assert data[0] & 0x03 == 1
+    assert len(data) < len(json.dumps(value))
+    assert serializer.loads(data) == value
+
+
+def test_reads_entries_written_with_other_settings():
+    written = Serializer("msgpack", "zstd", threshold=0).dumps(VALUE)
+
+    assert Serializer("json", "none").loads(written) == VALUE
+
+
+def test_reads_legacy_plain_json():
+    serializer = Serializer("orjson", "zstd")
+
+    assert serializer.loads(json.dumps(VALUE)) == VALUE
+    assert serializer.loads(json.dumps(VALUE).encode()) == VALUE
+
+
+def test_header_is_never_a_json_start_byte():
+    data = Serializer("json", "none").dumps(VALUE)
+
+    assert data[0] >= HEADER_MARK
+    assert data[1:2] == b"{"
+
+
+def test_non_json_values_are_stringified():
+    from datetime import date
+
+    serializer = Serializer("orjson")
+
+    assert serializer.loads(serializer.dumps({"day": date(2024, 1, 2)})) == {"day": "2024-01-02"}
+
+
+def test_unknown_settings_are_rejected():
+    with pytest.raises(ValueError):
+        Serializer("pickle")
+    with pytest.raises(ValueError):
+        Serializer("json", "gzip")
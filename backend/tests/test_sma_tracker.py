@@ -0,0 +1,88 @@
+"""
+Tests for rolling moving-average windows.
+"""
+from datetime import date, timedelta
+
+from app.services.sma_tracker import WINDOW_DAYS, Bar, RollingWindow, SMATracker
+
+
+def _bar(day: date, close: float, volume=100) -> Bar:
+    return Bar(day, close, close + 1, close - 1, close, volume)
+
+
+def _days(n: int, start: date = date(2024, 1, 1)):
+    return [start + timedelta(days=i) for i in range(n)]
+
+
+def _window(closes) -> RollingWindow:
+    window = RollingWindow()
+    for day, close in zip(_days(len(closes)), closes):
+        window.update(_bar(day, close))
+    return window
+
+
+def test_smas_need_full_windows():
+    window = _window([1.0] * 49)
+
+    assert window.sma_50 is None
+    assert window.sma_200 is None
+
+
+def test_running_sums_match_recomputed_means():
+    closes = [float(i) for i in range(1, 301)]
+    window = _window(closes)
+
+    assert len(window.bars) == WINDOW_DAYS
+    assert window.sma_50 == sum(closes[-50:]) / 50
+    assert window.sma_200 == sum(closes[-200:]) / 200
+
+
+def test_same_day_bar_revises_the_last_close():
+    closes = [10.0] * 200
+    window = _window(closes)
+    last_day = window.last_date
+
+    window.update(_bar(last_day, 60.0))
+
+    assert len(window.bars) == 200
+    assert window.bars[-1].close == 60.0
+    assert window.sma_50 == (49 * 10.0 + 60.0) / 50
+    assert window.sma_200 == (199 * 10.0 + 60.0) / 200
+
+
+def test_older_bars_are_ignored():
+    window = _window([10.0] * 50)
+
+    window.update(_bar(date(2023, 1, 1), 1000.0))
+
+    assert window.sma_50 == 10.0
+    assert window.last_date == date(2024, 1, 1) + timedelta(days=49)
+
+
+def test_ranges_and_average_volume():
+    window = RollingWindow()
+    for i, day in enumerate(_days(12)):
+        window.update(_bar(day, 10.0 + i, volume=None if i == 11 else 100 * (i + 1)))
+
+    assert window.week_52_high == 22.0
+    assert window.week_52_low == 9.0
+    # The last ten bars are i=2..11 and the newest has no volume
+    assert window.avg_volume_10d == int(sum(100 * (i + 1) for i in range(2, 11)) / 9)
+
+
+def test_tracker_is_current_only_for_recent_windows():
+    tracker = SMATracker()
+    tracker.seed("old", [_bar(date.today() - timedelta(days=30), 1.0)])
+    tracker.seed("new", [_bar(date.today() - timedelta(days=1), 1.0)])
+
+    assert not tracker.is_current("OLD")
+    assert tracker.is_current("NEW")
+    assert not tracker.is_current("MISSING")
+
+
+def test_tracker_update_seeds_unknown_symbols():
+    tracker = SMATracker()
+    window = tracker.update("aaa", [_bar(date(2024, 1, 1), 5.0)])
+
+    assert tracker.get("AAA") is window
+    assert window.bars[-1].close == 5.0
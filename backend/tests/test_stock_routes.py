@@ -0,0 +1,190 @@
+"""
+Tests for stock endpoints that add symbols missing from the database.
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.routers import stocks
+from app.services import views, yahoo_finance
+
+INFO = {
+    "longName": "Newco Holdings Inc.",
+    "sector": "Technology",
+    "industry": "Software",
+    "longBusinessSummary": "Makes software.",
+    "website": "https://newco.example",
+    "exchange": "NMS",
+    "country": "United States",
+    "city": "Austin",
+    "state": "TX",
+    "fullTimeEmployees": 120,
+    "companyOfficers": [{"name": "Jane Doe", "title": "CEO & Director"}],
+    "marketCap": 1_500_000_000,
+    "trailingPE": 21.5,
+    "trailingEps": 1.2,
+    "dividendYield": None,
+}
+
+
+class FakeResult:
+    def scalar_one_or_none(self):
+        return None
+    
+    def first(self):
+        return None
+
+
+class FakeSession:
+    """Session over an empty database that records what is added."""
+    
+    def __init__(self):
+        self.added = []
+        self.committed = False
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc):
+        return False
+    
+    async def execute(self, statement):
+        return FakeResult()
+    
+    def add(self, obj):
+        self.added.append(obj)
+    
+    async def commit(self):
+        self.committed = True
+    
+    async def refresh(self, obj):
+        pass
+
+
+class FakeCache:
+    async def get_or_load(self, key, loader, kind):
+        return await loader()
+    
+    async def get_many(self, keys):
+        return {}
+    
+    async def set(self, key, value, kind):
+        pass
+    
+    async def versioned_key(self, key, *tags):
+        return key
+    
+    async def bump(self, tag):
+        pass
+
+
+class Recorder:
+    def __init__(self):
+        self.calls = []
+    
+    def add(self, item):
+        self.calls.append(item)
+    
+    enqueue = add
+    
+    async def record(self, symbol):
+        self.calls.append(symbol)
+
+
+@pytest.fixture
+def env(monkeypatch):
+    session = FakeSession()
+    saved = []
+    missing = []
+    service = yahoo_finance.YahooFinanceService()
+    
+    async def no_wait(*args, **kwargs):
+        pass
+    
+    async def unknown(symbol, resource):
+        return False
+    
+    async def get_cache():
+        return FakeCache()
+    
+    async def save_quotes(db, quotes, type_map):
+        saved.extend(q for q in quotes if q)
+        return len(saved)
+    
+    async def remember_missing(symbol):
+        missing.append(symbol)
+    
+    monkeypatch.setattr(service, "_rate_limit_wait", no_wait)
+    monkeypatch.setattr(stocks, "check_symbol", unknown)
+    monkeypatch.setattr(stocks, "get_demand_tracker", lambda: Recorder())
+    monkeypatch.setattr(stocks, "get_session_maker", lambda: lambda: session)
+    monkeypatch.setattr(stocks, "get_cache_service", get_cache)
+    monkeypatch.setattr(stocks, "get_enrichment_queue", lambda: Recorder())
+    monkeypatch.setattr(views, "get_session_maker", lambda: lambda: session)
+    monkeypatch.setattr(views, "get_enrichment_queue", lambda: Recorder())
+    monkeypatch.setattr(views, "get_yahoo_service", lambda: service)
+    monkeypatch.setattr(views, "get_cache_service", get_cache)
+    monkeypatch.setattr(views, "save_quotes", save_quotes)
+    monkeypatch.setattr(views, "remember_missing", remember_missing)
+    monkeypatch.setattr(views, "get_symbol_registry", lambda: Recorder())
+    monkeypatch.setattr(views, "get_symbol_search", lambda: Recorder())
+    
+    yield {"session": session, "saved": saved, "missing": missing}
+    service._executor.shutdown(wait=False)
+
+
+def _ticker(info):
+    return lambda symbol: type("Ticker", (), {"info": info})()
+
+
+def test_get_stock_adds_symbol_missing_from_db(env, monkeypatch):
+    monkeypatch.setattr(yahoo_finance.yf, "Ticker", _ticker(INFO))
+    
+    response = TestClient(app).get("/api/stocks/newc")
+    
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert data["symbol"] == "NEWC"
+    assert data["name"] == "Newco Holdings Inc."
+    assert data["ceo"] == "Jane Doe"
+    assert data["headquarters"] == "Austin, TX, United States"
+    
+    (stock,) = env["session"].added
+    assert stock.symbol == "NEWC"
+    assert env["session"].committed
+    assert env["saved"] == [
+        {"symbol": "NEWC", "market_cap": 1_500_000_000, "pe_ratio": 21.5, "eps": 1.2},
+    ]
+
+
+def test_get_stock_unknown_to_yahoo_is_not_found(env, monkeypatch):
+    monkeypatch.setattr(yahoo_finance.yf, "Ticker", _ticker({}))
+    
+    response = TestClient(app).get("/api/stocks/NOPE")
+    
+    assert response.status_code == 404
+    assert env["session"].added == []
+    assert env["missing"] == ["NOPE"]
+
+
+def test_stock_page_adds_symbol_missing_from_db(env, monkeypatch):
+    monkeypatch.setattr(yahoo_finance.yf, "Ticker", _ticker(INFO))
+    
+    response = TestClient(app).get("/api/stocks/NEWC/page?period=none")
+    
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    data = response.json()["data"]
+    assert data["profile"]["name"] == "Newco Holdings Inc."
+    assert data["quote"] is None
+    assert data["history"] is None
+    assert [stock.symbol for stock in env["session"].added] == ["NEWC"]
+
+
+def test_stock_page_unknown_to_yahoo_is_not_found(env, monkeypatch):
+    monkeypatch.setattr(yahoo_finance.yf, "Ticker", _ticker({}))
+    
+    response = TestClient(app).get("/api/stocks/NOPE/page")
+    
+    assert response.status_code == 404
+    assert env["missing"] == ["NOPE"]
@@ -0,0 +1,55 @@
+"""
+Tests for batch downloads in the Yahoo Finance service.
+"""
+from datetime import date
+
+import pytest
+
+from app.services import yahoo_finance
+from app.services.sma_tracker import Bar
+
+BAR = Bar(date(2024, 1, 2), 1.0, 2.0, 0.5, 1.5, 100)
+
+
+@pytest.fixture
+def service(monkeypatch):
+    service = yahoo_finance.YahooFinanceService()
+    
+    async def no_wait(*args, **kwargs):
+        pass
+    
+    monkeypatch.setattr(service, "_rate_limit_wait", no_wait)
+    monkeypatch.setattr(yahoo_finance.settings, "yfinance_batch_size", 2)
+    yield service
+    service.close()
+
+
+def _downloads(monkeypatch, service, outcomes):
+    """Make each chunk download return (or raise) the next outcome."""
+    outcomes = iter(outcomes)
+    
+    def download(symbols, period):
+        outcome = next(outcomes)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return {s: [BAR] for s in symbols} if outcome else {}
+    
+    monkeypatch.setattr(service, "_download_bars", download)
+
+
+@pytest.mark.asyncio
+async def test_failed_chunks_are_skipped_by_default(service, monkeypatch):
+    _downloads(monkeypatch, service, [ConnectionError("reset"), True])
+    
+    bars = await service.batch_get_bars(["A", "B", "C"])
+    
+    assert list(bars) == ["C"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("outcome", [ConnectionError("reset"), False])
+async def test_strict_downloads_raise_on_failed_chunks(service, monkeypatch, outcome):
+    _downloads(monkeypatch, service, [True, outcome])
+    
+    with pytest.raises(Exception):
+        await service.batch_get_bars(["A", "B", "C"], strict=True)
@@ -1,8 +1,8 @@
 'use client';
 
-import { useQuery } from '@tanstack/react-query';
+import { useQuery, useQueryClient } from '@tanstack/react-query';
 import { useParams } from 'next/navigation';
-import { fetchStock, fetchStockQuote, fetchStockAnalysis } from '@/lib/api';
+import { fetchStockPage, fetchStockQuote } from '@/lib/api';
 import TradingViewChart from '@/components/charts/TradingViewChart';
 import CompanyProfile from '@/components/features/CompanyProfile';
 import StockAnalysis from '@/components/features/StockAnalysis';
@@ -12,25 +12,33 @@ export default function StockDetailPage() {
   const params = useParams();
   const symbol = params.symbol as string;
 
-  const { data: stockData, isLoading: stockLoading } = useQuery({
-    queryKey: ['stock', symbol],
-    queryFn: () => fetchStock(symbol),
+  const queryClient = useQueryClient();
+
+  // The chart is a TradingView widget, so the page payload skips history
+  const { data: pageData, isLoading: stockLoading } = useQuery({
+    queryKey: ['stockPage', symbol],
+    queryFn: async () => {
+      const page = await fetchStockPage(symbol, 'none');
+      // Seed the polled quote before it is enabled, so it starts fresh
+      if (page?.data?.quote) {
+        queryClient.setQueryData(['quote', symbol], { success: true, data: page.data.quote });
+      }
+      return page;
+    },
   });
 
+  // Only the quote is polled, starting from the one in the page payload
   const { data: quoteData } = useQuery({
     queryKey: ['quote', symbol],
     queryFn: () => fetchStockQuote(symbol),
     refetchInterval: 60000,
+    staleTime: 60000,
+    enabled: !!pageData,
   });
 
-  const { data: analysisData } = useQuery({
-    queryKey: ['analysis', symbol],
-    queryFn: () => fetchStockAnalysis(symbol),
-  });
-
-  const stock = stockData?.data as Stock;
+  const stock = pageData?.data?.profile as Stock;
   const quote = quoteData?.data as LatestQuote;
-  const analysis = analysisData?.data as IStockAnalysis;
+  const analysis = pageData?.data?.analysis as IStockAnalysis;
 
   if (stockLoading) {
     return (
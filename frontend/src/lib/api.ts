@@ -67,6 +67,12 @@ export const fetchStockHistory = async (symbol: string, period = '1y') => {
   return data;
 };
 
+// Profile, quote, analysis and history in one request ('none' skips history)
+export const fetchStockPage = async (symbol: string, period = '1y') => {
+  const { data } = await api.get(`/api/stocks/${symbol}/page?period=${period}`);
+  return data;
+};
+
 export const fetchStockAnalysis = async (symbol: string) => {
   const { data } = await api.get(`/api/stocks/${symbol}/analysis`);
   return data;